@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+"""
+Synthetic-load benchmark for vdc.py
+-----------------------------------
+Fills a scratch data directory with N vendors × M entries per tier (linked
+T1 → T4 chains, T4 volume shares that total 100 % per pulp mill, CoC
+certificate PDFs with realistic names), plus a demand history and an
+open-PO extract, then drives the real app through Streamlit's headless
+AppTest harness.  Every step runs in a fresh interpreter, logged in as the
+first vendor:
+
+* export    – "Export all vendors" (xlsx) on the main page, until the
+              background job has written the file
+* view_t4   – the paged T4 viewer (page_view_tier)
+* stats     – the statistics dashboard (page_stats)
+* demand    – page_demand on the demand history
+* orders    – page_orders on the open-PO extract
+
+Reported per step: `cold_s` (first run), `warm_s` (median of the repeats),
+`peak_rss_mb` (process high-water mark) and, from a second interpreter under
+tracemalloc, `alloc_peak_mb` / `alloc_blocks` for the cold run.
+
+    python bench/load.py                                # 200 vendors × 50 entries per tier
+    python bench/load.py --vendors 20 --entries 2000    # one big vendor's pages
+    python bench/load.py --save baseline                # record under bench/results/load.json
+    python bench/load.py --compare baseline             # exit 1 if a step regressed
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+RESULTS = os.path.join(HERE, "results", "load.json")
+STEPS = ("export", "view_t4", "stats", "demand", "orders")
+UPLOADS = {"demand": "demand.csv", "orders": "orders.csv"}
+METRICS = {"cold_s": 0.05, "warm_s": 0.05, "peak_rss_mb": 10.0, "alloc_peak_mb": 5.0}   # noise floors
+
+sys.path.insert(0, ROOT)
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  Synthetic data
+# ──────────────────────────────────────────────────────────────────────────────
+_COUNTRIES = {                          # country → (states, lat box, lon box)
+    "Brazil":    (["São Paulo", "Minas Gerais", "Bahia", "Paraná"], (-25, -12), (-52, -39)),
+    "Indonesia": (["Riau", "Jambi", "South Sumatra", "East Kalimantan"], (-4, 2), (101, 117)),
+    "Finland":   (["Uusimaa", "Pirkanmaa", "North Karelia"], (60, 66), (22, 30)),
+    "Sweden":    (["Västerbotten", "Jämtland", "Dalarna"], (59, 65), (13, 20)),
+    "Chile":     (["Biobío", "Maule", "Araucanía"], (-39, -35), (-73, -71)),
+    "Uruguay":   (["Rivera", "Tacuarembó", "Paysandú"], (-33, -30), (-58, -55)),
+}
+_PROGRAMS = ("FSC", "PEFC", "SFI")
+
+
+def _pdf(serial: int) -> bytes:
+    body = f"BT /F1 12 Tf 72 720 Td (CoC certificate {serial}) Tj ET".encode()
+    return (b"%PDF-1.4\n1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n"
+            b"2 0 obj << /Type /Pages /Kids [3 0 R] /Count 1 >> endobj\n"
+            b"3 0 obj << /Type /Page /Parent 2 0 R /Contents 4 0 R >> endobj\n"
+            + f"4 0 obj << /Length {len(body)} >> stream\n".encode() + body
+            + b"\nendstream endobj\ntrailer << /Root 1 0 R >>\n%%EOF\n")
+
+
+def _certificates(blobs, rng: np.random.Generator, n: int = 40) -> List[str]:
+    """`n` distinct certificate PDFs, shared across vendors like real group certificates."""
+    digests = []
+    for serial in range(n):
+        prog = _PROGRAMS[serial % len(_PROGRAMS)]
+        name = f"{prog}-C{rng.integers(100000, 999999)}_CoC_{rng.integers(2022, 2026)}.pdf"
+        digests.append(blobs.put(io.BytesIO(_pdf(serial)), name))
+    return digests
+
+
+def _shares(rng: np.random.Generator, n: int) -> np.ndarray:
+    """n volume percentages (one decimal) summing to exactly 100."""
+    share = np.round(rng.dirichlet(np.full(n, 2.0)) * 100, 1)
+    share[-1] = round(100 - share[:-1].sum(), 1)
+    return share
+
+
+def _vendor(rng: np.random.Generator, m: int, certs: List[str]) -> Dict[str, List[Dict]]:
+    countries = list(_COUNTRIES)
+    data: Dict[str, List[Dict]] = {}
+    ids = lambda tier: [f"{tier}-{rng.bytes(8).hex()}" for _ in range(m)]
+
+    def place(country: str) -> Dict:
+        states, _, _ = _COUNTRIES[country]
+        state = states[rng.integers(len(states))]
+        return {"country": country, "state": state, "muni": f"{state} {rng.integers(1, 40)}"}
+
+    def mill(entry_id: str, parent: str) -> Dict:
+        granted = "Y" if rng.random() < 0.8 else "N"
+        return {"_id": entry_id, **place(countries[rng.integers(len(countries))]),
+                "owned": "Yes" if rng.random() < 0.7 else "No", "owner_company": "",
+                "granted": granted, "coc_prog": _PROGRAMS[rng.integers(3)], "coc_copy": granted,
+                "coc_file": certs[rng.integers(len(certs))], "parent": parent}
+
+    t1 = ids("t1")
+    data["t1"] = [{"_id": i, **place(countries[rng.integers(len(countries))]),
+                   "cert_files": list(rng.choice(certs, size=rng.integers(1, 4), replace=False))} for i in t1]
+    t2 = ids("t2")
+    data["t2"] = [mill(i, t1[rng.integers(m)]) for i in t2]
+    t3 = ids("t3")
+    data["t3"] = [mill(i, t2[rng.integers(m)]) for i in t3]
+
+    parents = np.asarray(t3)[rng.integers(m, size=m)]
+    volume = np.zeros(m)
+    for p in np.unique(parents):            # each pulp mill's plantations total 100 %
+        at = np.flatnonzero(parents == p)
+        volume[at] = _shares(rng, len(at))
+    data["t4"] = []
+    for i, entry_id in enumerate(ids("t4")):
+        country = countries[rng.integers(len(countries))]
+        _, (lat0, lat1), (lon0, lon1) = _COUNTRIES[country]
+        virgin = float(rng.choice([100, 90, 80, 70, 60]))
+        certified = rng.random() < 0.6
+        data["t4"].append({
+            "_id": entry_id, "product": "Eucalyptus pulpwood" if rng.random() < 0.6 else "Acacia pulpwood",
+            **place(country), "gps": f"{rng.uniform(lat0, lat1):.5f}, {rng.uniform(lon0, lon1):.5f}",
+            "source": ["Logging Company", "Woodlot", "Community Forest"][rng.integers(3)],
+            "supplier": f"Forest Co {rng.integers(1, 500)}",
+            "volume": float(volume[i]), "virgin": virgin, "recycled": 100 - virgin,
+            "granted": "Y" if certified else "N", "coc_prog": _PROGRAMS[rng.integers(3)] if certified else "",
+            "coc_copy": "Y" if certified else "N", "coc_file": certs[rng.integers(len(certs))],
+            "p_purchase": "Yes" if certified else "No", "p_prog": "FSC" if certified else "",
+            "vol_cert": float(rng.integers(0, 101)) if certified else 0.0,
+            "vol_ctrl": float(rng.integers(0, 101)) if certified else 0.0,
+            "parent": str(parents[i])})
+    return data
+
+
+def _demand_csv(path: str, rng: np.random.Generator, skus: int, plants: int = 6, months: int = 36) -> None:
+    month = pd.period_range("2022-01", periods=months, freq="M").astype(str)
+    n = skus * plants
+    season = 10 * np.sin(np.arange(months) * 2 * np.pi / 12)
+    pd.DataFrame({
+        "SKU": np.repeat([f"SKU{i:05d}" for i in range(skus)], plants * months),
+        "Plant": np.tile(np.repeat([f"P{p}" for p in range(plants)], months), skus),
+        "Month": np.tile(month, n),
+        "Volume": (np.tile(season, n) + rng.normal(100, 5, n * months)).round(2),
+    }).to_csv(path, index=False)
+
+
+def _orders_csv(path: str, rng: np.random.Generator, rows: int) -> None:
+    pd.DataFrame({
+        "PO": [f"PO{i:08d}" for i in range(rows)],
+        "Supplier": rng.choice([f"Supplier {i}" for i in range(300)], rows),
+        "Material": rng.choice([f"MAT{i:05d}" for i in range(5000)], rows),
+        "Qty": rng.integers(1, 5000, rows),
+        "LeadTime": rng.gamma(2.0, 15.0, rows).round(1),
+    }).to_csv(path, index=False)
+
+
+def generate(data_dir: str, vendors: int, entries: int, orders: int, seed: int = 0) -> str:
+    """Populate `data_dir` the way the app lays it out; returns the first vendor's e-mail."""
+    from pmivdc.blobs import BlobStore
+    from pmivdc.store import Store
+
+    rng = np.random.default_rng(seed)
+    store = Store(os.path.join(data_dir, "pmivdc.sqlite3"))
+    certs = _certificates(BlobStore(os.path.join(data_dir, "certificates")), rng)
+    for v in range(vendors):
+        vendor_id = f"vendor{v:04d}@bench.test"
+        store.save_meta(vendor_id, {"proc_contact": "Bench", "proc_product": "Cigarette paper",
+                                    "supplier_group": f"Group {v // 5}", "supplier_name": f"Vendor {v:04d}",
+                                    "total_volume_2024": float(rng.integers(1000, 50000))})
+        for tier, rows in _vendor(rng, entries, certs).items():
+            store.upsert(vendor_id, tier, rows)
+    _demand_csv(os.path.join(data_dir, UPLOADS["demand"]), rng, skus=max(10, entries * 2))
+    _orders_csv(os.path.join(data_dir, UPLOADS["orders"]), rng, orders)
+    return "vendor0000@bench.test"
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  One step, one interpreter
+# ──────────────────────────────────────────────────────────────────────────────
+_CHILD = r"""
+import io, json, os, re, resource, statistics, sys, time, tracemalloc
+import streamlit
+from streamlit.testing.v1 import AppTest
+from pmivdc.mailer import LocalSMTP
+
+app, step, email, upload, repeat, trace = sys.argv[1:7]
+repeat, trace = int(repeat), trace == "1"
+if upload:                              # AppTest cannot drive a file_uploader
+    payload = open(upload, "rb").read()
+    class Upload(io.BytesIO):
+        name, size = upload.rsplit("/", 1)[-1], len(payload)
+    streamlit.file_uploader = lambda *a, **k: Upload(payload)
+
+smtp = LocalSMTP()                      # a mailed code: demo-mode codes never make an admin
+os.environ.update(PMIVDC_SMTP_HOST="127.0.0.1", PMIVDC_SMTP_PORT=str(smtp.start()))
+at = AppTest.from_file(app, default_timeout=600).run()
+at.text_input[0].input("Bench Co"); at.text_input[1].input(email); at.button[0].click().run()
+while not smtp.messages:
+    time.sleep(0.01)
+code = re.search(r"login code is (\w+)", smtp.messages[0]["data"]).group(1)
+at.text_input[0].input(code); at.button[0].click().run()
+assert not at.exception, at.exception
+
+def once():
+    if step == "export":
+        at.session_state["page"] = "main"; at.run()
+        next(b for b in at.button if "Export all vendors" in b.label).click()
+    else:
+        at.session_state["page"] = step
+    t = time.perf_counter()
+    at.run()
+    if step == "export":                # written off the script thread: wait for the file
+        from pmivdc.export import JOBS
+        job = JOBS.get(at.session_state["export_job"])
+        while job.state in ("queued", "running"):
+            time.sleep(0.01)
+        assert job.state == "done", job.error
+    elapsed = time.perf_counter() - t
+    assert not at.exception, at.exception
+    return elapsed
+
+if trace:
+    tracemalloc.start()
+    once()
+    current, peak = tracemalloc.get_traced_memory()
+    blocks = sum(s.count for s in tracemalloc.take_snapshot().statistics("filename"))
+    print(json.dumps({"alloc_peak_mb": peak / 2**20, "alloc_blocks": blocks}))
+else:
+    cold = once()
+    warm = [once() for _ in range(repeat)]
+    print(json.dumps({"cold_s": cold, "warm_s": statistics.median(warm) if warm else cold,
+                      "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+
+def run_step(app: str, data_dir: str, step: str, email: str, repeat: int, trace: bool) -> Dict:
+    env = dict(os.environ, PMIVDC_DATA_DIR=data_dir, PMIVDC_EXCEL_PATH=os.path.join(data_dir, "master.xlsx"),
+               PMIVDC_ADMINS=email)        # "Export all vendors" is admin-only
+    upload = os.path.join(data_dir, UPLOADS[step]) if step in UPLOADS else ""
+    out = subprocess.run([sys.executable, "-c", _CHILD, app, step, email, upload, str(repeat), "1" if trace else "0"],
+                         env=env, cwd=os.path.dirname(app), check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Human-readable regressions: slower / bigger by more than `tolerance` and the noise floor."""
+    if current["params"] != baseline["params"]:
+        print(f"! sizes differ from the baseline: {baseline['params']} → {current['params']}")
+    regressions = []
+    print(f"{'step':<9} {'metric':<14} {'baseline':>10} {'now':>10} {'ratio':>7}")
+    for step, now in current["steps"].items():
+        before = baseline["steps"].get(step)
+        if before is None:
+            continue
+        for metric, floor in METRICS.items():
+            if metric not in now or metric not in before:
+                continue
+            ratio = now[metric] / before[metric] if before[metric] else float("inf")
+            bad = ratio > 1 + tolerance and now[metric] - before[metric] > floor
+            print(f"{step:<9} {metric:<14} {before[metric]:>10.3f} {now[metric]:>10.3f} {ratio:>6.2f}x"
+                  + ("  ← regression" if bad else ""))
+            if bad:
+                regressions.append(f"{step}.{metric}")
+    return regressions
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--app", default=os.path.join(ROOT, "vdc.py"))
+    ap.add_argument("--vendors", type=int, default=200)
+    ap.add_argument("--entries", type=int, default=50, help="entries per tier per vendor")
+    ap.add_argument("--orders", type=int, default=500_000, help="rows in the open-PO extract")
+    ap.add_argument("--steps", nargs="+", choices=STEPS, default=list(STEPS))
+    ap.add_argument("-n", "--repeat", type=int, default=3, help="warm re-runs per step")
+    ap.add_argument("--no-alloc", action="store_true", help="skip the tracemalloc pass")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--save", metavar="LABEL", help="store the results under LABEL in bench/results/load.json")
+    ap.add_argument("--compare", metavar="LABEL", help="compare against a saved LABEL; exit 1 on regression")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slow-down / growth (0.25 = 25 %%)")
+    args = ap.parse_args()
+
+    app = os.path.abspath(args.app)
+    params = {"vendors": args.vendors, "entries": args.entries, "orders": args.orders, "seed": args.seed}
+    with tempfile.TemporaryDirectory() as data_dir:
+        t = time.perf_counter()
+        email = generate(data_dir, args.vendors, args.entries, args.orders, args.seed)
+        print(f"generated {args.vendors} vendors × {args.entries} entries/tier in {time.perf_counter() - t:.1f}s",
+              file=sys.stderr)
+        steps = {}
+        for step in args.steps:
+            steps[step] = run_step(app, data_dir, step, email, args.repeat, trace=False)
+            if not args.no_alloc:
+                steps[step].update(run_step(app, data_dir, step, email, 0, trace=True))
+            steps[step] = {k: round(v, 3) if isinstance(v, float) else v for k, v in steps[step].items()}
+            print(f"{step}: {steps[step]}", file=sys.stderr)
+    result = {"params": params, "steps": steps}
+    print(json.dumps(result, indent=2))
+
+    results = json.load(open(RESULTS)) if os.path.exists(RESULTS) else {}
+    if args.save:
+        os.makedirs(os.path.dirname(RESULTS), exist_ok=True)
+        results[args.save] = result
+        with open(RESULTS, "w") as fh:
+            json.dump(results, fh, indent=2)
+            fh.write("\n")
+    if args.compare:
+        if args.compare not in results:
+            sys.exit(f"no baseline {args.compare!r} in {RESULTS}")
+        regressions = compare(result, results[args.compare], args.tolerance)
+        if regressions:
+            sys.exit(f"regressed: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
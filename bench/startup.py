@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Cold-start benchmark for vdc.py
+-------------------------------
+Each sample is a fresh interpreter that renders the login page once through
+Streamlit's headless AppTest harness.  Reported per sample:
+
+* process   – spawn → login page rendered (what a user waits for after a deploy)
+* paint     – the first script run alone (vdc.py top to page_login done)
+* heavy     – heavy libraries the login run left in sys.modules
+
+    python bench/startup.py                      # current tree
+    python bench/startup.py --app /old/vdc.py    # e.g. a checkout of an older build
+    python bench/startup.py --save before        # record under bench/results/startup.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULTS = os.path.join(HERE, "results", "startup.json")
+HEAVY = ("pandas", "numpy", "matplotlib", "pyarrow", "PIL", "openpyxl")
+
+_CHILD = r"""
+import json, os, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+t1 = time.perf_counter()
+at.run()
+t2 = time.perf_counter()
+assert not at.exception, at.exception
+assert at.subheader[0].value == "Vendor Login"
+print(json.dumps({"paint": t2 - t1, "heavy": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY,)
+
+
+def sample(app: str, data_dir: str) -> dict:
+    env = dict(os.environ, PMIVDC_DATA_DIR=data_dir, PMIVDC_EXCEL_PATH=os.path.join(data_dir, "master.xlsx"))
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", _CHILD, app], env=env, cwd=os.path.dirname(app),
+                         check=True, capture_output=True, text=True).stdout
+    result = json.loads(out.strip().splitlines()[-1])
+    result["process"] = time.perf_counter() - start
+    return result
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--app", default=os.path.join(os.path.dirname(HERE), "vdc.py"))
+    ap.add_argument("-n", "--runs", type=int, default=5)
+    ap.add_argument("--save", metavar="LABEL", help="store the medians under LABEL in bench/results/startup.json")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        samples = [sample(os.path.abspath(args.app), data_dir) for _ in range(args.runs)]
+    summary = {
+        "process_s": round(statistics.median(s["process"] for s in samples), 3),
+        "paint_s":   round(statistics.median(s["paint"] for s in samples), 3),
+        "heavy":     samples[-1]["heavy"],
+        "runs":      args.runs,
+    }
+    print(json.dumps(summary, indent=2))
+
+    if args.save:
+        os.makedirs(os.path.dirname(RESULTS), exist_ok=True)
+        results = json.load(open(RESULTS)) if os.path.exists(RESULTS) else {}
+        results[args.save] = summary
+        with open(RESULTS, "w") as fh:
+            json.dump(results, fh, indent=2)
+            fh.write("\n")
+
+
+if __name__ == "__main__":
+    main()
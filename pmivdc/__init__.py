@@ -0,0 +1,7 @@
+"""
+pmivdc – non-UI building blocks for the PMI Vendor Portal (vdc.py).
+
+Anything that has to outlive a Streamlit rerun (locks, worker threads,
+open files) lives here, because the page script itself is re-executed
+from scratch on every interaction.
+"""
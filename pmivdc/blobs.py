@@ -0,0 +1,126 @@
+"""
+Content-addressed certificate store
+-----------------------------------
+* uploads are streamed to disk in 1 MiB chunks while being hashed, then
+  renamed to `<root>/<sha[:2]>/<sha256>` – identical certificates shared by
+  several mills / plantations are stored once
+* `<digest>.json` beside each blob keeps its size, upload count, the
+  original file names (entries only record the digest) and annotations
+  such as the certificate check result
+* `stream()` hands a download its file object, opened only when the
+  button is clicked; the certificate check maps the blob itself
+  (certcheck.py)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from typing import BinaryIO, Dict, List
+
+from .metrics import REGISTRY
+
+CHUNK = 1024 * 1024
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+
+def is_digest(value: object) -> bool:
+    return isinstance(value, str) and bool(_DIGEST.match(value))
+
+
+class BlobStore:
+    def __init__(self, root: str):
+        self.root = root
+        self._tmp = os.path.join(root, "tmp")
+        os.makedirs(self._tmp, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def exists(self, digest: str) -> bool:
+        return is_digest(digest) and os.path.exists(self.path(digest))
+
+    # ── write ────────────────────────────────────────────────────────────────
+    @REGISTRY.timed("pmivdc_op_seconds", op="certificate_upload")
+    def put(self, stream: BinaryIO, name: str = "") -> str:
+        """Stream `stream` into the store; returns its SHA-256 hex digest."""
+        sha, size = hashlib.sha256(), 0
+        fd, tmp = tempfile.mkstemp(dir=self._tmp)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                if hasattr(stream, "seek"):
+                    stream.seek(0)
+                while True:
+                    chunk = stream.read(CHUNK)
+                    if not chunk:
+                        break
+                    sha.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            digest = sha.hexdigest()
+            final = self.path(digest)
+            os.makedirs(os.path.dirname(final), exist_ok=True)
+            if os.path.exists(final):
+                os.remove(tmp)              # already stored → dedup
+            else:
+                os.replace(tmp, final)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._record(digest, name, size)
+        REGISTRY.observe("pmivdc_upload_bytes", size, kind="certificate")
+        return digest
+
+    def _record(self, digest: str, name: str, size: int) -> None:
+        def update(info: Dict) -> None:
+            info["size"] = size
+            info["uploads"] = info.get("uploads", 0) + 1
+            if name and name not in info["names"]:
+                info["names"].append(name)
+        self._update_info(digest, update)
+
+    def annotate(self, digest: str, **fields) -> None:
+        """Attach extra metadata (e.g. a validation result) to a blob."""
+        self._update_info(digest, lambda info: info.update(fields))
+
+    def _update_info(self, digest: str, update) -> None:
+        meta_path = self.path(digest) + ".json"
+        with self._lock:
+            info = self.info(digest)
+            update(info)
+            with open(meta_path + ".tmp", "w", encoding="utf-8") as fh:
+                json.dump(info, fh)
+            os.replace(meta_path + ".tmp", meta_path)
+
+    # ── read ─────────────────────────────────────────────────────────────────
+    def info(self, digest: str) -> Dict:
+        try:
+            with open(self.path(digest) + ".json", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {"names": [], "size": 0}
+
+    def name(self, digest: str) -> str:
+        names: List[str] = self.info(digest)["names"]
+        return names[0] if names else digest[:12]
+
+    def stream(self, digest: str) -> BinaryIO:
+        """The blob as a binary file (st.download_button reads it once, then drops it)."""
+        return open(self.path(digest), "rb")
+
+
+_STORES: Dict[str, BlobStore] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_blob_store(root: str) -> BlobStore:
+    with _REGISTRY_LOCK:
+        if root not in _STORES:
+            _STORES[root] = BlobStore(root)
+        return _STORES[root]
@@ -0,0 +1,195 @@
+"""
+Bulk tier entry: template, vectorised validation, batch rows
+------------------------------------------------------------
+* `template(tier)` – the CSV / grid columns of a tier: its entry fields
+  minus the certificate digests and `parent`, plus `certificate` (T1:
+  `certificates`, ";"-separated) naming one of the PDFs uploaded with the
+  grid
+* `validate(tier, frame, certificates)` checks every row in one pass – each
+  rule is a boolean mask over whole columns, the same rules as the entry
+  forms – and returns (entries ready to save, per-row error report)
+* values are normalised on the way: trimmed text, Y/N and Yes/No in any
+  case, percentages as floats; p_prog / vol_cert / vol_ctrl are cleared
+  when no certified fibre is purchased
+* `validate_edits(tier, entries, …)` runs the same rules over rows added or
+  changed in the tier viewer, whose certificates are stored digests; a
+  changed row is only checked on the rules its changed fields take part in
+  (rows saved by the entry forms or imported from the workbook may leave
+  fields blank that the grid requires)
+"""
+
+from __future__ import annotations
+
+from typing import Collection, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .schema import CERT_PROGRAMS, FEEDSTOCK_SOURCE_TYPES, NUMERIC_FIELDS, TIER_FIELDS
+
+CERT_COLUMN = {"t1": "certificates"}        # others: "certificate"
+REPORT_COLUMNS = ["row", "errors"]
+_YN, _YES_NO = ["Y", "N"], ["Yes", "No"]
+_SKIP = {"parent", "coc_file", "cert_files"}
+_COUPLED = {"owned": ("owner_company",), "p_purchase": ("p_prog", "vol_cert", "vol_ctrl")}   # cleared by their switch
+
+
+def cert_column(tier: str) -> str:
+    return CERT_COLUMN.get(tier, "certificate")
+
+
+def columns(tier: str) -> List[str]:
+    return [f for f in TIER_FIELDS[tier] if f not in _SKIP] + [cert_column(tier)]
+
+
+def template(tier: str) -> pd.DataFrame:
+    """An empty grid for `tier` (text columns; numbers are parsed on validation)."""
+    return pd.DataFrame({c: pd.Series(dtype=object) for c in columns(tier)})
+
+
+def _text(frame: pd.DataFrame, col: str) -> pd.Series:
+    if col not in frame:
+        return pd.Series("", index=frame.index, dtype=object)
+    values = frame[col].astype(object)
+    return values.where(values.notna(), "").astype(str).str.strip()
+
+
+def _choice(values: pd.Series, options: List[str]) -> pd.Series:
+    """Case-insensitive match onto `options`' spelling; unknown values kept as typed."""
+    matched = values.str.casefold().map({o.casefold(): o for o in options})
+    return matched.where(matched.notna(), values)
+
+
+def _filled(frame: pd.DataFrame) -> np.ndarray:
+    filled = np.zeros(len(frame), dtype=bool)
+    for col in frame:
+        filled |= (_text(frame, col) != "").to_numpy()
+    return filled
+
+
+def validate(tier: str, frame: pd.DataFrame, certificates: Collection[str] = (),
+             cert_required: Optional[Sequence[bool]] = None,
+             checked: Optional[Sequence[Optional[Collection[str]]]] = None) -> Tuple[List[Dict], pd.DataFrame]:
+    """(valid entries with `certificate` names still unresolved, report of rejected rows).
+
+    Report rows are 1-based positions in `frame` with every problem of that
+    row joined by "; ".  Rows with every cell blank (the editor's spare
+    rows) are skipped.  `cert_required` (per row, default all True) lets a
+    row go without a certificate; `checked` (per row, default all None)
+    limits a row to the rules on those columns – None checks every rule.
+    """
+    frame = frame.reset_index(drop=True)
+    required = pd.Series(True if cert_required is None else list(cert_required), index=frame.index, dtype=bool)
+    scope = pd.Series([None] * len(frame) if checked is None else list(checked), index=frame.index, dtype=object)
+    filled = _filled(frame)
+    frame, required, scope = frame[filled], required[filled], scope[filled]
+    fields = [f for f in columns(tier) if f not in NUMERIC_FIELDS]
+    clean = pd.DataFrame({f: _text(frame, f) for f in fields}, index=frame.index)
+    rules: List[Tuple[Tuple[str, ...], pd.Series, object]] = []    # (columns, mask, message or per-row messages)
+    blank = lambda f: clean[f] == ""
+
+    for f, caption in (("country", "country"), ("state", "state"), ("muni", "municipality")):
+        rules.append(((f,), blank(f), f"{caption} required"))
+    for f in ("granted", "coc_copy"):
+        if f in clean:
+            clean[f] = _choice(clean[f], _YN)
+            rules.append(((f,), ~clean[f].isin(_YN), f"{f} must be Y or N"))
+    if "coc_prog" in clean:
+        clean["coc_prog"] = _choice(clean["coc_prog"], CERT_PROGRAMS)
+        rules.append((("coc_prog",), ~clean["coc_prog"].isin(CERT_PROGRAMS),
+                      f"coc_prog must be one of {', '.join(CERT_PROGRAMS)}"))
+    if "owned" in clean:
+        clean["owned"] = _choice(clean["owned"], _YES_NO)
+        rules.append((("owned",), ~clean["owned"].isin(_YES_NO), "owned must be Yes or No"))
+        rules.append((("owned", "owner_company"), (clean["owned"] == "No") & blank("owner_company"),
+                      "owner_company required when owned is No"))
+        clean.loc[clean["owned"] == "Yes", "owner_company"] = ""
+
+    numbers = {}
+    for f in [f for f in TIER_FIELDS[tier] if f in NUMERIC_FIELDS]:
+        raw = _text(frame, f)
+        numbers[f] = pd.to_numeric(raw.str.rstrip("%").str.replace(",", ".", regex=False), errors="coerce")
+        rules.append(((f,), (raw != "") & numbers[f].isna(), f"{f} is not a number"))
+        rules.append(((f,), (numbers[f] < 0) | (numbers[f] > 100), f"{f} must be within 0–100 %"))
+    if tier == "t4":
+        rules.append((("product",), blank("product"), "product required"))
+        clean["source"] = _choice(clean["source"], FEEDSTOCK_SOURCE_TYPES)
+        rules.append((("source",), ~clean["source"].isin(FEEDSTOCK_SOURCE_TYPES),
+                      f"source must be one of {', '.join(FEEDSTOCK_SOURCE_TYPES)}"))
+        total = numbers["virgin"].fillna(0) + numbers["recycled"].fillna(0)
+        rules.append((("virgin", "recycled"), (total - 100).abs() > 1e-6, "virgin + recycled must equal 100 %"))
+        clean["p_purchase"] = _choice(clean["p_purchase"], _YES_NO)
+        rules.append((("p_purchase",), ~clean["p_purchase"].isin(_YES_NO), "p_purchase must be Yes or No"))
+        buying = clean["p_purchase"] == "Yes"
+        clean["p_prog"] = _choice(clean["p_prog"], CERT_PROGRAMS)
+        rules.append((("p_purchase", "p_prog"), buying & ~clean["p_prog"].isin(CERT_PROGRAMS),
+                      f"p_prog must be one of {', '.join(CERT_PROGRAMS)} when p_purchase is Yes"))
+        clean.loc[~buying, "p_prog"] = ""
+        for f in ("vol_cert", "vol_ctrl"):
+            numbers[f] = numbers[f].where(buying, 0.0)
+
+    cert = cert_column(tier)
+    names = clean[cert].str.split(";").map(lambda parts: [p.strip() for p in parts if p.strip()])
+    known = set(certificates)
+    rules.append(((cert,), (names.map(len) == 0) & required, f"{cert} required (file name of an uploaded PDF)"))
+    missing = names.map(lambda parts: [p for p in parts if p not in known])
+    rules.append(((cert,), missing.map(len) > 0, "certificate not uploaded: " + missing.map("; ".join)))
+
+    # ── one report from all masks ─────────────────────────────────────────────
+    masks = np.column_stack([m.to_numpy(dtype=bool, na_value=False) for _, m, _ in rules])
+    if scope.notna().any():                 # rules outside a row's `checked` columns do not apply
+        applies = np.column_stack([scope.map(lambda c, cols=cols: c is None or not c.isdisjoint(cols)).to_numpy(bool)
+                                   for cols, _, _ in rules])
+        masks &= applies
+    bad = masks.any(axis=1)
+    messages = [m.to_numpy() if isinstance(m, pd.Series) else m for _, _, m in rules]   # per-row or fixed
+    errors = [
+        "; ".join(msg if isinstance(msg, str) else msg[i] for msg, hit in zip(messages, masks[i]) if hit)
+        for i in np.flatnonzero(bad)
+    ]
+    report = pd.DataFrame({"row": frame.index[bad] + 1, "errors": errors}, columns=REPORT_COLUMNS)
+
+    good = ~bad
+    out = clean.loc[good].drop(columns=[cert])
+    for f, values in numbers.items():
+        out[f] = values[good].fillna(0.0).astype(float)
+    entries = out.to_dict("records")
+    for entry, parts in zip(entries, names[good]):
+        entry[cert] = parts
+    return entries, report
+
+
+def validate_edits(tier: str, entries: List[Dict], certificates: Collection[str],
+                   cert_required: Sequence[bool], changed: Optional[Sequence[Optional[Collection[str]]]] = None
+                   ) -> Tuple[List[Dict], pd.DataFrame]:
+    """Rows added / changed in the tier viewer → (entries to store, report), same rules as `validate`.
+
+    Certificates are the stored digests (`coc_file` / `cert_files`) and must
+    be among `certificates`; a row whose `cert_required` is False may have
+    none (rows imported from the master workbook never had one).  `changed`
+    (per row; None = a new row, every rule) names the fields edited in a
+    stored row: only rules on those fields are checked, and only they (and
+    the fields their switch clears) take the normalised value.  Report rows
+    are 1-based positions in `entries`; blank rows are dropped.  Valid rows
+    keep `_id`, `parent`, their digests and any extra keys.
+    """
+    cert = cert_column(tier)
+    digests = [list(e.get("cert_files") or ()) if tier == "t1" else [e["coc_file"]] if e.get("coc_file") else []
+               for e in entries]
+    frame = pd.DataFrame([{**{c: e.get(c) for c in columns(tier) if c != cert}, cert: ";".join(d)}
+                          for e, d in zip(entries, digests)], columns=columns(tier))
+    scopes = None
+    if changed is not None:
+        scopes = [None if fields is None else
+                  {cert if f in ("coc_file", "cert_files") else f for f in fields} | {c for f in fields for c in _COUPLED.get(f, ())}
+                  for fields in changed]
+    clean, report = validate(tier, frame, certificates, cert_required, scopes)
+    rejected = set(report["row"] - 1)
+    good = [i for i in np.flatnonzero(_filled(frame)) if i not in rejected]
+    out = []
+    for i, values in zip(good, clean):
+        values.pop(cert)
+        if scopes is not None and scopes[i] is not None:
+            values = {f: v for f, v in values.items() if f in scopes[i]}
+        out.append({**entries[i], **values})
+    return out, report
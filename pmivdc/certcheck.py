@@ -0,0 +1,125 @@
+"""
+Background certificate validation
+---------------------------------
+* `check_pdf()` scans one stored blob through mmap: size limit, `%PDF-`
+  magic, `startxref` / `%%EOF` trailer, page count; duplicates are read
+  off the blob's upload count when the status is shown
+* `Validator` runs it on a small thread pool so a vendor uploading dozens of
+  certificates never blocks a Streamlit script thread; the page scan works
+  in 1 MiB windows, so one huge file never holds the GIL for long (a process
+  pool would re-run vdc.py in every worker: Streamlit installs the page
+  script as `__main__`, which spawn re-imports)
+* results are attached to the blob (its `<digest>.json`), so every entry and
+  every session that references the same certificate sees the same status;
+  the in-flight set is in memory only, so `status()` re-queues any stored
+  certificate that has no result yet (e.g. one queued before a restart)
+"""
+
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional, Set
+
+from .blobs import BlobStore
+
+log = logging.getLogger(__name__)
+
+MAX_BYTES = int(os.environ.get("PMIVDC_CERT_MAX_MB", "25")) * 1024 * 1024
+
+_PAGE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+_WINDOW = 1024 * 1024
+
+
+def _count_pages(mm: mmap.mmap) -> int:
+    pages, pos, size = 0, 0, len(mm)
+    while pos < size:                       # windows overlap by 64 bytes; count a
+        end = min(size, pos + _WINDOW)      # match only where it starts in this window
+        pages += sum(1 for m in _PAGE.finditer(mm[pos:end + 64]) if m.start() < end - pos)
+        pos = end
+    return pages
+
+
+def check_pdf(path: str, max_bytes: int = MAX_BYTES) -> Dict:
+    """→ {"status": ok | warning | invalid, "pages": int | None, "issues": [...]}"""
+    issues, pages = [], None
+    size = os.path.getsize(path)
+    if size == 0:
+        return {"status": "invalid", "pages": 0, "issues": ["empty file"]}
+    if size > max_bytes:
+        return {"status": "invalid", "pages": None,
+                "issues": [f"{size / 2**20:.1f} MB exceeds the {max_bytes / 2**20:.0f} MB limit"]}
+
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm[:5] != b"%PDF-":
+            return {"status": "invalid", "pages": None, "issues": ["not a PDF (missing %PDF- header)"]}
+        tail = mm[max(0, size - 2048):]
+        if b"%%EOF" not in tail:
+            issues.append("truncated (no %%EOF trailer)")
+        if b"startxref" not in tail:
+            issues.append("no cross-reference table")
+        pages = _count_pages(mm)
+        if pages == 0:
+            if b"/ObjStm" in mm:
+                pages = None                # page tree lives in compressed object streams
+            else:
+                issues.append("no pages found")
+
+    return {"status": "invalid" if issues and pages == 0 else "warning" if issues else "ok",
+            "pages": pages, "issues": issues}
+
+
+class Validator:
+    def __init__(self, workers: int = 0):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pending: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="certcheck")
+        return self._pool
+
+    def submit(self, blobs: BlobStore, digest: str) -> None:
+        """Queue `digest` unless it is already checked or in flight; returns at once."""
+        with self._lock:
+            if digest in self._pending or "check" in blobs.info(digest):
+                return
+            self._pending.add(digest)
+            future = self._executor().submit(check_pdf, blobs.path(digest))
+        future.add_done_callback(lambda f: self._done(blobs, digest, f))
+
+    def _done(self, blobs: BlobStore, digest: str, future: Future) -> None:
+        try:
+            result = future.result()
+        except Exception as exc:            # a crashed worker must not lose the entry
+            log.exception("certificate check of %s failed", digest)
+            result = {"status": "error", "pages": None, "issues": [str(exc)]}
+        try:
+            blobs.annotate(digest, check=result)
+        finally:                            # a failed write leaves it unchecked, so status() requeues it
+            with self._lock:
+                self._pending.discard(digest)
+
+    def status(self, blobs: BlobStore, digest: object) -> str:
+        if not blobs.exists(digest):
+            return ""
+        info = blobs.info(digest)
+        check = info.get("check")
+        if check is None:                   # never checked (queued before a restart) → queue now
+            self.submit(blobs, digest)
+            return "⏳ pending"
+        icon = {"ok": "✅", "warning": "⚠️", "invalid": "❌"}.get(check["status"], "❗")
+        pages = f"{check['pages']} p." if check.get("pages") else ""
+        issues = list(check["issues"])
+        if info.get("uploads", 1) > 1:      # duplicate digest: same bytes uploaded again
+            issues.append(f"duplicate – uploaded {info['uploads']}× ({', '.join(info['names'])})")
+        return " ".join(x for x in (icon, check["status"], pages, "; ".join(issues)) if x)
+
+
+VALIDATOR = Validator(int(os.environ.get("PMIVDC_CERT_WORKERS", "0")))
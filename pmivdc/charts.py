@@ -0,0 +1,82 @@
+"""
+Rendered-chart cache
+--------------------
+* figures are drawn off-screen on a bare Agg canvas (no pyplot state, nothing
+  to leak between reruns) and released right after `savefig`
+* the PNG/SVG bytes are cached under a hash of (chart name, data, size), in
+  an LRU bounded by total bytes – a rerun with unchanged data never touches
+  matplotlib
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Tuple
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+Draw = Callable[[Figure, Any], None]
+
+
+class ChartCache:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            blob = self._items.get(key)
+            if blob is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return blob
+
+    def put(self, key: str, blob: bytes) -> None:
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            self.size += len(blob) - (len(old) if old else 0)
+            self._items[key] = blob
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+
+CACHE = ChartCache()
+
+
+def _key(name: str, data: Any, figsize: Tuple[float, float], fmt: str, dpi: int) -> str:
+    payload = json.dumps([name, data, figsize, fmt, dpi], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def render(name: str, data: Any, draw: Draw, figsize: Tuple[float, float] = (4, 4),
+           fmt: str = "png", dpi: int = 200) -> bytes:
+    """Bytes of `draw(fig, data)`; `data` must be JSON-able and fully determine the chart."""
+    key = _key(name, data, figsize, fmt, dpi)
+    blob = CACHE.get(key)
+    if blob is not None:
+        return blob
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    try:
+        draw(fig, data)
+        buf = io.BytesIO()
+        fig.savefig(buf, format=fmt, dpi=dpi, bbox_inches="tight")
+        blob = buf.getvalue()
+    finally:
+        fig.clear()                         # drop artists / canvas references now
+    CACHE.put(key, blob)
+    return blob
@@ -0,0 +1,287 @@
+"""
+Compact per-session vendor data
+-------------------------------
+* `TierColumns` – one tier's entries as columns instead of a list of dicts:
+  categorical fields (Y/N flags, programs, source types, country, state)
+  are uint32 codes into process-wide tables shared by every session,
+  numeric fields are float64 `array`s, other text is `sys.intern`ed, list
+  fields are tuples; keys outside the schema (or values a typed column
+  cannot hold) go to a per-row dict that is None for almost every row.
+  Iterating still yields plain entry dicts, built on the fly
+* `VendorData` – tier → TierColumns, the shape `vendor_data` always had
+* `SessionVault` – process-wide home of every session's VendorData, in LRU
+  order.  A session idle for IDLE seconds, or the oldest beyond RESIDENT
+  sessions, is spilled: its columns are dropped and reloaded from the
+  SQLite store (which every edit is written through to first) the next
+  time the session touches them – server memory stays bounded by RESIDENT;
+  resident sessions / bytes and the spill counts are metrics.REGISTRY gauges
+
+Standard library only (`array`), so session.py stays light to import.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from .metrics import REGISTRY
+from .schema import LIST_FIELDS, NUMERIC_FIELDS, TIER_FIELDS, TIERS
+
+CATEGORICAL = {"country", "state", "owned", "granted", "coc_prog", "coc_copy",
+               "source", "p_purchase", "p_prog"}
+IDLE     = int(os.environ.get("PMIVDC_SESSION_IDLE", 900))      # seconds
+RESIDENT = int(os.environ.get("PMIVDC_SESSION_RESIDENT", 200))  # sessions kept in memory
+
+
+class _Codes:
+    """value ↔ uint32 code, shared by all sessions (code 0 = None)."""
+
+    def __init__(self):
+        self.values: List[object] = [None]
+        self.index: Dict[object, int] = {None: 0}
+        self._lock = threading.Lock()
+
+    def code(self, value: object) -> int:
+        code = self.index.get(value)
+        if code is None:
+            with self._lock:
+                code = self.index.get(value)
+                if code is None:
+                    code = len(self.values)
+                    self.values.append(sys.intern(value) if isinstance(value, str) else value)
+                    self.index[value] = code
+        return code
+
+
+_CODES: Dict[str, _Codes] = {f: _Codes() for f in CATEGORICAL}
+_ODD = object()                         # "this value lives in the row's extra dict"
+
+
+class TierColumns:
+    def __init__(self, tier: str, entries: Iterable[Dict] = ()):
+        self.fields = TIER_FIELDS[tier]
+        self.ids: List[str] = []
+        self.cols: Dict[str, object] = {}
+        for f in self.fields:
+            if f in CATEGORICAL:
+                self.cols[f] = array("I")
+            elif f in NUMERIC_FIELDS:
+                self.cols[f] = array("d")
+            else:
+                self.cols[f] = []
+        self.extra: List[Optional[Dict]] = []
+        self.extend(entries)
+
+    # ── encode / decode ──────────────────────────────────────────────────────
+    def _encode(self, f: str, value: object, odd: Dict) -> object:
+        if f in CATEGORICAL:
+            try:
+                return _CODES[f].code(value)
+            except TypeError:                   # unhashable
+                odd[f] = value
+                return 0
+        if f in NUMERIC_FIELDS:
+            if value is None:
+                return math.nan
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return float(value)
+            odd[f] = value                      # text in a numeric cell: kept as typed
+            return math.nan
+        if f in LIST_FIELDS:
+            return tuple(value) if isinstance(value, (list, tuple)) else (_ODD if value is not None else None)
+        return sys.intern(value) if isinstance(value, str) and len(value) <= 64 else value
+
+    def _row(self, entry: Dict) -> tuple:
+        odd = {k: v for k, v in entry.items() if k != "_id" and k not in self.cols}
+        values = []
+        for f in self.fields:
+            value = entry.get(f)
+            encoded = self._encode(f, value, odd)
+            if encoded is _ODD:
+                odd[f], encoded = value, None
+            values.append(encoded)
+        return entry["_id"], values, odd or None
+
+    def _decode(self, i: int) -> Dict:
+        entry = {"_id": self.ids[i]}
+        for f in self.fields:
+            value = self.cols[f][i]
+            if f in CATEGORICAL:
+                value = _CODES[f].values[value]
+            elif f in NUMERIC_FIELDS:
+                value = None if math.isnan(value) else value
+            elif f in LIST_FIELDS and value is not None:
+                value = list(value)
+            entry[f] = value
+        if self.extra[i]:
+            entry.update(self.extra[i])
+        return entry
+
+    # ── sequence of entry dicts ──────────────────────────────────────────────
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return (self._decode(i) for i in range(len(self.ids)))
+
+    def __getitem__(self, i: int) -> Dict:
+        return self._decode(range(len(self.ids))[i])
+
+    def __setitem__(self, i: int, entry: Dict) -> None:
+        entry_id, values, odd = self._row(entry)
+        self.ids[i] = entry_id
+        for f, v in zip(self.fields, values):
+            self.cols[f][i] = v
+        self.extra[i] = odd
+
+    def append(self, entry: Dict) -> None:
+        entry_id, values, odd = self._row(entry)
+        self.ids.append(entry_id)
+        for f, v in zip(self.fields, values):
+            self.cols[f].append(v)
+        self.extra.append(odd)
+
+    def extend(self, entries: Iterable[Dict]) -> None:
+        for entry in entries:
+            self.append(entry)
+
+    def position(self) -> Dict[str, int]:
+        return {entry_id: i for i, entry_id in enumerate(self.ids)}
+
+    def remove_ids(self, ids: Iterable[str]) -> None:
+        drop = set(ids)
+        keep = [i for i, entry_id in enumerate(self.ids) if entry_id not in drop]
+        if len(keep) == len(self.ids):
+            return
+        self.ids = [self.ids[i] for i in keep]
+        for f, col in self.cols.items():
+            picked = [col[i] for i in keep]
+            self.cols[f] = array(col.typecode, picked) if isinstance(col, array) else picked
+        self.extra = [self.extra[i] for i in keep]
+
+    def clear(self) -> None:
+        self.remove_ids(self.ids)
+
+    def column(self, field: str) -> List:
+        """Decoded values of one field, without building the entry dicts."""
+        col = self.cols[field]
+        if field in CATEGORICAL:
+            values = _CODES[field].values
+            return [values[c] for c in col]
+        if field in NUMERIC_FIELDS:
+            return [None if math.isnan(v) else v for v in col]
+        return list(col)
+
+    def nbytes(self) -> int:
+        """Approximate footprint of the columns (shared strings / codes not counted)."""
+        size = sys.getsizeof(self.ids) + sum(map(sys.getsizeof, self.ids)) + sys.getsizeof(self.extra)
+        for col in self.cols.values():
+            size += sys.getsizeof(col)
+        return size + sum(sys.getsizeof(e) for e in self.extra if e)
+
+
+class VendorData:
+    """tier → TierColumns; read like the old `{tier: [entry, …]}` dict."""
+
+    def __init__(self, data: Optional[Dict[str, Iterable[Dict]]] = None):
+        self.tiers = {t: TierColumns(t, (data or {}).get(t) or ()) for t in TIERS}
+
+    def __getitem__(self, tier: str) -> TierColumns:
+        return self.tiers[tier]
+
+    def get(self, tier: str, default=None):
+        return self.tiers.get(tier, default)
+
+    def items(self):
+        return self.tiers.items()
+
+    def to_dict(self) -> Dict[str, List[Dict]]:
+        return {t: list(cols) for t, cols in self.tiers.items() if len(cols)}
+
+    def nbytes(self) -> int:
+        return sum(cols.nbytes() for cols in self.tiers.values())
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  Process-wide session vault
+# ──────────────────────────────────────────────────────────────────────────────
+class _Slot:
+    __slots__ = ("data", "derived", "seen")
+
+    def __init__(self, data: VendorData):
+        self.data, self.derived, self.seen = data, {}, time.monotonic()
+
+
+class SessionVault:
+    def __init__(self, idle: float = IDLE, resident: int = RESIDENT):
+        self.idle, self.resident = idle, resident
+        self._slots: "OrderedDict[str, _Slot]" = OrderedDict()     # least recently used first
+        self._lock = threading.Lock()
+        self.counts = {"spilled": 0, "reloaded": 0}
+
+    def _sweep(self, now: float) -> None:
+        while self._slots:
+            key, slot = next(iter(self._slots.items()))
+            if now - slot.seen < self.idle and len(self._slots) <= self.resident:
+                break
+            del self._slots[key]
+            self.counts["spilled"] += 1
+
+    def _touch(self, key: str) -> Optional[_Slot]:
+        slot = self._slots.get(key)
+        if slot is not None:
+            slot.seen = time.monotonic()
+            self._slots.move_to_end(key)
+        return slot
+
+    def put(self, key: str, data: VendorData) -> VendorData:
+        with self._lock:
+            self._slots.pop(key, None)
+            self._slots[key] = _Slot(data)
+            self._sweep(time.monotonic())
+        return data
+
+    def get(self, key: str, load: Callable[[], VendorData]) -> VendorData:
+        """The session's data; a spilled session is reloaded with `load()`."""
+        with self._lock:
+            slot = self._touch(key)
+            if slot is not None:
+                return slot.data
+        data = load()                       # outside the lock: other sessions keep going
+        with self._lock:
+            slot = self._touch(key)         # a concurrent rerun may have beaten us to it
+            if slot is not None:
+                return slot.data
+            self.counts["reloaded"] += 1
+            self._slots[key] = _Slot(data)
+            self._sweep(time.monotonic())
+            return data
+
+    def derived(self, key: str, name: str, build: Optional[Callable[[], object]] = None):
+        """Per-session object kept (and spilled) with the data; None if absent and no `build`."""
+        with self._lock:
+            slot = self._slots.get(key)
+            value = slot.derived.get(name) if slot is not None else None
+        if value is None and build is not None and slot is not None:
+            value = build()
+            with self._lock:
+                value = slot.derived.setdefault(name, value)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"resident": len(self._slots), **self.counts,
+                    "bytes": sum(s.data.nbytes() for s in self._slots.values())}
+
+
+VAULT = SessionVault()
+REGISTRY.gauge("pmivdc_sessions_resident", lambda: VAULT.stats()["resident"])
+REGISTRY.gauge("pmivdc_session_bytes", lambda: VAULT.stats()["bytes"])
+REGISTRY.gauge("pmivdc_sessions_spilled_total", lambda: VAULT.counts["spilled"])
+REGISTRY.gauge("pmivdc_sessions_reloaded_total", lambda: VAULT.counts["reloaded"])
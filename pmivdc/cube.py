@@ -0,0 +1,232 @@
+"""
+Cross-vendor certification cube
+-------------------------------
+* one partition per vendor: its entries pre-aggregated by SQLite into
+  (tier, program, country) rows of entries / certified / T4 volume, tagged
+  with the vendor's supplier group – a few rows per vendor, whatever the
+  number of entries
+* partitions live in flat column arrays (vendor code, int32 dimension codes
+  into per-dimension label tables, measures, alive); `refresh()`
+  re-aggregates only vendors whose `updated_at` moved past the high-water
+  mark – their old rows are tombstoned, the new ones appended, and the
+  arrays compacted once tombstones outnumber live rows
+* `query(by, filters)` is one pandas group-by over the live rows' codes;
+  labels are put back on the (small) result
+* results are cached (LRU) together with the set of vendors that
+  contributed; a refresh drops only the entries a changed vendor fed, or
+  whose filters its new partition now matches – other slices stay warm
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .schema import TIERS
+from .store import Store
+
+DIMENSIONS = ("tier", "program", "country", "group")
+MEASURES   = ("entries", "certified", "volume")
+CACHE_SIZE = 256
+_BATCH     = 500                            # vendor ids per IN (…) query
+
+_CERTIFIED = {                              # same rule as stats.LiveStats
+    "t1": "SUM(cert_files IS NOT NULL AND cert_files NOT IN ('', '[]'))",
+    "t2": "SUM(granted = 'Y')",
+    "t3": "SUM(granted = 'Y')",
+    "t4": "SUM(granted = 'Y')",
+}
+_PROGRAM = {"t1": "''", "t2": "COALESCE(coc_prog, '')", "t3": "COALESCE(coc_prog, '')",
+            "t4": "COALESCE(coc_prog, '')"}
+_VOLUME  = {"t1": "0.0", "t2": "0.0", "t3": "0.0", "t4": "TOTAL(volume)"}
+
+Filters = Dict[str, Sequence[str]]
+
+
+def _sql(tier: str, where: str) -> str:
+    return (f"SELECT e.vendor_id, '{tier}', {_PROGRAM[tier]}, TRIM(COALESCE(e.country, '')), "
+            f"COALESCE(json_extract(v.meta, '$.supplier_group'), ''), "
+            f"COUNT(*), {_CERTIFIED[tier]}, {_VOLUME[tier]} "
+            f"FROM {tier} e JOIN vendors v USING (vendor_id) {where} GROUP BY 1, 3, 4")
+
+
+def _key(by: Sequence[str], filters: Optional[Filters]) -> Tuple:
+    return tuple(by), tuple(sorted((d, tuple(sorted(v))) for d, v in (filters or {}).items() if v))
+
+
+class Cube:
+    def __init__(self, store: Store, cache_size: int = CACHE_SIZE):
+        self.store = store
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple, Tuple[pd.DataFrame, frozenset]]" = OrderedDict()
+        self._codes: Dict[str, int] = {}        # vendor_id → code (position in self.vendors)
+        self.vendors: List[str] = []
+        self.labels: Dict[str, List[str]] = {d: [] for d in DIMENSIONS}
+        self._label_codes: Dict[str, Dict[str, int]] = {d: {} for d in DIMENSIONS}
+        self._set_rows(np.empty(0, np.int64), {d: np.empty(0, np.int32) for d in DIMENSIONS},
+                       {m: np.empty(0, np.float64) for m in MEASURES})
+        self.high_water = -1.0
+        self.counts = {"hits": 0, "misses": 0, "rebuilt": 0}
+
+    # ── partitions ───────────────────────────────────────────────────────────
+    def _set_rows(self, vendor: np.ndarray, dims: Dict[str, np.ndarray], measures: Dict[str, np.ndarray]) -> None:
+        self.vendor, self.dims, self.measures = vendor, dims, measures
+        self.alive = np.ones(len(vendor), dtype=bool)
+        self._frame: Optional[pd.DataFrame] = None
+
+    def _aggregate(self, vendor_ids: Optional[List[str]]) -> List[Tuple]:
+        rows: List[Tuple] = []
+        with self.store._tx(write=False) as con:
+            for tier in TIERS:
+                if vendor_ids is None:
+                    rows += con.execute(_sql(tier, "")).fetchall()
+                    continue
+                for i in range(0, len(vendor_ids), _BATCH):
+                    batch = vendor_ids[i:i + _BATCH]
+                    where = f"WHERE e.vendor_id IN ({', '.join('?' * len(batch))})"
+                    rows += con.execute(_sql(tier, where), batch).fetchall()
+        return rows
+
+    def _changed(self) -> Tuple[List[str], float]:
+        with self.store._tx(write=False) as con:
+            rows = con.execute("SELECT vendor_id, updated_at FROM vendors WHERE updated_at > ?",
+                               (self.high_water,)).fetchall()
+        return [r[0] for r in rows], max((r[1] for r in rows), default=self.high_water)
+
+    def _code(self, vendor_id: str) -> int:
+        code = self._codes.get(vendor_id)
+        if code is None:
+            code = self._codes[vendor_id] = len(self.vendors)
+            self.vendors.append(vendor_id)
+        return code
+
+    def _label(self, dim: str, label: str) -> int:
+        codes = self._label_codes[dim]
+        code = codes.get(label)
+        if code is None:
+            code = codes[label] = len(self.labels[dim])
+            self.labels[dim].append(label)
+        return code
+
+    def _filter_codes(self, filters: Tuple) -> List[Tuple[str, List[int]]]:
+        codes = self._label_codes
+        return [(dim, [codes[dim][v] for v in values if v in codes[dim]]) for dim, values in filters]
+
+    def refresh(self) -> int:
+        """Re-aggregate vendors changed since the last refresh; returns how many."""
+        with self._lock:
+            changed, high_water = self._changed()
+            if not changed:
+                return 0
+            full = self.high_water < 0
+            rows = self._aggregate(None if full else changed)
+            codes = np.fromiter((self._code(v) for v in changed), np.int64, len(changed))
+            vendor = np.fromiter((self._code(r[0]) for r in rows), np.int64, len(rows))
+            dims = {d: np.fromiter((self._label(d, r[1 + i]) for r in rows), np.int32, len(rows))
+                    for i, d in enumerate(DIMENSIONS)}
+            measures = {m: np.array([r[5 + i] or 0 for r in rows], dtype=np.float64)
+                        for i, m in enumerate(MEASURES)}
+            if full:
+                self._set_rows(vendor, dims, measures)
+            else:
+                self._invalidate(codes, vendor, dims)
+                self.alive[np.isin(self.vendor, codes)] = False
+                alive = np.concatenate([self.alive, np.ones(len(vendor), dtype=bool)])
+                if (~alive).sum() > alive.sum():            # compact: tombstones outnumber live rows
+                    keep = alive
+                    self._set_rows(np.concatenate([self.vendor, vendor])[keep],
+                                   {d: np.concatenate([self.dims[d], dims[d]])[keep] for d in DIMENSIONS},
+                                   {m: np.concatenate([self.measures[m], measures[m]])[keep] for m in MEASURES})
+                else:
+                    self.vendor = np.concatenate([self.vendor, vendor])
+                    self.dims = {d: np.concatenate([self.dims[d], dims[d]]) for d in DIMENSIONS}
+                    self.measures = {m: np.concatenate([self.measures[m], measures[m]]) for m in MEASURES}
+                    self.alive, self._frame = alive, None
+            self.high_water = high_water
+            self.counts["rebuilt"] += len(changed)
+            return len(changed)
+
+    def _invalidate(self, codes: np.ndarray, vendor: np.ndarray, dims: Dict[str, np.ndarray]) -> None:
+        """Drop cached results fed by `codes`, or whose filters their new rows (`vendor`, `dims`) match."""
+        changed = frozenset(codes.tolist())
+        for key, (_, fed) in list(self._cache.items()):
+            if fed & changed:
+                del self._cache[key]
+                continue
+            match = np.ones(len(vendor), dtype=bool)
+            for dim, values in self._filter_codes(key[1]):
+                match &= np.isin(dims[dim], values)
+            if match.any():
+                del self._cache[key]
+
+    # ── queries ──────────────────────────────────────────────────────────────
+    def frame(self) -> pd.DataFrame:
+        """Live partition rows: vendor code, DIMENSIONS codes (see `labels`) and MEASURES."""
+        if self._frame is None:
+            live = self.alive
+            self._frame = pd.DataFrame({"vendor": self.vendor[live],
+                                        **{d: self.dims[d][live] for d in DIMENSIONS},
+                                        **{m: self.measures[m][live] for m in MEASURES}})
+        return self._frame
+
+    def members(self, dim: str) -> List[str]:
+        with self._lock:
+            labels = self.labels[dim]
+            return sorted(labels[c] for c in np.unique(self.frame()[dim]))
+
+    def query(self, by: Sequence[str], filters: Optional[Filters] = None) -> pd.DataFrame:
+        """Entries / certified / coverage % / vendors / T4 volume per `by` combination."""
+        if not set(by) <= set(DIMENSIONS) or not set(filters or {}) <= set(DIMENSIONS):
+            raise KeyError(f"dimensions are {DIMENSIONS}")
+        key = _key(by, filters)
+        with self._lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                self.counts["hits"] += 1
+                return hit[0].copy()
+            self.counts["misses"] += 1
+            rows = self.frame()
+            for dim, values in self._filter_codes(key[1]):
+                rows = rows[rows[dim].isin(values)]
+            if by:
+                grouped = rows.groupby(list(by), sort=False)
+                result = grouped[list(MEASURES)].sum()
+                result["vendors"] = grouped["vendor"].nunique()
+                result = result.reset_index()
+                for dim in by:                      # codes → labels
+                    result[dim] = np.asarray(self.labels[dim], dtype=object)[result[dim].to_numpy()]
+                result = result.sort_values(list(by), ignore_index=True)
+            else:
+                result = pd.DataFrame({**{m: [rows[m].sum()] for m in MEASURES},
+                                       "vendors": [rows["vendor"].nunique()]})
+            result[["entries", "certified"]] = result[["entries", "certified"]].astype(np.int64)
+            result.insert(len(by) + 2, "coverage %",
+                          (100 * result["certified"] / result["entries"].where(result["entries"] > 0)).round(1))
+            fed = np.flatnonzero(np.bincount(rows["vendor"].to_numpy(), minlength=len(self.vendors)))
+            self._cache[key] = (result, frozenset(fed.tolist()))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return result.copy()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"vendors": len(self.vendors), "rows": int(self.alive.sum()),
+                    "tombstones": int((~self.alive).sum()), "cached": len(self._cache), **self.counts}
+
+
+_CUBES: Dict[str, Cube] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def cube(store: Store) -> Cube:
+    """The process-wide cube for `store`, refreshed with anything written since."""
+    with _REGISTRY_LOCK:
+        result = _CUBES.setdefault(store.path, Cube(store))
+    result.refresh()
+    return result
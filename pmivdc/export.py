@@ -0,0 +1,344 @@
+"""
+HEADERS-format export: xlsx, CSV and Parquet, streamed.
+
+* `iter_frames()` reads the store vendor by vendor (one read snapshot) and
+  yields HEADERS frames of about CHUNK_ROWS rows – no step holds more than
+  one chunk of cells as Python objects
+* one sink per format appends each chunk: xlsxwriter in constant_memory
+  mode (rows are flushed to disk as they are written), CSV, or a Parquet
+  row group per chunk with numeric columns typed float64; a workbook also
+  gets each row's e-mail (loader.EMAIL_COL, after HEADERS) and the
+  loader.SUPPLIERS_SHEET login map (e-mail → supplier name)
+* every file is written as `<name>.tmp<ext>` and renamed into place, so
+  readers never see a half-written file
+* `JOBS` runs user-requested exports (one vendor's rows, or every vendor's
+  for an admin) on a small thread pool and reports rows done / total for
+  the progress bar; `EXPORTER` keeps a rolling workbook of the whole store
+  (session.EXPORT_PATH) current after saves (debounced, with a maximum
+  wait) – the legacy master workbook the loader reads is never written
+
+No Streamlit calls in here, so both can run off the script thread.
+"""
+
+from __future__ import annotations
+
+import csv
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from .schema import HEADERS, META_COLUMNS, NUMERIC_FIELDS, TIER_COLUMNS, TIERS
+from .loader import EMAIL_COL, SUPPLIERS_COLUMNS, SUPPLIERS_SHEET
+from .metrics import REGISTRY
+from .store import Store
+
+log = logging.getLogger(__name__)
+
+FORMATS     = ("xlsx", "csv", "parquet")
+CHUNK_ROWS  = 20_000
+NUMERIC_COLS = sorted({i for t in TIERS for i, field, _ in TIER_COLUMNS[t] if field in NUMERIC_FIELDS})
+
+_WRITE_LOCK = threading.Lock()      # one rolling-workbook writer at a time
+
+
+def build_frame(vendors: Iterable[Tuple[Dict, Dict[str, List[Dict]]]]) -> pd.DataFrame:
+    """(vendor_meta, vendor_data) pairs → one HEADERS frame, vendor-contiguous.
+
+    Each tier is gathered column-wise into its own block across all vendors,
+    the four blocks are concatenated once and a stable argsort on the vendor
+    ordinal restores the vendor → tier row order.
+    """
+    width = len(HEADERS)
+    cols = {t: {i: [] for i, _ in META_COLUMNS} for t in TIERS}
+    order = {t: [] for t in TIERS}
+    for ordinal, (meta, data) in enumerate(vendors):
+        for tier in TIERS:
+            entries = data.get(tier) or ()
+            if not entries:
+                continue
+            n = len(entries)
+            block = cols[tier]
+            for i, field in META_COLUMNS:
+                block[i].extend([meta.get(field, "")] * n)
+            for i, field, default in TIER_COLUMNS[tier]:
+                block.setdefault(i, []).extend([e.get(field, default) for e in entries])
+            order[tier].extend([ordinal] * n)
+
+    frames = [pd.DataFrame(cols[t]).reindex(columns=range(width), fill_value="")
+              for t in TIERS if order[t]]
+    if not frames:
+        return pd.DataFrame(columns=HEADERS)
+    frame = pd.concat(frames, ignore_index=True)
+    ordinals = np.concatenate([np.asarray(order[t], dtype=np.int64) for t in TIERS if order[t]])
+    frame = frame.take(np.argsort(ordinals, kind="stable"))
+    frame.columns = HEADERS                 # positional → duplicate captions are fine
+    return frame.reset_index(drop=True)
+
+
+def iter_frames(store: Store, chunk_rows: int = CHUNK_ROWS, suppliers: Optional[Dict[str, str]] = None,
+                vendor_ids: Optional[Iterable[str]] = None, emails: bool = False) -> Iterator[pd.DataFrame]:
+    """HEADERS frames of about `chunk_rows` rows; whole vendors, in vendor order.
+
+    `suppliers`, if given, is filled with vendor_id (e-mail) → supplier name;
+    `vendor_ids` limits the export to those vendors (None = all); `emails`
+    appends each row's vendor_id as EMAIL_COL.
+    """
+    def frame() -> pd.DataFrame:
+        out = build_frame(batch)
+        if emails:
+            out[EMAIL_COL] = np.repeat(owners, counts)
+        return out
+
+    batch, owners, counts, rows = [], [], [], 0
+    for vendor_id, meta, data in store.iter_vendors(vendor_ids):
+        if suppliers is not None:
+            suppliers[vendor_id] = meta.get("supplier_name", "")
+        batch.append((meta, data))
+        owners.append(vendor_id)
+        counts.append(sum(len(data.get(t) or ()) for t in TIERS))
+        rows += counts[-1]
+        if rows >= chunk_rows:
+            yield frame()
+            batch, owners, counts, rows = [], [], [], 0
+    if batch:
+        yield frame()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  Sinks (one per format; write(frame) per chunk, then close())
+# ──────────────────────────────────────────────────────────────────────────────
+class _XlsxSink:
+    def __init__(self, path: str):
+        import xlsxwriter
+        self.book = xlsxwriter.Workbook(path, {"constant_memory": True, "strings_to_formulas": False,
+                                               "strings_to_urls": False, "strings_to_numbers": False})
+        self.sheet = self.book.add_worksheet("Sheet1")
+        self.sheet.write_row(0, 0, [*HEADERS, EMAIL_COL], self.book.add_format({"bold": True}))
+        self.row = 1
+
+    def write(self, frame: pd.DataFrame) -> None:
+        cells = frame.astype(object).where(frame.notna(), None)     # NaN → blank cell
+        for values in cells.itertuples(index=False, name=None):
+            self.sheet.write_row(self.row, 0, values)
+            self.row += 1
+
+    def write_suppliers(self, suppliers: Dict[str, str]) -> None:
+        sheet = self.book.add_worksheet(SUPPLIERS_SHEET)
+        sheet.write_row(0, 0, SUPPLIERS_COLUMNS, self.book.add_format({"bold": True}))
+        for row, pair in enumerate(suppliers.items(), start=1):
+            sheet.write_row(row, 0, pair)
+
+    def close(self) -> None:
+        self.book.close()
+
+
+class _CsvSink:
+    def __init__(self, path: str):
+        self.fh = open(path, "w", encoding="utf-8", newline="")
+        csv.writer(self.fh).writerow(HEADERS)
+
+    def write(self, frame: pd.DataFrame) -> None:
+        frame.to_csv(self.fh, header=False, index=False)
+
+    def close(self) -> None:
+        self.fh.close()
+
+
+def _unique(names: List[str]) -> List[str]:
+    """Parquet needs distinct column names; repeated captions get " (2)", " (3)", …"""
+    seen: Dict[str, int] = {}
+    out = []
+    for name in names:
+        seen[name] = seen.get(name, 0) + 1
+        out.append(name if seen[name] == 1 else f"{name} ({seen[name]})")
+    return out
+
+
+class _ParquetSink:
+    SCHEMA = pa.schema([(name, pa.float64() if i in NUMERIC_COLS else pa.string())
+                        for i, name in enumerate(_unique(HEADERS))])
+
+    def __init__(self, path: str):
+        import pyarrow.parquet as pq
+        self.writer = pq.ParquetWriter(path, self.SCHEMA, compression="zstd")
+
+    def write(self, frame: pd.DataFrame) -> None:
+        arrays = []
+        for i, field in enumerate(self.SCHEMA):
+            col = frame.iloc[:, i]
+            if i in NUMERIC_COLS:
+                arrays.append(pa.array(pd.to_numeric(col, errors="coerce"), pa.float64(), from_pandas=True))
+            else:
+                arrays.append(pa.array([None if v is None or v != v else str(v) for v in col], pa.string()))
+        self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.SCHEMA))
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+SINKS = {"xlsx": _XlsxSink, "csv": _CsvSink, "parquet": _ParquetSink}
+
+
+def export(store: Store, path: str, fmt: str = "xlsx", progress: Optional[Callable[[int], None]] = None,
+           vendor_ids: Optional[Iterable[str]] = None) -> int:
+    """Stream every vendor in `store` (or just `vendor_ids`) to `path` as `fmt`; returns rows written.
+
+    `progress(rows_so_far)` is called after each chunk.
+    """
+    root, ext = os.path.splitext(path)
+    tmp = f"{root}.tmp{ext}"
+    sink, written, suppliers = SINKS[fmt](tmp), 0, {}
+    try:
+        for frame in iter_frames(store, suppliers=suppliers, vendor_ids=vendor_ids, emails=fmt == "xlsx"):
+            sink.write(frame)
+            written += len(frame)
+            if progress is not None:
+                progress(written)
+        if isinstance(sink, _XlsxSink):
+            sink.write_suppliers(suppliers)
+        sink.close()
+    except BaseException:
+        try:
+            sink.close()
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        raise
+    os.replace(tmp, path)                           # readers never see a half-written file
+    return written
+
+
+def write_excel(store: Store, path: str) -> int:
+    """Rewrite the rolling workbook `path` from every vendor in `store`; returns rows written."""
+    with _WRITE_LOCK, REGISTRY.timer("pmivdc_op_seconds", op="excel_write"):
+        rows = export(store, path, "xlsx")
+    REGISTRY.observe("pmivdc_rows_written", rows, target="excel")
+    return rows
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  Background export (debounced: a burst of saves → one workbook rewrite)
+# ──────────────────────────────────────────────────────────────────────────────
+class BackgroundExporter:
+    """Rewrites a workbook `delay` seconds after the last save, but never more
+    than `delay * max_delays` seconds after the first save it has not written."""
+
+    def __init__(self, delay: float = 2.0, max_delays: int = 5):
+        self.delay = delay
+        self.max_wait = delay * max_delays
+        self._due: Dict[str, Tuple[float, float, Store]] = {}     # path → (due, deadline, store)
+        self._cv = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, store: Store, path: str) -> None:
+        with self._cv:
+            now = time.monotonic()
+            deadline = self._due[path][1] if path in self._due else now + self.max_wait
+            self._due[path] = (min(now + self.delay, deadline), deadline, store)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="xlsx-export", daemon=True)
+                self._thread.start()
+            self._cv.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cv:
+                while not self._due:
+                    self._cv.wait()
+                path, (due, _, store) = min(self._due.items(), key=lambda kv: kv[1][0])
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._cv.wait(wait)
+                    continue
+                del self._due[path]
+            try:
+                write_excel(store, path)
+            except Exception:               # the store is intact; the next save retries
+                log.exception("export to %s failed", path)
+
+
+EXPORTER = BackgroundExporter()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  Download jobs (one file per request, progress for the UI)
+# ──────────────────────────────────────────────────────────────────────────────
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class ExportJob:
+    def __init__(self, fmt: str, path: str, total: int, vendor_ids: Optional[List[str]] = None):
+        self.id = uuid.uuid4().hex
+        self.fmt, self.path, self.total = fmt, path, total
+        self.vendor_ids = vendor_ids                # None = every vendor
+        self.rows, self.state, self.error = 0, QUEUED, ""
+        self.finished: Optional[float] = None
+
+    @property
+    def fraction(self) -> float:
+        if self.state == DONE:
+            return 1.0
+        return min(1.0, self.rows / self.total) if self.total else 0.0
+
+
+class ExportJobs:
+    def __init__(self, workers: int = 2, keep: float = 3600.0):
+        self.keep = keep                            # seconds a finished file stays downloadable
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="export")
+        self._jobs: Dict[str, ExportJob] = {}
+        self._lock = threading.Lock()
+
+    def start(self, store: Store, directory: str, fmt: str,
+              vendor_ids: Optional[Iterable[str]] = None) -> ExportJob:
+        """Queue an export of `vendor_ids` (None = every vendor) as `fmt`."""
+        if fmt not in SINKS:
+            raise ValueError(f"unknown export format {fmt!r}")
+        self._prune()
+        os.makedirs(directory, exist_ok=True)
+        name = f"pmivdc-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}.{fmt}"
+        vendor_ids = None if vendor_ids is None else list(vendor_ids)
+        job = ExportJob(fmt, os.path.join(directory, name), store.row_count(vendor_ids), vendor_ids)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._pool.submit(self._run, job, store)
+        return job
+
+    def get(self, job_id: Optional[str]) -> Optional[ExportJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job: ExportJob, store: Store) -> None:
+        job.state = RUNNING
+        try:
+            with REGISTRY.timer("pmivdc_op_seconds", op=f"export_{job.fmt}"):
+                job.rows = export(store, job.path, job.fmt, progress=lambda n: setattr(job, "rows", n),
+                                  vendor_ids=job.vendor_ids)
+            REGISTRY.observe("pmivdc_rows_written", job.rows, target=job.fmt)
+            job.state = DONE
+        except Exception as exc:
+            log.exception("export to %s failed", job.path)
+            job.error, job.state = str(exc), FAILED
+        job.finished = time.monotonic()
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            old = [j for j in self._jobs.values() if j.finished is not None and now - j.finished > self.keep]
+            for job in old:
+                del self._jobs[job.id]
+        for job in old:
+            try:
+                os.remove(job.path)
+            except OSError:
+                pass
+
+
+JOBS = ExportJobs()
@@ -0,0 +1,226 @@
+"""
+Multi-series demand forecasting
+-------------------------------
+* `read_history()` streams a demand CSV in chunks with explicit dtypes and
+  folds every chunk into per-(series key, month) sums, so a file with
+  millions of rows never sits in memory as one frame; the result is a dense
+  (series × month) matrix
+* the models work on that whole matrix at once – one NumPy expression per
+  time step, not one Python loop per series:
+  moving average, simple exponential smoothing, seasonal naive, and "auto",
+  which backtests all three on the last months and keeps the best per series
+* large matrices are split into row blocks on a thread pool (NumPy releases
+  the GIL inside its kernels; a process pool would re-run vdc.py, see
+  certcheck)
+* parsed histories and forecasts are cached by the file's SHA-256, so the same
+  upload – or a different model / horizon over it – is served from memory
+
+Expected columns: a month / date column, a numeric demand column, and any
+number of key columns (SKU, plant, …) identifying a series – a blank key
+cell is the series BLANK_KEY, not dropped.  The original two-column
+"Month, Volume" file is a single series.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 500_000
+BLOCK_ROWS = 20_000                         # series per thread-pool task
+SEASON = 12
+DATE_NAMES = ("month", "date", "period")
+VALUE_NAMES = ("volume", "demand", "qty", "quantity", "value")
+BLANK_KEY = "(blank)"
+
+Model = Callable[[np.ndarray, int], np.ndarray]
+
+
+def file_digest(stream: BinaryIO) -> str:
+    sha = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(1024 * 1024), b""):
+        sha.update(chunk)
+    stream.seek(0)
+    return sha.hexdigest()
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  History
+# ──────────────────────────────────────────────────────────────────────────────
+class History:
+    """Monthly demand of `len(keys)` series over consecutive `months`."""
+
+    def __init__(self, keys: pd.DataFrame, months: pd.PeriodIndex, values: np.ndarray, rows: int):
+        self.keys, self.months, self.values, self.rows = keys, months, values, rows
+
+    def labels(self) -> List[str]:
+        if self.keys.empty:
+            return ["all"]
+        return self.keys.astype(str).agg(" · ".join, axis=1).tolist()
+
+
+def _columns(names: List[str]) -> Tuple[str, str, List[str]]:
+    lower = {n.strip().lower(): n for n in names}
+    date = next((lower[n] for n in DATE_NAMES if n in lower), names[0])
+    value = next((lower[n] for n in VALUE_NAMES if n in lower), names[-1])
+    if value == date:
+        raise ValueError("need a month column and a demand column")
+    return date, value, [n for n in names if n not in (date, value)]
+
+
+def read_history(stream: BinaryIO, chunk_rows: int = CHUNK_ROWS) -> History:
+    stream.seek(0)
+    names = list(pd.read_csv(stream, nrows=0).columns)
+    date, value, keys = _columns(names)
+    stream.seek(0)
+
+    partials, rows = [], 0
+    reader = pd.read_csv(stream, usecols=[date, value, *keys], chunksize=chunk_rows,
+                         dtype={value: "float64", **{k: "string" for k in keys}})
+    for chunk in reader:
+        rows += len(chunk)
+        when = pd.to_datetime(chunk[date], errors="coerce")
+        chunk = chunk.assign(_m=(when.dt.year * 12 + when.dt.month - 1))
+        chunk = chunk.dropna(subset=["_m", value])
+        for k in keys:                      # a NaN key would factorize to -1 and miss its row
+            chunk[k] = chunk[k].str.strip().replace("", pd.NA).fillna(BLANK_KEY)
+        partials.append(chunk.groupby([*keys, "_m"], sort=False)[value].sum())
+    if not partials:
+        raise ValueError("no dated demand rows in the file")
+
+    sums = pd.concat(partials).groupby(level=list(range(len(keys) + 1)), sort=False).sum()
+    frame = sums.reset_index()
+    month = frame["_m"].to_numpy(dtype=np.int64)
+    first, last = month.min(), month.max()
+    if keys:
+        codes, uniques = pd.MultiIndex.from_frame(frame[keys]).factorize(sort=True)
+        key_frame = uniques.to_frame(index=False, name=keys)
+    else:
+        codes, key_frame = np.zeros(len(frame), dtype=np.int64), pd.DataFrame()
+
+    values = np.zeros((codes.max() + 1, last - first + 1))
+    values[codes, month - first] = frame[value].to_numpy()
+    months = pd.period_range(pd.Period(year=first // 12, month=first % 12 + 1, freq="M"),
+                             periods=last - first + 1, freq="M")
+    return History(key_frame, months, values, rows)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  Models – each maps (series × T) history to (series × horizon) forecast
+# ──────────────────────────────────────────────────────────────────────────────
+def moving_average(y: np.ndarray, horizon: int, window: int = 3) -> np.ndarray:
+    level = y[:, -window:].mean(axis=1)
+    return np.repeat(level[:, None], horizon, axis=1)
+
+
+def exp_smoothing(y: np.ndarray, horizon: int, alpha: float = 0.3) -> np.ndarray:
+    level = y[:, 0].copy()
+    for t in range(1, y.shape[1]):          # O(T) steps, each over every series
+        level += alpha * (y[:, t] - level)
+    return np.repeat(level[:, None], horizon, axis=1)
+
+
+def seasonal_naive(y: np.ndarray, horizon: int, season: int = SEASON) -> np.ndarray:
+    if y.shape[1] < season:
+        return np.repeat(y[:, -1:], horizon, axis=1)
+    return y[:, -season:][:, np.arange(horizon) % season]
+
+
+MODELS: Dict[str, Model] = {
+    "Moving average (3 m)": moving_average,
+    "Exponential smoothing": exp_smoothing,
+    "Seasonal naive (12 m)": seasonal_naive,
+}
+AUTO = "Auto (best backtest per series)"
+
+
+def _auto(y: np.ndarray, horizon: int) -> Tuple[np.ndarray, np.ndarray]:
+    fits = list(MODELS.values())
+    hold = min(horizon, y.shape[1] // 4)
+    if hold == 0:
+        return fits[0](y, horizon), np.zeros(len(y), dtype=np.int64)
+    train, test = y[:, :-hold], y[:, -hold:]
+    errors = np.stack([np.abs(fit(train, hold) - test).mean(axis=1) for fit in fits], axis=1)
+    best = errors.argmin(axis=1)
+    forecasts = np.stack([fit(y, horizon) for fit in fits], axis=1)    # series × model × h
+    return np.take_along_axis(forecasts, best[:, None, None], axis=1)[:, 0], best
+
+
+def _run(model: str, y: np.ndarray, horizon: int) -> Tuple[np.ndarray, np.ndarray]:
+    if model == AUTO:
+        return _auto(y, horizon)
+    return MODELS[model](y, horizon), np.full(len(y), list(MODELS).index(model))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  Engine
+# ──────────────────────────────────────────────────────────────────────────────
+class Forecast:
+    def __init__(self, history: History, model: str, values: np.ndarray, chosen: np.ndarray):
+        self.history, self.model, self.values = history, model, values
+        self.chosen = np.asarray(list(MODELS))[chosen]
+        last = history.months[-1]
+        self.months = pd.period_range(last + 1, periods=values.shape[1], freq="M")
+
+    def frame(self) -> pd.DataFrame:
+        out = pd.DataFrame(self.values.round(2), columns=[str(m) for m in self.months])
+        out.insert(0, "model", self.chosen)
+        if self.history.keys.empty:
+            out.insert(0, "series", "all")
+            return out
+        return pd.concat([self.history.keys, out], axis=1)
+
+
+class Engine:
+    def __init__(self, workers: int = 0, max_files: int = 8):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.max_files = max_files
+        self._histories: "OrderedDict[str, History]" = OrderedDict()
+        self._forecasts: "OrderedDict[Tuple[str, str, int], Forecast]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def _cached(self, cache: OrderedDict, key, build, limit: int):
+        with self._lock:
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+        value = build()
+        with self._lock:
+            cache[key] = value
+            while len(cache) > limit:
+                cache.popitem(last=False)
+        return value
+
+    def history(self, stream: BinaryIO, digest: str = "") -> Tuple[str, History]:
+        digest = digest or file_digest(stream)
+        return digest, self._cached(self._histories, digest, lambda: read_history(stream),
+                                    self.max_files)
+
+    def forecast(self, stream: BinaryIO, model: str = AUTO, horizon: int = 6,
+                 digest: str = "") -> Forecast:
+        digest, history = self.history(stream, digest)
+        return self._cached(self._forecasts, (digest, model, horizon),
+                            lambda: self._fit(history, model, horizon), 4 * self.max_files)
+
+    def _fit(self, history: History, model: str, horizon: int) -> Forecast:
+        y = history.values
+        if len(y) <= BLOCK_ROWS or self.workers == 1:
+            return Forecast(history, model, *_run(model, y, horizon))
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="forecast")
+        blocks = list(self._pool.map(lambda a: _run(model, y[a:a + BLOCK_ROWS], horizon),
+                                     range(0, len(y), BLOCK_ROWS)))
+        return Forecast(history, model, np.concatenate([b[0] for b in blocks]),
+                        np.concatenate([b[1] for b in blocks]))
+
+
+ENGINE = Engine(int(os.environ.get("PMIVDC_FORECAST_WORKERS", "0")))
@@ -0,0 +1,226 @@
+"""
+Spatial index over every vendor's T4 plantations
+------------------------------------------------
+* points come from the store's `lat` / `lon` columns (parsed from `gps` on
+  write, see store.DERIVED)
+* a fixed lat/lon grid (0.5° cells): positions are sorted by cell id once,
+  so a cell is a `[start, stop)` slice found with `searchsorted`; a radius or
+  nearest-neighbour query touches only the cells its circle overlaps and
+  runs one vectorised haversine over those candidates
+* `refresh()` is incremental: rows written since the last high-water mark
+  are appended to a small brute-force tail (older copies are tombstoned) and
+  folded into the grid once the tail grows; a deletion (live count no longer
+  matches the table) triggers a full rebuild
+* near-duplicates: points are snapped to cubes on the unit sphere whose edge
+  equals the distance threshold; sorted cube keys + `searchsorted` pair up
+  points in neighbouring cubes, and only those pairs are measured
+* every query takes an optional `vendor`: only that vendor's points are
+  searched (the per-vendor view of the screening page); None = all vendors
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .store import Store
+
+EARTH_KM = 6371.0088
+CELL_DEG = 0.5
+_COLS = int(360 / CELL_DEG)
+
+
+def haversine(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance [km]; degrees in, broadcasting like any ufunc."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _cell(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    row = np.clip(((lat + 90) // CELL_DEG).astype(np.int64), 0, int(180 / CELL_DEG) - 1)
+    col = ((lon + 180) // CELL_DEG).astype(np.int64) % _COLS
+    return row * _COLS + col
+
+
+class GeoIndex:
+    def __init__(self, store: Store, tail_max: int = 2048):
+        self.store = store
+        self.tail_max = tail_max
+        self._lock = threading.Lock()
+        self._rebuild_arrays([], [], [], [])
+        self.high_water = -1.0
+
+    # ── build ────────────────────────────────────────────────────────────────
+    def _rebuild_arrays(self, vendors, entries, lat, lon) -> None:
+        self.vendor = np.asarray(vendors, dtype=object)
+        self.entry = np.asarray(entries, dtype=object)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.alive = np.ones(len(self.lat), dtype=bool)
+        self.pos: Dict[Tuple[str, str], int] = {k: i for i, k in enumerate(zip(entries, vendors))}
+        self._index_grid(len(self.lat))
+
+    def _index_grid(self, upto: int) -> None:
+        cells = _cell(self.lat[:upto], self.lon[:upto])
+        self.order = np.argsort(cells, kind="stable")
+        self.cells = cells[self.order]
+        self.gridded = upto                 # positions ≥ gridded live in the tail
+
+    def _rows(self, since: Optional[float]) -> List[Tuple]:
+        sql = "SELECT vendor_id, entry_id, lat, lon, updated_at FROM t4"
+        with self.store._tx(write=False) as con:
+            if since is None:
+                return con.execute(sql + " WHERE lat IS NOT NULL").fetchall()
+            return con.execute(sql + " WHERE updated_at > ?", (since,)).fetchall()
+
+    def _live_in_store(self) -> int:
+        return self.store._con().execute("SELECT COUNT(*) FROM t4 WHERE lat IS NOT NULL").fetchone()[0]
+
+    def rebuild(self) -> None:
+        with self._lock:
+            rows = self._rows(None)
+            self._rebuild_arrays([r[0] for r in rows], [r[1] for r in rows],
+                                 [r[2] for r in rows], [r[3] for r in rows])
+            self.high_water = max((r[4] for r in rows), default=-1.0)
+
+    def refresh(self) -> None:
+        """Fold in rows written since the last refresh; rebuild on deletions."""
+        if self.high_water < 0:
+            return self.rebuild()
+        with self._lock:
+            fresh = self._rows(self.high_water)
+            add_v, add_e, add_lat, add_lon = [], [], [], []
+            for vendor, entry, lat, lon, updated in fresh:
+                self.high_water = max(self.high_water, updated)
+                at = self.pos.get((entry, vendor))
+                if at is not None and self.alive[at]:
+                    if lat is not None and (self.lat[at], self.lon[at]) == (lat, lon):
+                        continue            # saved again, same position
+                    self.alive[at] = False
+                if lat is not None:
+                    self.pos[(entry, vendor)] = len(self.lat) + len(add_lat)
+                    add_v.append(vendor); add_e.append(entry); add_lat.append(lat); add_lon.append(lon)
+            if add_lat:
+                self.vendor = np.concatenate([self.vendor, np.asarray(add_v, dtype=object)])
+                self.entry = np.concatenate([self.entry, np.asarray(add_e, dtype=object)])
+                self.lat = np.concatenate([self.lat, add_lat])
+                self.lon = np.concatenate([self.lon, add_lon])
+                self.alive = np.concatenate([self.alive, np.ones(len(add_lat), dtype=bool)])
+            stale = self._live_in_store() != int(self.alive.sum())
+            compact = len(self.lat) - self.gridded > self.tail_max
+        if stale:
+            self.rebuild()
+        elif compact:
+            with self._lock:
+                self._index_grid(len(self.lat))
+
+    def __len__(self) -> int:
+        return int(self.alive.sum())
+
+    def count(self, vendor: Optional[str] = None) -> int:
+        return len(self) if vendor is None else int((self.vendor[self.alive] == vendor).sum())
+
+    # ── queries ──────────────────────────────────────────────────────────────
+    def _candidates(self, lat: float, lon: float, km: float, vendor: Optional[str] = None) -> np.ndarray:
+        dlat = km / (EARTH_KM * np.pi / 180)
+        lat0, lat1 = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+        coslat = min(np.cos(np.radians(lat0)), np.cos(np.radians(lat1)))
+        dlon = 180.0 if coslat < 1e-6 else min(180.0, dlat / coslat)   # circle reaching a pole
+        rows = np.arange(int((lat0 + 90) // CELL_DEG), int(min(lat1 + 90, 180 - 1e-9) // CELL_DEG) + 1)
+        if dlon >= 180.0:
+            cols = np.arange(_COLS)
+        else:
+            c0, c1 = int((lon - dlon + 180) // CELL_DEG), int((lon + dlon + 180) // CELL_DEG)
+            cols = np.arange(c0, c1 + 1) % _COLS
+        wanted = np.unique((rows[:, None] * _COLS + cols[None, :]).ravel())
+        starts = np.searchsorted(self.cells, wanted, side="left")
+        stops = np.searchsorted(self.cells, wanted, side="right")
+        hit = [self.order[a:b] for a, b in zip(starts, stops) if b > a]
+        hit.append(np.arange(self.gridded, len(self.lat)))          # un-gridded tail
+        cand = np.concatenate(hit)
+        cand = cand[self.alive[cand]]
+        return cand if vendor is None else cand[self.vendor[cand] == vendor]
+
+    def _frame(self, idx: np.ndarray, dist: np.ndarray) -> pd.DataFrame:
+        order = np.argsort(dist, kind="stable")
+        idx, dist = idx[order], dist[order]
+        return pd.DataFrame({"vendor_id": self.vendor[idx], "entry_id": self.entry[idx],
+                             "lat": self.lat[idx], "lon": self.lon[idx], "km": dist.round(3)})
+
+    def within(self, lat: float, lon: float, km: float, vendor: Optional[str] = None) -> pd.DataFrame:
+        """Plantations within `km` of (lat, lon), nearest first."""
+        with self._lock:
+            cand = self._candidates(lat, lon, km, vendor)
+            dist = haversine(lat, lon, self.lat[cand], self.lon[cand])
+            keep = dist <= km
+            return self._frame(cand[keep], dist[keep])
+
+    def within_many(self, points: np.ndarray, km: float, vendor: Optional[str] = None) -> pd.DataFrame:
+        """`within` for every (lat, lon) row of `points`; adds a `query` column."""
+        frames = [self.within(lat, lon, km, vendor).assign(query=i) for i, (lat, lon) in enumerate(points)]
+        return pd.concat(frames, ignore_index=True) if frames else self._frame(np.array([], int), np.array([]))
+
+    def nearest(self, lat: float, lon: float, k: int = 5, vendor: Optional[str] = None) -> pd.DataFrame:
+        km = CELL_DEG * 111.0
+        with self._lock:
+            live = self.count(vendor)
+            while True:                     # widen until k hits lie inside the searched radius
+                cand = self._candidates(lat, lon, km, vendor)
+                dist = haversine(lat, lon, self.lat[cand], self.lon[cand])
+                if (dist <= km).sum() >= min(k, live) or km > np.pi * EARTH_KM:
+                    break
+                km *= 4
+            if len(dist) > k:
+                top = np.argpartition(dist, k - 1)[:k]
+                cand, dist = cand[top], dist[top]
+            return self._frame(cand, dist)
+
+    def near_duplicates(self, meters: float = 100.0, vendor: Optional[str] = None) -> pd.DataFrame:
+        """Pairs of live plantations closer than `meters` (either vendor, or both `vendor`'s)."""
+        with self._lock:
+            idx = np.flatnonzero(self.alive if vendor is None else self.alive & (self.vendor == vendor))
+            lat, lon = np.radians(self.lat[idx]), np.radians(self.lon[idx])
+            xyz = np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=1)
+            edge = meters / 1000 / EARTH_KM         # chord ≈ arc at these scales
+            cube = np.floor(xyz / edge).astype(np.int64) + (1 << 20)     # |coord| / edge < 2**20
+            key = (cube[:, 0] << 42) | (cube[:, 1] << 21) | cube[:, 2]
+            order = np.argsort(key, kind="stable")
+            keys = key[order]                       # sorted probes → cheap searchsorted
+            pairs = []
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for dz in (-1, 0, 1):
+                        probe = keys + ((dx << 42) + (dy << 21) + dz)
+                        lo = np.searchsorted(keys, probe, "left")
+                        n = np.searchsorted(keys, probe, "right") - lo
+                        if not n.any():
+                            continue
+                        first = np.repeat(order, n)
+                        second = order[np.repeat(lo, n) + (np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n))]
+                        keep = first < second
+                        pairs.append(np.stack([first[keep], second[keep]], axis=1))
+            pairs = np.concatenate(pairs) if pairs else np.empty((0, 2), np.int64)
+            a, b = idx[pairs[:, 0]], idx[pairs[:, 1]]
+            dist = haversine(self.lat[a], self.lon[a], self.lat[b], self.lon[b]) * 1000
+            keep = dist <= meters
+            a, b, dist = a[keep], b[keep], dist[keep]
+            return pd.DataFrame({"vendor_a": self.vendor[a], "entry_a": self.entry[a],
+                                 "vendor_b": self.vendor[b], "entry_b": self.entry[b],
+                                 "lat": self.lat[a], "lon": self.lon[a],
+                                 "meters": dist.round(1)}).sort_values("meters", ignore_index=True)
+
+
+_INDEXES: Dict[str, GeoIndex] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def geo_index(store: Store) -> GeoIndex:
+    """The process-wide index for `store`, refreshed with anything written since."""
+    with _REGISTRY_LOCK:
+        index = _INDEXES.setdefault(store.path, GeoIndex(store))
+    index.refresh()
+    return index
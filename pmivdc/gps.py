@@ -0,0 +1,52 @@
+"""
+Free-text GPS → (lat, lon) in decimal degrees.
+
+Accepts what vendors actually type into the T4 "FMU centre GPS" box:
+"-2.51, 113.92", "-2.51 113.92", "2.51 S 113.92 E", "2°30'36\\"S 113°55'12\\"E",
+"2° 30.6' S, 113° 55.2' E".  Anything else (shapefile references, blanks)
+gives None.  Pure Python – the store calls it on every T4 write.
+"""
+
+from __future__ import annotations
+
+import functools
+import re
+from typing import Optional, Tuple
+
+_NUM = r"[-+]?\d+(?:[.,]\d+)?"
+_PART = re.compile(rf"""
+    (?P<deg>{_NUM})\s*°?\s*
+    (?:(?P<min>\d+(?:\.\d+)?)\s*['′]\s*)?
+    (?:(?P<sec>\d+(?:\.\d+)?)\s*(?:"|″|'')\s*)?
+    (?P<hemi>[NSEW])?
+""", re.VERBOSE | re.IGNORECASE)
+
+
+def _parts(text: str):
+    for m in _PART.finditer(text):
+        if not m.group("deg"):
+            continue
+        value = abs(float(m.group("deg").replace(",", ".")))
+        value += float(m.group("min") or 0) / 60 + float(m.group("sec") or 0) / 3600
+        hemi = (m.group("hemi") or "").upper()
+        if m.group("deg").startswith("-") or hemi in ("S", "W"):
+            value = -value
+        yield value, hemi
+
+
+@functools.lru_cache(maxsize=65536)
+def parse_gps(text: object) -> Optional[Tuple[float, float]]:
+    if not isinstance(text, str) or not text.strip():
+        return None
+    # "1,5 2,5" uses decimal commas; "1.5, 2.5" a separator comma
+    text = re.sub(r"(?<=\d),(?=\d)", "." if not re.search(r"\d\.\d", text) else ",", text)
+    text = re.sub(r"(?<=\d),(?=\d)", ", ", text)
+    parts = list(_parts(text))
+    if len(parts) != 2:
+        return None
+    (a, ha), (b, hb) = parts
+    if ha in ("E", "W") or hb in ("N", "S"):    # "113.9 E 2.5 S" → swap to (lat, lon)
+        (a, ha), (b, hb) = (b, hb), (a, ha)
+    if not (-90 <= a <= 90 and -180 <= b <= 180):
+        return None
+    return a, b
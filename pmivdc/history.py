@@ -0,0 +1,232 @@
+"""
+Versioned change history per vendor
+-----------------------------------
+* every Store write appends one version for the vendor it touches, in the
+  same transaction as the change (history and data never disagree): a
+  row-level delta – entries put (whole row), patched (changed fields only)
+  or deleted, meta replaced – as zlib-compressed JSON
+* every CHECKPOINT_EVERY versions a full snapshot is stored, and once as
+  version 0 before a vendor's first recorded change (covers data written
+  before the history existed); reconstructing any version starts from the
+  nearest checkpoint at or below it, so at most CHECKPOINT_EVERY - 1
+  deltas are applied
+* `history_entries` indexes (tier, entry_id) → version, so one entry's
+  history decompresses only the versions that touched it
+* storage grows with the size of the changes plus one snapshot per
+  CHECKPOINT_EVERY saves
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import zlib
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from .schema import LIST_FIELDS, TIER_FIELDS, TIERS
+
+if TYPE_CHECKING:
+    from .store import Store
+
+CHECKPOINT_EVERY = 50
+
+DDL = [
+    """CREATE TABLE IF NOT EXISTS history (
+           vendor_id  TEXT NOT NULL,
+           version    INTEGER NOT NULL,
+           at         REAL NOT NULL,
+           puts       INTEGER NOT NULL,
+           patches    INTEGER NOT NULL,
+           deletes    INTEGER NOT NULL,
+           meta       INTEGER NOT NULL,
+           delta      BLOB NOT NULL,
+           PRIMARY KEY (vendor_id, version))""",
+    "CREATE INDEX IF NOT EXISTS history_at ON history (vendor_id, at)",
+    """CREATE TABLE IF NOT EXISTS history_checkpoints (
+           vendor_id  TEXT NOT NULL,
+           version    INTEGER NOT NULL,
+           at         REAL NOT NULL,
+           snapshot   BLOB NOT NULL,
+           PRIMARY KEY (vendor_id, version))""",
+    """CREATE TABLE IF NOT EXISTS history_entries (
+           vendor_id  TEXT NOT NULL,
+           tier       TEXT NOT NULL,
+           entry_id   TEXT NOT NULL,
+           version    INTEGER NOT NULL,
+           PRIMARY KEY (vendor_id, tier, entry_id, version))""",
+]
+
+Delta = Dict                                # {"meta": {...}, "put" / "patch": {tier: {id: row}}, "delete": {tier: [id]}}
+State = Tuple[Dict, Dict[str, Dict[str, Dict]]]     # meta, tier → {entry_id: entry} (entry order)
+
+
+def _pack(obj) -> bytes:
+    return zlib.compress(json.dumps(obj, default=str, separators=(",", ":")).encode(), 6)
+
+
+def _unpack(blob: bytes):
+    return json.loads(zlib.decompress(blob))
+
+
+def _apply(state: State, delta: Delta) -> None:
+    meta, tiers = state
+    if "meta" in delta:
+        meta.clear()
+        meta.update(delta["meta"])
+    for tier, rows in delta.get("put", {}).items():
+        tiers[tier].update(rows)            # an update keeps its position, like `seq`
+    for tier, rows in delta.get("patch", {}).items():
+        for entry_id, fields in rows.items():
+            if entry_id in tiers[tier]:
+                tiers[tier][entry_id] = {**tiers[tier][entry_id], **fields}
+    for tier, ids in delta.get("delete", {}).items():
+        for entry_id in ids:
+            tiers[tier].pop(entry_id, None)
+
+
+def _changes(old: Optional[Dict], new: Optional[Dict]) -> Dict[str, Tuple]:
+    old, new = old or {}, new or {}
+    return {f: (old.get(f), new.get(f)) for f in sorted(set(old) | set(new))
+            if f != "_id" and old.get(f) != new.get(f)}
+
+
+class History:
+    def __init__(self, store: "Store"):
+        self.store = store
+
+    # ── write side (inside the Store's write transaction) ────────────────────
+    def _checkpoint(self, con: sqlite3.Connection, vendor_id: str, version: int, now: float) -> None:
+        meta, data = self.store._load(con, vendor_id)
+        con.execute("INSERT OR REPLACE INTO history_checkpoints VALUES (?, ?, ?, ?)",
+                    (vendor_id, version, now, _pack({"meta": meta, "data": data})))
+
+    def begin(self, con: sqlite3.Connection, vendor_id: str, now: float) -> None:
+        """Before a write: baseline checkpoint (version 0) for data older than the history."""
+        if con.execute("SELECT 1 FROM history WHERE vendor_id = ? LIMIT 1", (vendor_id,)).fetchone():
+            return
+        if con.execute("SELECT 1 FROM vendors WHERE vendor_id = ?", (vendor_id,)).fetchone():
+            self._checkpoint(con, vendor_id, 0, now)
+
+    def record(self, con: sqlite3.Connection, vendor_id: str, now: float, delta: Delta) -> int:
+        """After a write: append `delta` as the vendor's next version; returns it."""
+        delta = {k: v for k, v in delta.items() if v or k == "meta"}
+        version = con.execute("SELECT COALESCE(MAX(version), 0) + 1 FROM history WHERE vendor_id = ?",
+                              (vendor_id,)).fetchone()[0]
+        count = lambda op: sum(len(rows) for rows in delta.get(op, {}).values())
+        con.execute("INSERT INTO history VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (vendor_id, version, now, count("put"), count("patch"), count("delete"),
+                     int("meta" in delta), _pack(delta)))
+        con.executemany("INSERT OR IGNORE INTO history_entries VALUES (?, ?, ?, ?)",
+                        [(vendor_id, tier, entry_id, version)
+                         for op in ("put", "patch", "delete") for tier, rows in delta.get(op, {}).items()
+                         for entry_id in rows])
+        if version % CHECKPOINT_EVERY == 0:
+            self._checkpoint(con, vendor_id, version, now)
+        return version
+
+    # ── reconstruction ───────────────────────────────────────────────────────
+    def _state(self, con: sqlite3.Connection, vendor_id: str, version: int) -> State:
+        row = con.execute("SELECT version, snapshot FROM history_checkpoints WHERE vendor_id = ? AND version <= ? "
+                          "ORDER BY version DESC LIMIT 1", (vendor_id, version)).fetchone()
+        state: State = ({}, {t: {} for t in TIERS})
+        start = 0
+        if row:
+            start, snap = row[0], _unpack(row[1])
+            state[0].update(snap["meta"])
+            for tier, entries in snap["data"].items():
+                state[1][tier] = {e["_id"]: e for e in entries}
+        for (blob,) in con.execute("SELECT delta FROM history WHERE vendor_id = ? AND version > ? AND version <= ? "
+                                   "ORDER BY version", (vendor_id, start, version)):
+            _apply(state, _unpack(blob))
+        return state
+
+    def version_at(self, vendor_id: str, when: float) -> int:
+        """Latest version written at or before `when` (epoch seconds); 0 = before any change."""
+        row = self.store._con().execute("SELECT MAX(version) FROM history WHERE vendor_id = ? AND at <= ?",
+                                        (vendor_id, when)).fetchone()
+        return row[0] or 0
+
+    def state(self, vendor_id: str, version: int) -> Tuple[Dict, Dict[str, List[Dict]]]:
+        """(vendor_meta, vendor_data) as it was right after `version`."""
+        with self.store._tx(write=False) as con:
+            meta, tiers = self._state(con, vendor_id, version)
+        return meta, {t: list(entries.values()) for t, entries in tiers.items() if entries}
+
+    def as_of(self, vendor_id: str, when: float) -> Tuple[Dict, Dict[str, List[Dict]]]:
+        return self.state(vendor_id, self.version_at(vendor_id, when))
+
+    # ── queries ──────────────────────────────────────────────────────────────
+    def versions(self, vendor_id: str) -> List[Dict]:
+        cur = self.store._con().execute(
+            "SELECT version, at, puts, patches, deletes, meta, LENGTH(delta) FROM history "
+            "WHERE vendor_id = ? ORDER BY version", (vendor_id,))
+        keys = ("version", "at", "puts", "patches", "deletes", "meta", "bytes")
+        return [dict(zip(keys, r)) for r in cur]
+
+    def entry_ids(self, vendor_id: str, tier: str) -> List[str]:
+        """Entries of `tier` with at least one recorded change, most recently changed first."""
+        cur = self.store._con().execute(
+            "SELECT entry_id FROM history_entries WHERE vendor_id = ? AND tier = ? "
+            "GROUP BY entry_id ORDER BY MAX(version) DESC", (vendor_id, tier))
+        return [r[0] for r in cur]
+
+    def entry_history(self, vendor_id: str, tier: str, entry_id: str) -> List[Dict]:
+        """Every version that touched one entry → op (created / updated / deleted) and field changes."""
+        with self.store._tx(write=False) as con:
+            touched = con.execute("SELECT h.version, h.at, h.delta FROM history_entries e "
+                                  "JOIN history h USING (vendor_id, version) "
+                                  "WHERE e.vendor_id = ? AND e.tier = ? AND e.entry_id = ? ORDER BY h.version",
+                                  (vendor_id, tier, entry_id)).fetchall()
+            if not touched:
+                return []
+            before = self._checkpoint_entry(con, vendor_id, tier, entry_id, touched[0][0] - 1)
+        events, current = [], before
+        for version, at, blob in touched:
+            delta = _unpack(blob)
+            if entry_id in delta.get("delete", {}).get(tier, ()):
+                new, op = None, "deleted"
+            elif entry_id in delta.get("put", {}).get(tier, {}):
+                new = delta["put"][tier][entry_id]
+                op = "updated" if current is not None else "created"
+            else:
+                new, op = {**(current or {}), **delta["patch"][tier][entry_id]}, "updated"
+            events.append({"version": version, "at": at, "op": op, "changes": _changes(current, new)})
+            current = new
+        return events
+
+    def _checkpoint_entry(self, con: sqlite3.Connection, vendor_id: str, tier: str, entry_id: str,
+                          version: int) -> Optional[Dict]:
+        """The entry in the latest checkpoint ≤ `version` – exact when no version in between touched it."""
+        row = con.execute("SELECT snapshot FROM history_checkpoints WHERE vendor_id = ? AND version <= ? "
+                          "ORDER BY version DESC LIMIT 1", (vendor_id, version)).fetchone()
+        if not row:
+            return None
+        return next((e for e in _unpack(row[0])["data"].get(tier, ()) if e["_id"] == entry_id), None)
+
+    def diff(self, vendor_id: str, since: float, until: float) -> Dict[str, Dict]:
+        """Per tier: entries added / removed / changed (field → (old, new)) between two instants."""
+        with self.store._tx(write=False) as con:
+            a = self._state(con, vendor_id, self.version_at(vendor_id, since))
+            b = self._state(con, vendor_id, self.version_at(vendor_id, until))
+        out = {"meta": _changes(a[0], b[0])}
+        for tier in TIERS:
+            old, new = a[1][tier], b[1][tier]
+            out[tier] = {"added":   [new[i] for i in new if i not in old],
+                         "removed": [old[i] for i in old if i not in new],
+                         "changed": {i: c for i in new if i in old and (c := _changes(old[i], new[i]))}}
+        return out
+
+
+def _as_stored(tier: str, entry: Dict) -> Dict:
+    """`entry` the way Store.load returns it: every tier field, list fields as lists, extras."""
+    fields = TIER_FIELDS[tier]
+    row = {"_id": entry["_id"]}
+    for f in fields:
+        row[f] = list(entry.get(f) or ()) if f in LIST_FIELDS else entry.get(f)
+    row.update((k, v) for k, v in entry.items() if k != "_id" and k not in fields)
+    return row
+
+
+def rows_delta(tier: str, put: Iterable[Dict] = (), delete: Iterable[str] = ()) -> Delta:
+    """Delta for whole-row writes / deletions in one tier."""
+    return {"put": {tier: {e["_id"]: _as_stored(tier, e) for e in put}}, "delete": {tier: list(delete)}}
@@ -0,0 +1,191 @@
+"""
+Master-workbook reload
+----------------------
+* sidecar `<workbook>.cache.arrow` – the HEADERS rows as strings, sorted by
+  supplier, memory-mapped on read (slicing one vendor is zero-copy)
+* sidecar `<workbook>.index.json` – (registered e-mail, normalised
+  "Supplier Name") → [start, stop) row range into the cache, and registered
+  e-mail → supplier name from the workbook's SUPPLIERS_SHEET (maintained by
+  PMI); a login is only ever matched through its verified e-mail
+* a row's e-mail is its EMAIL_COL cell (written after HEADERS by the
+  export); a row without one – PMI's own layout – belongs to the e-mail
+  registered for its supplier name only while that is the one e-mail
+  registered for it, so two logins sharing a supplier name never get each
+  other's rows
+* the workbook itself is only ever read – saves go to the store and its
+  rolling export (session.EXPORT_PATH), never back into it
+* both carry the workbook's (mtime, size) fingerprint; a stale or missing
+  sidecar is rebuilt with one full read of the workbook, after which every
+  lookup costs milliseconds
+* `rows_to_vendor()` reverses schema.TIER_COLUMNS back into vendor_data
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+from .schema import HEADERS, META_COLUMNS, NUMERIC_FIELDS, TIER_COLUMNS, TIERS
+
+NAME_COL = 3                                # position in HEADERS
+SUPPLIERS_SHEET = "Suppliers"
+SUPPLIERS_COLUMNS = ["Registered Email ID", "Supplier Name"]
+EMAIL_COL = SUPPLIERS_COLUMNS[0]            # optional main-sheet column after HEADERS
+
+VendorState = Tuple[Dict, Dict[str, List[Dict]]]
+
+
+def _norm(name: object) -> str:
+    return re.sub(r"\s+", " ", str(name)).strip().casefold()
+
+
+def _email(address: object) -> str:
+    return str(address).strip().lower()      # = session.vendor_id()
+
+
+def _fingerprint(path: str) -> List[int]:
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  Sidecar build
+# ──────────────────────────────────────────────────────────────────────────────
+def write_sidecar(frame: pd.DataFrame, workbook: str, suppliers: Dict[str, str],
+                  emails: Optional[Sequence[str]] = None) -> None:
+    """Index `frame` (HEADERS columns, by position) as the sidecar of `workbook`.
+
+    Rows are stored as strings sorted by (e-mail, supplier); `suppliers` maps
+    registered e-mail → supplier name (SUPPLIERS_SHEET), `emails` is each
+    row's EMAIL_COL cell if the sheet has that column.
+    """
+    frame = frame.copy()
+    frame.columns = [str(i) for i in range(len(HEADERS))]
+    table = pa.Table.from_pandas(frame.fillna("").astype(str), preserve_index=False)
+    names = [_norm(v) for v in table.column(str(NAME_COL)).to_pylist()]
+    by_email = {_email(e): _norm(n) for e, n in suppliers.items() if _email(e) and _norm(n)}
+    registered = defaultdict(list)
+    for email, name in by_email.items():
+        registered[name].append(email)
+    owners = [_email(e) if isinstance(e, str) else "" for e in (emails if emails is not None else [""] * len(names))]
+    keys = [(owner or (registered[name][0] if len(registered[name]) == 1 else ""), name)  # shared name → nobody's
+            for owner, name in zip(owners, names)]
+    order = sorted(range(len(keys)), key=keys.__getitem__)         # stable
+    table = table.take(pa.array(order, pa.int64()))
+    keys = [keys[i] for i in order]
+
+    starts = [i for i in range(len(keys)) if i == 0 or keys[i] != keys[i - 1]]
+    by_vendor: Dict[str, Dict[str, List[int]]] = defaultdict(dict)
+    for a, b in zip(starts, starts[1:] + [len(keys)]):
+        email, name = keys[a]
+        by_vendor[email][name] = [a, b]
+
+    cache, index = workbook + ".cache.arrow", workbook + ".index.json"
+    with pa.OSFile(cache + ".tmp", "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(cache + ".tmp", cache)
+    with open(index + ".tmp", "w", encoding="utf-8") as fh:
+        json.dump({"fingerprint": _fingerprint(workbook), "by_vendor": by_vendor, "by_email": by_email}, fh)
+    os.replace(index + ".tmp", index)       # index last: it validates the cache
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  Reverse mapping
+# ──────────────────────────────────────────────────────────────────────────────
+def rows_to_vendor(rows: pd.DataFrame) -> VendorState:
+    """HEADERS rows (columns "0".."40", strings) → (vendor_meta, vendor_data)."""
+    if rows.empty:
+        return {}, {}
+    first = rows.iloc[0]
+    meta = {field: first[str(i)] for i, field in META_COLUMNS}
+    try:
+        meta["total_volume_2024"] = float(meta["total_volume_2024"])
+    except ValueError:
+        pass
+
+    data: Dict[str, List[Dict]] = {}
+    claimed = pd.Series(False, index=rows.index)
+    for tier in TIERS:                      # a row belongs to the tier whose location it fills
+        cols = TIER_COLUMNS[tier]
+        country = next(str(i) for i, field, _ in cols if field == "country")
+        mask = (rows[country] != "") & ~claimed
+        if not mask.any():
+            continue
+        claimed |= mask
+        block = rows.loc[mask, [str(i) for i, _, _ in cols]]
+        block.columns = [field for _, field, _ in cols]
+        for field in NUMERIC_FIELDS.intersection(block.columns):
+            block[field] = pd.to_numeric(block[field], errors="coerce").fillna(0.0)
+        entries = block.to_dict("records")
+        for entry in entries:
+            entry["_id"] = uuid.uuid4().hex
+        data[tier] = entries
+    return meta, data
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  Lookup
+# ──────────────────────────────────────────────────────────────────────────────
+class MasterIndex:
+    def __init__(self, workbook: str):
+        self.workbook = workbook
+        self._lock = threading.Lock()
+        self._index: Optional[Dict] = None
+        self._table: Optional[pa.Table] = None
+
+    def _fresh(self) -> bool:
+        return (self._index is not None and "by_vendor" in self._index      # older index → rebuild
+                and self._index["fingerprint"] == _fingerprint(self.workbook))
+
+    def _open(self) -> None:
+        index_path = self.workbook + ".index.json"
+        if os.path.exists(index_path):
+            with open(index_path, encoding="utf-8") as fh:
+                self._index = json.load(fh)
+        if not self._fresh():               # foreign or edited workbook → one full read
+            with pd.ExcelFile(self.workbook, engine="openpyxl") as book:
+                frame = book.parse(0, header=0, dtype=str)
+                logins = (book.parse(SUPPLIERS_SHEET, dtype=str).fillna("")
+                          if SUPPLIERS_SHEET in book.sheet_names else pd.DataFrame(columns=SUPPLIERS_COLUMNS))
+            suppliers = dict(zip(logins.iloc[:, 0], logins.iloc[:, 1])) if logins.shape[1] >= 2 else {}
+            emails = (frame.iloc[:, len(HEADERS)].tolist()
+                      if frame.shape[1] > len(HEADERS) and str(frame.columns[len(HEADERS)]) == EMAIL_COL else None)
+            write_sidecar(frame.iloc[:, :len(HEADERS)], self.workbook, suppliers, emails)
+            with open(index_path, encoding="utf-8") as fh:
+                self._index = json.load(fh)
+        source = pa.memory_map(self.workbook + ".cache.arrow", "r")
+        self._table = pa.ipc.open_file(source).read_all()
+
+    def _lookup(self, email: str) -> Tuple[Optional[List[int]], Optional[pa.Table]]:
+        with self._lock:
+            if not os.path.exists(self.workbook):
+                return None, None
+            if not self._fresh():
+                self._open()
+            email = _email(email)
+            name = self._index["by_email"].get(email)
+            return (self._index["by_vendor"].get(email, {}).get(name) if name else None), self._table
+
+    def load(self, email: str) -> VendorState:
+        span, table = self._lookup(email)    # table taken under the lock: a rebuild swaps it
+        if not span:
+            return {}, {}
+        a, b = span
+        return rows_to_vendor(table.slice(a, b - a).to_pandas())
+
+
+_INDEXES: Dict[str, MasterIndex] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def master_index(workbook: str) -> MasterIndex:
+    with _REGISTRY_LOCK:
+        return _INDEXES.setdefault(workbook, MasterIndex(workbook))
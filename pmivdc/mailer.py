@@ -0,0 +1,307 @@
+"""
+Outbound mail queue (asyncio, off the script thread)
+----------------------------------------------------
+* `Mailer.submit()` is thread-safe and returns at once with a
+  concurrent.futures.Future; the Streamlit script never waits on SMTP
+* an asyncio loop on one daemon thread runs WORKERS consumers; each takes a
+  batch (up to BATCH_SIZE messages, or whatever arrived within BATCH_WAIT)
+  and sends it over a single SMTP connection in the loop's executor –
+  smtplib blocks, the loop does not
+* a token bucket (RATE messages / s, BURST deep) keeps a login spike at a
+  questionnaire deadline under the relay's limits
+* transient failures (connection errors, 4xx) are retried with exponential
+  backoff up to RETRIES times; 5xx / refused recipients fail at once
+* `LocalSMTP` is a minimal SMTP stand-in (asyncio server, messages kept in
+  memory) for development: `python -m pmivdc.mailer` listens on :1025
+
+Configured from PMIVDC_SMTP_HOST / _PORT / _USER / _PASSWORD / _FROM /
+_STARTTLS; without a host there is no mailer (`get_mailer()` is None) and
+the login page stays in demo mode.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import logging
+import os
+import smtplib
+import threading
+from email.message import EmailMessage
+from typing import Callable, Dict, List, Optional
+
+log = logging.getLogger(__name__)
+
+RATE, BURST  = 10.0, 20
+BATCH_SIZE   = 50
+BATCH_WAIT   = 0.05                     # seconds to let a batch fill
+RETRIES      = 3
+BACKOFF      = 1.0                      # seconds, doubled per retry
+WORKERS      = 2
+
+Transport = Callable[[List[EmailMessage]], List[Optional[Exception]]]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  SMTP transport
+# ──────────────────────────────────────────────────────────────────────────────
+def _transient(exc: Exception) -> bool:
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return False
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    return isinstance(exc, (smtplib.SMTPException, OSError))
+
+
+class SmtpTransport:
+    def __init__(self, host: str, port: int = 25, user: str = "", password: str = "",
+                 starttls: bool = False, timeout: float = 30.0):
+        self.host, self.port, self.user, self.password = host, port, user, password
+        self.starttls, self.timeout = starttls, timeout
+
+    def __call__(self, batch: List[EmailMessage]) -> List[Optional[Exception]]:
+        """Send `batch` over one connection; one result (None = sent) per message."""
+        try:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        except OSError as exc:
+            return [exc] * len(batch)
+        results: List[Optional[Exception]] = []
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.user:
+                smtp.login(self.user, self.password)
+            for msg in batch:
+                try:
+                    smtp.send_message(msg)
+                    results.append(None)
+                except (smtplib.SMTPException, OSError) as exc:
+                    results.append(exc)
+                    if isinstance(exc, smtplib.SMTPServerDisconnected):
+                        break
+        except (smtplib.SMTPException, OSError) as exc:
+            results.append(exc)
+        finally:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+        results += [results[-1]] * (len(batch) - len(results))  # rest of a broken batch
+        return results
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  Queue
+# ──────────────────────────────────────────────────────────────────────────────
+class _Outgoing:
+    __slots__ = ("to", "subject", "body", "msg", "future", "attempts")
+
+    def __init__(self, to: str, subject: str, body: str, future: concurrent.futures.Future):
+        self.to, self.subject, self.body, self.future = to, subject, body, future
+        self.msg: Optional[EmailMessage] = None
+        self.attempts = 0
+
+    def message(self, sender: str) -> EmailMessage:
+        if self.msg is None:                # built on the mail thread, not the script's
+            self.msg = EmailMessage()
+            self.msg["From"], self.msg["To"], self.msg["Subject"] = sender, self.to, self.subject
+            self.msg.set_content(self.body)
+        return self.msg
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate, self.burst = rate, burst
+        self.tokens, self.stamp = float(burst), None
+
+    async def take(self, n: int) -> None:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self.stamp is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        self.tokens -= n                    # may go negative: the debt is slept off
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+class Mailer:
+    def __init__(self, transport: Transport, sender: str, rate: float = RATE, burst: int = BURST,
+                 batch_size: int = BATCH_SIZE, batch_wait: float = BATCH_WAIT, retries: int = RETRIES,
+                 backoff: float = BACKOFF, workers: int = WORKERS):
+        self.transport, self.sender = transport, sender
+        self.batch_size, self.batch_wait = batch_size, batch_wait
+        self.retries, self.backoff, self.workers = retries, backoff, workers
+        self._bucket = _TokenBucket(rate, burst)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {"queued": 0, "sent": 0, "retried": 0, "failed": 0}
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                ready = threading.Event()
+
+                def run() -> None:
+                    loop = asyncio.new_event_loop()
+                    asyncio.set_event_loop(loop)
+                    self._queue = asyncio.Queue()
+                    for _ in range(self.workers):
+                        loop.create_task(self._worker())
+                    self._loop = loop
+                    ready.set()
+                    loop.run_forever()
+                threading.Thread(target=run, name="mailer", daemon=True).start()
+                ready.wait()
+            return self._loop
+
+    def submit(self, to: str, subject: str, body: str) -> concurrent.futures.Future:
+        """Queue one plain-text mail; the future resolves once it is sent (or given up)."""
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        loop = self._start()
+        with self._lock:
+            self.counts["queued"] += 1
+        loop.call_soon_threadsafe(self._queue.put_nowait, _Outgoing(to, subject, body, future))
+        return future
+
+    async def _batch(self) -> List[_Outgoing]:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.batch_wait
+        while len(batch) < self.batch_size:
+            left = deadline - self._loop.time()
+            if left <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), left))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self) -> None:
+        while True:
+            batch = await self._batch()
+            await self._bucket.take(len(batch))
+            try:
+                messages = [o.message(self.sender) for o in batch]
+                results = await self._loop.run_in_executor(None, self.transport, messages)
+            except Exception as exc:        # a transport bug must not kill the worker
+                log.exception("mail transport failed")
+                results = [exc] * len(batch)
+            for out, error in zip(batch, results):
+                if error is None:
+                    self.counts["sent"] += 1
+                    out.future.set_result(None)
+                elif _transient(error) and out.attempts < self.retries:
+                    out.attempts += 1
+                    self.counts["retried"] += 1
+                    self._loop.call_later(self.backoff * 2 ** (out.attempts - 1), self._queue.put_nowait, out)
+                else:
+                    self.counts["failed"] += 1
+                    log.warning("mail to %s not sent: %s", out.to, error)
+                    out.future.set_exception(error)
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+
+_MAILER: Optional[Mailer] = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_mailer() -> Optional[Mailer]:
+    """The process-wide mailer from PMIVDC_SMTP_*; None when no host is configured."""
+    global _MAILER
+    host = os.environ.get("PMIVDC_SMTP_HOST")
+    if not host:
+        return None
+    with _REGISTRY_LOCK:
+        if _MAILER is None:
+            env = lambda name, default="": os.environ.get(f"PMIVDC_SMTP_{name}", default)
+            transport = SmtpTransport(host, int(env("PORT", "25")), env("USER"), env("PASSWORD"),
+                                      env("STARTTLS", "0") == "1")
+            _MAILER = Mailer(transport, env("FROM", "no-reply@pmivdc.local"))
+        return _MAILER
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  Local SMTP stand-in
+# ──────────────────────────────────────────────────────────────────────────────
+class LocalSMTP:
+    """Accepts any mail and keeps it in `messages`; `fail_first` answers 451 that many times."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, fail_first: int = 0,
+                 on_message: Optional[Callable[[Dict], None]] = None):
+        self.host, self.port, self.fail_first = host, port, fail_first
+        self.on_message = on_message
+        self.messages: List[Dict] = []
+        self.connections = 0
+
+    async def _session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        reply = lambda text: writer.write(f"{text}\r\n".encode())
+        reply("220 pmivdc local smtp")
+        sender, rcpts = "", []
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            verb = line.decode("utf-8", "replace").strip().split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                reply("250 localhost")
+            elif verb == "MAIL":
+                if self.fail_first > 0:
+                    self.fail_first -= 1
+                    reply("451 try again later")
+                else:
+                    sender, rcpts = line.decode().split(":", 1)[1].strip(), []
+                    reply("250 ok")
+            elif verb == "RCPT":
+                rcpts.append(line.decode().split(":", 1)[1].strip())
+                reply("250 ok")
+            elif verb == "DATA":
+                reply("354 end with <CRLF>.<CRLF>")
+                await writer.drain()
+                data = []
+                while (chunk := await reader.readline()) not in (b".\r\n", b""):
+                    data.append(chunk[1:] if chunk.startswith(b"..") else chunk)
+                message = {"from": sender, "to": rcpts, "data": b"".join(data).decode("utf-8", "replace")}
+                self.messages.append(message)
+                if self.on_message:
+                    self.on_message(message)
+                reply("250 queued")
+            elif verb in ("RSET", "NOOP"):
+                sender, rcpts = ("", []) if verb == "RSET" else (sender, rcpts)
+                reply("250 ok")
+            elif verb == "QUIT":
+                reply("221 bye")
+                await writer.drain()
+                break
+            else:
+                reply("502 not implemented")
+            await writer.drain()
+        writer.close()
+
+    def start(self) -> int:
+        """Serve from a daemon thread; returns the bound port."""
+        ready = threading.Event()
+
+        def run() -> None:
+            loop = asyncio.new_event_loop()
+            server = loop.run_until_complete(asyncio.start_server(self._session, self.host, self.port))
+            self.port = server.sockets[0].getsockname()[1]
+            ready.set()
+            loop.run_forever()
+        threading.Thread(target=run, name="local-smtp", daemon=True).start()
+        ready.wait()
+        return self.port
+
+
+if __name__ == "__main__":
+    import time
+
+    server = LocalSMTP(port=int(os.environ.get("PMIVDC_SMTP_PORT", 1025)),
+                       on_message=lambda m: print(f"── to {', '.join(m['to'])}\n{m['data']}", flush=True))
+    print(f"local SMTP stand-in on 127.0.0.1:{server.start()} (Ctrl-C to stop)")
+    while True:
+        time.sleep(3600)
@@ -0,0 +1,222 @@
+"""
+In-process latency / volume metrics
+-----------------------------------
+* `Histogram` – fixed buckets (Prometheus style: cumulative `le` bounds,
+  `_sum`, `_count`); p50 / p95 / p99 are interpolated inside the bucket the
+  rank falls in, the way `histogram_quantile()` does
+* `REGISTRY.timer(name, **labels)` / `REGISTRY.timed(name)` /
+  `REGISTRY.wrap(name, fn)` – the hooks; while `REGISTRY.enabled` is False
+  they hand back a shared no-op context manager / the function itself, so a
+  disabled hook costs one attribute check
+* `REGISTRY.gauge(name, read)` – a value sampled by calling `read()` when
+  the metrics are rendered (resident sessions, their bytes), nothing on the
+  hot path
+* `REGISTRY.render()` – Prometheus text exposition format; `write_every()`
+  keeps a textfile (node_exporter textfile collector) current from a daemon
+  thread, written atomically
+
+Switched by PMIVDC_METRICS ("0" = off) at start-up only – a deploy-time
+setting, not changed at run time.  Pure Python, no imports beyond the
+standard library.
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextlib
+import functools
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# seconds: 1 ms … 60 s, roughly ×2.5 per step
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+ROW_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+BYTE_BUCKETS = (1 << 10, 1 << 14, 1 << 17, 1 << 20, 1 << 23, 1 << 26, 1 << 29)
+QUANTILES = (0.5, 0.95, 0.99)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_HELP = {
+    "pmivdc_route_seconds":  ("Page function wall time per route", TIME_BUCKETS),
+    "pmivdc_op_seconds":     ("Persistence / upload operation wall time", TIME_BUCKETS),
+    "pmivdc_rows_written":   ("Rows written per save", ROW_BUCKETS),
+    "pmivdc_upload_bytes":   ("Size of uploaded files", BYTE_BUCKETS),
+}
+_GAUGES = {                                         # name → (help, Prometheus type)
+    "pmivdc_sessions_resident":        ("Vendor sessions held in memory", "gauge"),
+    "pmivdc_session_bytes":            ("Approximate size of the resident session data", "gauge"),
+    "pmivdc_sessions_spilled_total":   ("Idle sessions dropped from memory", "counter"),
+    "pmivdc_sessions_reloaded_total":  ("Spilled sessions reloaded from the store", "counter"),
+}
+
+
+class Histogram:
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)       # last slot = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return float("nan")
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                if i == len(self.bounds):           # beyond the last bound: best guess is that bound
+                    return self.bounds[-1]
+                lo = self.bounds[i - 1] if i else 0.0
+                return lo + (self.bounds[i] - lo) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+
+class _Timer:
+    __slots__ = ("registry", "key", "start")
+
+    def __init__(self, registry: "Registry", key: Tuple[str, Labels]):
+        self.registry, self.key = registry, key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):                       # rerun / stop exceptions are timed too
+        self.registry._observe(self.key, time.perf_counter() - self.start)
+        return False
+
+
+_OFF = contextlib.nullcontext()
+
+
+class Registry:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._hist: Dict[Tuple[str, Labels], Histogram] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+
+    # ── hooks ────────────────────────────────────────────────────────────────
+    def _observe(self, key: Tuple[str, Labels], value: float) -> None:
+        with self._lock:
+            hist = self._hist.get(key)
+            if hist is None:
+                hist = self._hist[key] = Histogram(_HELP[key[0]][1])
+            hist.observe(value)
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        if self.enabled:
+            self._observe((name, tuple(sorted(labels.items()))), value)
+
+    def timer(self, name: str, **labels: str):
+        """`with REGISTRY.timer("pmivdc_op_seconds", op="excel_write"): …`"""
+        if not self.enabled:
+            return _OFF
+        return _Timer(self, (name, tuple(sorted(labels.items()))))
+
+    def timed(self, name: str, **labels: str) -> Callable[[Callable], Callable]:
+        """Decorator form of `timer`; the enabled check happens per call."""
+        def decorate(fn: Callable) -> Callable:
+            key = (name, tuple(sorted(labels.items())))
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with _Timer(self, key):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def wrap(self, name: str, fn: Callable, **labels: str) -> Callable:
+        """`fn` timed under `labels` – or `fn` itself while disabled."""
+        return self.timed(name, **labels)(fn) if self.enabled else fn
+
+    def gauge(self, name: str, read: Callable[[], float]) -> None:
+        """Report `read()` as `name` whenever the metrics are read; registered once, at import."""
+        with self._lock:
+            self._gauges[name] = read
+
+    # ── read side ────────────────────────────────────────────────────────────
+    def gauges(self) -> Dict[str, float]:
+        with self._lock:
+            reads = sorted(self._gauges.items())
+        return {name: read() for name, read in reads}   # outside the lock: `read` may take its own
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hist.clear()
+
+    def _items(self) -> List[Tuple[str, Labels, Histogram]]:
+        with self._lock:                            # copy: render outside the lock
+            out = []
+            for (name, labels), hist in sorted(self._hist.items()):
+                copy = Histogram(hist.bounds)
+                copy.counts, copy.sum, copy.count = list(hist.counts), hist.sum, hist.count
+                out.append((name, labels, copy))
+            return out
+
+    def summary(self) -> List[Dict]:
+        """One row per series: name, labels, count, mean and the QUANTILES."""
+        rows = []
+        for name, labels, hist in self._items():
+            row = {"metric": name, **dict(labels), "count": hist.count,
+                   "mean": hist.sum / hist.count if hist.count else float("nan")}
+            row.update({f"p{int(q * 100)}": hist.quantile(q) for q in QUANTILES})
+            rows.append(row)
+        return rows
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        seen = set()
+        for name, labels, hist in self._items():
+            if name not in seen:
+                seen.add(name)
+                lines += [f"# HELP {name} {_HELP[name][0]}", f"# TYPE {name} histogram"]
+            base = ",".join(f'{k}="{v}"' for k, v in labels)
+            sep = "," if base else ""
+            running = 0
+            for bound, n in zip((*hist.bounds, "+Inf"), hist.counts):
+                running += n
+                lines.append(f'{name}_bucket{{{base}{sep}le="{bound}"}} {running}')
+            lines.append(f"{name}_sum{{{base}}} {hist.sum:.6f}" if base else f"{name}_sum {hist.sum:.6f}")
+            lines.append(f"{name}_count{{{base}}} {hist.count}" if base else f"{name}_count {hist.count}")
+        for name, value in self.gauges().items():
+            lines += [f"# HELP {name} {_GAUGES[name][0]}", f"# TYPE {name} {_GAUGES[name][1]}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(self.render())
+        os.replace(tmp, path)                       # scrapers never see a half-written file
+
+    def write_every(self, path: str, seconds: float = 15.0) -> None:
+        """Keep `path` current from a daemon thread (started once; skips while disabled)."""
+        with self._lock:
+            if self._writer is not None:
+                return
+
+            def loop() -> None:
+                while True:
+                    time.sleep(seconds)
+                    if self.enabled and (self._hist or self._gauges):
+                        try:
+                            self.write(path)
+                        except OSError:
+                            pass                    # unwritable data dir: metrics stay in-process
+            self._writer = threading.Thread(target=loop, name="metrics-writer", daemon=True)
+            self._writer.start()
+
+
+REGISTRY = Registry(enabled=os.environ.get("PMIVDC_METRICS", "1") != "0")
+
@@ -0,0 +1,217 @@
+"""
+Streaming late-risk scoring of open-PO extracts
+-----------------------------------------------
+* pass 1 reads only `LeadTime` in chunks (downcast to float32) and keeps the
+  running count / sum / max the normalisation needs
+* pass 2 re-reads the file chunk by chunk, scores `LateRisk% = LeadTime /
+  max × 100`, appends every scored chunk to `<out_dir>/<sha256>.scored.csv`
+  (pyarrow's streaming CSV writer) and keeps only the top-K rows (argpartition per chunk, merged into the
+  running K candidates) – memory stays O(chunk + K) whatever the file size
+* results are keyed by the file's SHA-256 alone: the same extract uploaded
+  again reuses the scored file on disk, whatever K is asked for (the run
+  keeps the TOP_MAX riskiest rows, each caller gets its first K);
+  concurrent uploads of one extract wait on a single run (per-digest
+  future, no global lock held), so one file has one writer
+* CACHE_SIZE results stay in memory; scored files beyond the newest
+  KEEP_FILES are pruned unless a live result (cached, or held by a rendered
+  download button) still points at them
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import BinaryIO, Dict, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from .forecast import file_digest
+
+CHUNK_ROWS = 250_000
+LEAD_COL, RISK_COL = "LeadTime", "LateRisk%"
+
+
+class Scored:
+    def __init__(self, path: str, rows: int, stats: Dict[str, float], top: pd.DataFrame):
+        self.path, self.rows, self.stats, self.top = path, rows, stats, top
+
+    def head(self, k: int) -> "Scored":
+        return Scored(self.path, self.rows, self.stats, self.top.head(k))
+
+    def read_bytes(self) -> bytes:
+        """The scored CSV (while this result is alive its file is never pruned)."""
+        with open(self.path, "rb") as fh:
+            return fh.read()
+
+
+def _lead(chunk: pd.DataFrame) -> np.ndarray:
+    return pd.to_numeric(chunk[LEAD_COL], errors="coerce", downcast="float").to_numpy(np.float32)
+
+
+def _top(frame: pd.DataFrame, k: int) -> pd.DataFrame:
+    frame = frame[frame[RISK_COL].notna()]
+    if len(frame) <= k:
+        return frame
+    keep = np.argpartition(-frame[RISK_COL].to_numpy(), k - 1)[:k]
+    return frame.iloc[np.sort(keep)]
+
+
+def _ranked(top: Optional[pd.DataFrame]) -> pd.DataFrame:
+    if top is None:
+        return pd.DataFrame()
+    return top.sort_values(RISK_COL, ascending=False, kind="stable").reset_index(drop=True)
+
+
+def score_orders(stream: BinaryIO, out_path: str, k: int = 20,
+                 chunk_rows: int = CHUNK_ROWS) -> Scored:
+    stream.seek(0)
+    if LEAD_COL not in pd.read_csv(stream, nrows=0).columns:
+        raise ValueError(f"no {LEAD_COL} column")
+
+    # ── pass 1: running statistics ──────────────────────────────────────────
+    stream.seek(0)
+    rows, valid, total, peak = 0, 0, 0.0, 0.0
+    for chunk in pd.read_csv(stream, usecols=[LEAD_COL], chunksize=chunk_rows):
+        lead = _lead(chunk)
+        rows += len(lead)
+        lead = lead[~np.isnan(lead)]
+        valid += len(lead)
+        total += float(lead.sum(dtype=np.float64))
+        peak = max(peak, float(lead.max())) if len(lead) else peak
+
+    # ── pass 2: score, spill, keep top-K ────────────────────────────────────
+    stream.seek(0)
+    top: Optional[pd.DataFrame] = None
+    tmp = out_path + ".tmp"
+    writer = None
+    try:                                    # pass-through columns stay text: one stable schema
+        for chunk in pd.read_csv(stream, chunksize=chunk_rows, dtype="string[pyarrow]"):
+            risk = np.clip(_lead(chunk) / peak, 0, 1) * 100 if peak > 0 else np.zeros(len(chunk))
+            chunk[RISK_COL] = np.round(risk.astype(np.float64), 1)
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pacsv.CSVWriter(tmp, table.schema)
+            writer.write_table(table)
+            top = _top(chunk if top is None else pd.concat([top, chunk]), k)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:                      # header-only input
+        pd.DataFrame(columns=[LEAD_COL, RISK_COL]).to_csv(tmp, index=False)
+    os.replace(tmp, out_path)
+
+    stats = {"rows": rows, "scored": valid, "max_lead": peak,
+             "mean_lead": total / valid if valid else 0.0}
+    return Scored(out_path, rows, stats, _ranked(top))
+
+
+CACHE_SIZE  = 32                            # Scored results kept in memory (LRU)
+KEEP_FILES  = int(os.environ.get("PMIVDC_ORDERS_KEEP", "20"))     # scored extracts kept on disk
+TOP_MAX     = 1000                          # largest K a caller may ask for
+
+_LOCK = threading.Lock()                    # guards the registries only, never a scoring run
+_RESULTS: "OrderedDict[str, Scored]" = OrderedDict()
+_RUNNING: Dict[str, Future] = {}
+_LIVE: "weakref.WeakSet[Scored]" = weakref.WeakSet()      # every result handed out and not yet freed
+
+
+def _load_or_score(stream: BinaryIO, digest: str, out_dir: str, k: int) -> Scored:
+    path = os.path.join(out_dir, digest + ".scored.csv")
+    meta_path = os.path.join(out_dir, digest + ".json")
+    os.makedirs(out_dir, exist_ok=True)
+    if os.path.exists(path) and os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as fh:
+            stats = json.load(fh)
+        top = None
+        for chunk in pd.read_csv(path, chunksize=CHUNK_ROWS, dtype="string[pyarrow]"):
+            chunk[RISK_COL] = pd.to_numeric(chunk[RISK_COL], errors="coerce")
+            top = _top(chunk if top is None else pd.concat([top, chunk]), k)
+        for p in (path, meta_path):         # recently used → last to be pruned
+            os.utime(p)
+        return Scored(path, stats["rows"], stats, _ranked(top))
+    result = score_orders(stream, path, k)
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as fh:
+        json.dump(result.stats, fh)
+    os.replace(meta_path + ".tmp", meta_path)
+    return result
+
+
+def _prune(out_dir: str, keep: str) -> None:
+    """Delete all but the KEEP_FILES most recently used scored extracts.
+
+    Never `keep`, an extract being scored or one a live result points at.
+    """
+    with _LOCK:
+        pinned = {keep, *_RUNNING, *(os.path.basename(r.path)[:-len(".scored.csv")] for r in list(_LIVE))}
+    scored = []
+    for name in os.listdir(out_dir):
+        if name.endswith(".scored.csv"):
+            try:
+                scored.append((os.path.getmtime(os.path.join(out_dir, name)), name[:-len(".scored.csv")]))
+            except OSError:
+                pass
+    stale = sorted(scored, reverse=True)[KEEP_FILES:]
+    for digest in (d for _, d in stale if d not in pinned):
+        for suffix in (".scored.csv", ".json"):
+            try:
+                os.remove(os.path.join(out_dir, digest + suffix))
+            except OSError:
+                pass
+
+
+def _view(result: Scored, k: int) -> Scored:
+    view = result.head(k)
+    with _LOCK:
+        _LIVE.add(view)
+    return view
+
+
+def score_cached(stream: BinaryIO, out_dir: str, k: int = 20) -> Scored:
+    """`score_orders` keyed by the upload's digest; the `k` (≤ TOP_MAX) riskiest rows.
+
+    A re-upload in the same process is a dict lookup; after a restart the
+    scored file on disk is scanned once for the top rows instead of
+    re-scoring.  Sessions uploading the same extract at once share one run,
+    whatever their `k`; different extracts score in parallel.
+    """
+    if not 0 < k <= TOP_MAX:
+        raise ValueError(f"k must be within 1–{TOP_MAX}")
+    digest = file_digest(stream)
+    with _LOCK:
+        hit = _RESULTS.get(digest)
+        if hit is not None and os.path.exists(hit.path):
+            _RESULTS.move_to_end(digest)
+            running, owner = None, False
+        else:
+            hit = None
+            running = _RUNNING.get(digest)
+            owner = running is None
+            if owner:
+                running = _RUNNING[digest] = Future()
+    if hit is not None:
+        return _view(hit, k)
+    if not owner:
+        return _view(running.result(), k)
+    try:
+        result = _load_or_score(stream, digest, out_dir, TOP_MAX)
+    except BaseException as exc:
+        with _LOCK:
+            del _RUNNING[digest]
+        running.set_exception(exc)
+        raise
+    with _LOCK:
+        _RESULTS[digest] = result
+        _LIVE.add(result)
+        while len(_RESULTS) > CACHE_SIZE:
+            _RESULTS.popitem(last=False)
+        del _RUNNING[digest]
+    running.set_result(result)
+    _prune(out_dir, keep=digest)
+    return _view(result, k)
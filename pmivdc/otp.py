@@ -0,0 +1,124 @@
+"""
+One-time login codes, shared by every session of the server process
+-------------------------------------------------------------------
+* codes are kept only as an HMAC (per-process random key) – never in
+  session state, never in clear
+* every code expires TTL seconds after it was issued and is burnt after
+  MAX_ATTEMPTS wrong guesses; a new code for the same address replaces the
+  old one, and not more than once per COOLDOWN seconds
+* the table is split into SHARDS dicts, each with its own lock, so logins
+  for different addresses rarely wait on each other; each shard is an
+  insertion-ordered dict, i.e. ordered by expiry – expired entries are
+  trimmed from the front on every issue, and past CAPACITY the oldest live
+  entries go too (memory stays bounded whatever the login rate)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+TTL          = int(os.environ.get("PMIVDC_OTP_TTL", 600))      # seconds
+MAX_ATTEMPTS = 5
+COOLDOWN     = 30                                               # seconds between codes per address
+CAPACITY     = 100_000                                          # live codes, all shards
+SHARDS       = 16
+ALPHABET     = "abcdefghjkmnpqrstuvwxyz23456789"                # no 0/o, 1/l/i look-alikes
+LENGTH       = 6
+
+OK, INVALID, EXPIRED, LOCKED, MISSING = "ok", "invalid", "expired", "locked", "missing"
+
+
+def _key(email: str) -> str:
+    return (email or "").strip().lower()
+
+
+class _Entry:
+    __slots__ = ("digest", "issued", "expires", "attempts")
+
+    def __init__(self, digest: bytes, issued: float, expires: float):
+        self.digest, self.issued, self.expires, self.attempts = digest, issued, expires, 0
+
+
+class OtpStore:
+    def __init__(self, ttl: float = TTL, max_attempts: int = MAX_ATTEMPTS, cooldown: float = COOLDOWN,
+                 capacity: int = CAPACITY, shards: int = SHARDS):
+        self.ttl, self.max_attempts, self.cooldown = ttl, max_attempts, cooldown
+        self._per_shard = max(1, capacity // shards)
+        self._secret = secrets.token_bytes(32)
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+
+    def _hash(self, email: str, code: str) -> bytes:
+        return hmac.new(self._secret, f"{email}\0{code.strip().lower()}".encode(), hashlib.sha256).digest()
+
+    def _shard(self, email: str) -> Tuple[threading.Lock, "OrderedDict[str, _Entry]"]:
+        return self._shards[hash(email) % len(self._shards)]
+
+    @staticmethod
+    def _trim(table: "OrderedDict[str, _Entry]", now: float, limit: int) -> None:
+        while table:
+            email, entry = next(iter(table.items()))
+            if entry.expires > now and len(table) <= limit:
+                break
+            del table[email]
+
+    def issue(self, email: str) -> Optional[str]:
+        """A fresh code for `email`, or None while the previous one is inside COOLDOWN."""
+        email = _key(email)
+        now = time.monotonic()
+        lock, table = self._shard(email)
+        with lock:
+            old = table.get(email)
+            if old is not None and old.expires > now and now - old.issued < self.cooldown:
+                return None                         # also stops lock-out → re-issue → guess loops
+            code = "".join(secrets.choice(ALPHABET) for _ in range(LENGTH))
+            table.pop(email, None)                  # re-insert at the back: order = expiry
+            table[email] = _Entry(self._hash(email, code), now, now + self.ttl)
+            self._trim(table, now, self._per_shard)
+            return code
+
+    def verify(self, email: str, code: str) -> str:
+        """OK (and the code is consumed), INVALID, EXPIRED, LOCKED or MISSING."""
+        email = _key(email)
+        now = time.monotonic()
+        lock, table = self._shard(email)
+        with lock:
+            entry = table.get(email)
+            if entry is None:
+                return MISSING
+            if entry.expires <= now:
+                del table[email]
+                return EXPIRED
+            if entry.attempts >= self.max_attempts:
+                return LOCKED
+            if hmac.compare_digest(entry.digest, self._hash(email, code or "")):
+                del table[email]
+                return OK
+            entry.attempts += 1
+            return LOCKED if entry.attempts >= self.max_attempts else INVALID
+
+    def attempts_left(self, email: str) -> int:
+        lock, table = self._shard(_key(email))
+        with lock:
+            entry = table.get(_key(email))
+            return 0 if entry is None else max(0, self.max_attempts - entry.attempts)
+
+    def __len__(self) -> int:
+        return sum(len(table) for _, table in self._shards)
+
+    def stats(self) -> Dict[str, int]:
+        now, stored, live = time.monotonic(), 0, 0
+        for lock, table in self._shards:
+            with lock:
+                stored += len(table)
+                live += sum(1 for e in table.values() if e.expires > now)
+        return {"stored": stored, "live": live}
+
+
+OTPS = OtpStore()
@@ -0,0 +1,75 @@
+"""
+Lazy page registry
+------------------
+Routes are "module:function" specs; a page module (and the pandas /
+matplotlib it imports) is loaded the first time one of its routes is
+visited, then stays resolved for the lifetime of the server process.
+"""
+
+from __future__ import annotations
+
+import functools
+import importlib
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from ..metrics import REGISTRY
+
+Page = Callable[[], None]
+
+LAZY_ROUTES: Dict[str, Tuple[str, str, tuple]] = {
+    "t1":      ("tiers",     "page_t1",        ()),
+    "t2":      ("tiers",     "page_t2",        ()),
+    "t3":      ("tiers",     "page_t3",        ()),
+    "t4":      ("tiers",     "page_t4",        ()),
+    "view_t1": ("tiers",     "page_view_tier", ("t1", "T1 – Factory")),
+    "view_t2": ("tiers",     "page_view_tier", ("t2", "T2 – Board / Paper Mill")),
+    "view_t3": ("tiers",     "page_view_tier", ("t3", "T3 – Pulp-making")),
+    "view_t4": ("tiers",     "page_view_tier", ("t4", "T4 – Feedstock")),
+    "stats":   ("dashboard", "page_stats",     ()),
+    "demand":  ("planning",  "page_demand",    ()),
+    "waste":   ("planning",  "page_waste",     ()),
+    "orders":  ("planning",  "page_orders",    ()),
+    "geo":     ("screening", "page_geo",       ()),
+    "history": ("history",   "page_history",   ()),
+    "metrics": ("admin",     "page_metrics",   ()),
+    "cube":    ("admin",     "page_cube",      ()),
+}
+ADMIN_ROUTES = ("metrics", "cube")          # no nav button: opened with ?admin=<route>
+
+_RESOLVED: Dict[str, Page] = {}
+_LOCK = threading.Lock()
+
+
+def _resolve(route: str) -> Page:
+    page = _RESOLVED.get(route)
+    if page is None:
+        with _LOCK:
+            module, name, args = LAZY_ROUTES[route]
+            page = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+            if args:
+                page = functools.partial(page, *args)
+            _RESOLVED[route] = page
+    return page
+
+
+class Router:
+    """`ROUTER.get(route, default)` over eager (in-script) pages + LAZY_ROUTES."""
+
+    def __init__(self, eager: Dict[str, Page]):
+        self.eager = eager
+
+    def __contains__(self, route: str) -> bool:
+        return route in self.eager or route in LAZY_ROUTES
+
+    def get(self, route: str, default: Optional[Page] = None) -> Optional[Page]:
+        """The page for `route` (timed under pmivdc_route_seconds while metrics are on)."""
+        if route in self.eager:
+            page = self.eager[route]
+        elif route in LAZY_ROUTES:
+            page = _resolve(route)
+        else:                               # unknown routes share one series (bounded labels)
+            page, route = default, "(default)"
+        if page is None:
+            return None
+        return REGISTRY.wrap("pmivdc_route_seconds", page, route=route)
@@ -0,0 +1,76 @@
+"""
+Hidden admin pages (no nav button; opened with ?admin=<route> by an
+OTP-verified e-mail listed in PMIVDC_ADMINS).
+"""
+
+from __future__ import annotations
+
+import time
+
+import pandas as pd
+import streamlit as st
+
+from ..cube import DIMENSIONS, cube
+from ..metrics import REGISTRY
+from ..session import METRICS_PATH, require_admin, vendor_store
+
+_blank = lambda v: v or "–"
+
+def page_metrics():
+    require_admin()
+    st.header("⏱️ Metrics")
+    if not REGISTRY.enabled:
+        st.warning("Collection is off for this deployment (PMIVDC_METRICS=0).")
+    st.caption(f"Prometheus textfile: `{METRICS_PATH}` (rewritten every 15 s while enabled)")
+    gauges = REGISTRY.gauges()
+    for col, (name, value) in zip(st.columns(len(gauges) or 1), gauges.items()):
+        col.metric(name.removeprefix("pmivdc_"), f"{value:,}")
+
+    rows = REGISTRY.summary()
+    if not rows:
+        st.info("Nothing recorded yet.")
+    else:
+        table = pd.DataFrame(rows)
+        timing = table["metric"].str.endswith("_seconds")
+        for col in ("mean", "p50", "p95", "p99"):   # seconds → ms for the latency series
+            table[col] = table[col].where(~timing, table[col] * 1000).round(2)
+        for metric, part in table.groupby("metric", sort=False):
+            st.subheader(metric + (" (ms)" if metric.endswith("_seconds") else ""))
+            part = part.drop(columns=["metric"]).dropna(axis=1, how="all")
+            stats = ["count", "mean", "p50", "p95", "p99"]
+            st.dataframe(part[[c for c in part if c not in stats] + stats], hide_index=True)
+
+    text = REGISTRY.render()
+    c1, c2, c3 = st.columns(3)
+    c1.download_button("⬇ metrics.prom", data=text, file_name="metrics.prom", mime="text/plain")
+    if c2.button("🔄 Reset"):
+        REGISTRY.reset(); st.rerun()
+    if c3.button("⬅ Back"):
+        st.session_state["page"] = "main"; st.rerun()
+    with st.expander("Exposition text"):
+        st.code(text, language="text")
+
+def page_cube():
+    require_admin()
+    st.header("🧊 Certification coverage – all vendors")
+    cb = cube(vendor_store())                   # refreshes vendors changed since the last visit
+    by = st.multiselect("Group by", DIMENSIONS, default=["program", "tier"])
+    cols = st.columns(len(DIMENSIONS))
+    filters = {dim: col.multiselect(f"Filter {dim}", cb.members(dim), format_func=_blank, key=f"cube_{dim}")
+               for col, dim in zip(cols, DIMENSIONS)}
+
+    t = time.perf_counter()
+    result = cb.query(by, filters)
+    elapsed = (time.perf_counter() - t) * 1000
+    for dim in by:
+        result[dim] = result[dim].map(_blank)
+    st.dataframe(result, hide_index=True)
+    stats = cb.stats()
+    st.caption(f"{elapsed:.1f} ms · {stats['vendors']:,} vendors in {stats['rows']:,} partition rows · "
+               f"cache {stats['hits']:,} hits / {stats['misses']:,} misses · {stats['rebuilt']:,} partitions built")
+
+    c1, c2 = st.columns(2)
+    c1.download_button("⬇ coverage.csv", data=result.to_csv(index=False), file_name="coverage.csv",
+                       mime="text/csv")
+    if c2.button("⬅ Back"):
+        st.session_state["page"] = "main"; st.rerun()
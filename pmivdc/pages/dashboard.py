@@ -0,0 +1,93 @@
+"""
+📊 Statistics dashboard.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from .. import charts
+from ..session import vendor_stats, vendor_trace
+from ..trace import TOLERANCE
+
+def _draw_countries(fig, d):
+    ax = fig.subplots(); ax.barh(list(d), list(d.values()))
+    ax.set_title("Country-wise Operations", fontsize=3); ax.tick_params(labelsize=3); ax.invert_yaxis()
+
+def _draw_feedstock(fig, d):
+    ax = fig.subplots()
+    ax.pie(d, labels=["Virgin","Recycled"], autopct='%1.0f%%', startangle=90,
+           textprops={'fontsize':3}); ax.set_title("Feedstock (volume-weighted)", fontsize=3)
+
+def _draw_coverage(fig, d):
+    ax = fig.subplots()
+    ax.bar(d["tiers"], d["certified"], label='Certified')
+    ax.bar(d["tiers"], [100 - c for c in d["certified"]], bottom=d["certified"])
+    ax.set_title("Coverage", fontsize=5); ax.tick_params(labelsize=2); ax.legend(fontsize=2)
+
+def _draw_ontime(fig, d):
+    ax = fig.subplots(); ax.plot(d["x"], d["y"], marker='o')
+
+def page_stats():
+    st.markdown('<div class="blur">', unsafe_allow_html=True)
+    st.header("📊 Statistics Dashboard")
+    stats = vendor_stats()
+
+    country_counts = stats.country_counts()
+    st.subheader("1️⃣ Country-wise Operations")
+    if not country_counts:
+        st.info("No entries yet.")
+    else:
+        st.image(charts.render("countries", country_counts, _draw_countries, figsize=(1,1)), width="stretch")
+
+    st.subheader("2️⃣ Feedstock Composition")
+    virgin, recycled = stats.composition()
+    if virgin + recycled <= 0:
+        st.info("No T4 feedstock volume yet.")
+    else:
+        st.image(charts.render("feedstock", [virgin, recycled], _draw_feedstock, figsize=(1,1)), width="stretch")
+
+    st.subheader("3️⃣ Certification Coverage")
+    coverage = stats.coverage()
+    st.image(charts.render("coverage", {"tiers": ["T1","T2","T3","T4"], "certified": list(coverage.values())},
+                           _draw_coverage, figsize=(1,1)), width="stretch")
+
+    st.subheader("4️⃣ Tier Completion Status")
+    for t,p in stats.completion().items():
+        st.write(f"{t.upper()}: {p}%"); st.progress(p)
+
+    st.subheader("5️⃣ On-Time Delivery Trend (demo data)")
+    dates = pd.date_range(datetime.today()-timedelta(days=150), periods=6, freq='ME')
+    st.image(charts.render("ontime", {"x": [d.strftime("%b") for d in dates], "y": [90,92,88,95,93,96]},
+                           _draw_ontime, figsize=(2,2)), width="stretch")
+
+    st.subheader("6️⃣ Traceability (T1 → T4)")
+    graph = vendor_trace()
+    cols = st.columns(4)
+    for col, (tier, row) in zip(cols, graph.coverage().items()):
+        linked = row.get("linked up %")
+        col.metric(f"{tier.upper()} entries", row["entries"],
+                   delta=None if linked is None else f"{linked:.0f}% linked", delta_color="off")
+    table = graph.pulp_table()
+    if table.empty:
+        st.info("No T3 pulp mills yet.")
+    else:
+        st.dataframe(table.drop(columns=["entry_id"]), hide_index=True, width="stretch")
+        for tier in ("t2", "t1"):
+            upstream = graph.rollup_table(tier)
+            if not upstream.empty:
+                st.dataframe(upstream.drop(columns=["entry_id"]), hide_index=True, width="stretch")
+    if graph.unlinked_vol > TOLERANCE:
+        st.warning(f"{graph.unlinked_vol:.1f}% of plantation volume is not linked to a pulp mill")
+    issues = graph.validate()
+    if issues.empty:
+        st.success("Supply chain consistent.")
+    else:
+        st.warning(f"{len(issues)} traceability issue(s)")
+        st.dataframe(issues.drop(columns=["entry_id"]), hide_index=True, width="stretch")
+
+    st.markdown("</div>", unsafe_allow_html=True)
+    if st.button("⬅ Back"): st.session_state["page"]="main"; st.rerun()
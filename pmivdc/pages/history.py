@@ -0,0 +1,115 @@
+"""
+🕓 Change history of the logged-in vendor's submission (see history.py).
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+
+import pandas as pd
+import streamlit as st
+
+from ..schema import TIERS
+from ..session import tier_entries, vendor_id, vendor_store
+
+TIER_TITLES = {"t1": "T1 – Factory", "t2": "T2 – Board / Paper Mill",
+               "t3": "T3 – Pulp-making", "t4": "T4 – Feedstock"}
+
+_time = lambda at: dt.datetime.fromtimestamp(at).strftime("%Y-%m-%d %H:%M:%S")
+
+def _instant(label: str, key: str, default: dt.datetime) -> float:
+    c1, c2 = st.columns(2)
+    day = c1.date_input(f"{label} – date", default.date(), key=f"{key}_date")
+    at = c2.time_input(f"{label} – time", default.time().replace(microsecond=0), key=f"{key}_time", step=60)
+    return dt.datetime.combine(day, at).timestamp() + 59.999        # whole minute, inclusive
+
+def _changes_table(rows) -> pd.DataFrame:
+    """[(entry, version / time, {field: (old, new)}), …] → one row per changed field."""
+    text = lambda v: "" if v is None else str(v)
+    return pd.DataFrame([{"entry": entry, "when": when, "field": field, "old": text(old), "new": text(new)}
+                         for entry, when, changes in rows for field, (old, new) in changes.items()],
+                        columns=["entry", "when", "field", "old", "new"])
+
+def _entries(rows) -> pd.DataFrame:
+    return pd.DataFrame(rows).drop(columns=["_id"]).fillna("").astype(str)
+
+def _entry_label(tier: str):
+    current = {e["_id"]: e for e in tier_entries(tier)}
+    def label(entry_id: str) -> str:
+        e = current.get(entry_id)
+        if e is None:
+            return f"{entry_id[:8]} (deleted)"
+        return " / ".join(str(e[f]) for f in ("product", "muni", "state", "country") if e.get(f)) or entry_id[:8]
+    return label
+
+def page_history():
+    st.header("🕓 Change history")
+    history, vid = vendor_store().history, vendor_id()
+    versions = history.versions(vid)
+    if not versions:
+        st.info("No saved changes yet.")
+        if st.button("⬅ Back"): st.session_state["page"]="main"; st.rerun()
+        return
+
+    table = pd.DataFrame(versions)
+    table["at"] = table["at"].map(_time)
+    table["meta"] = table["meta"].map({1: "✔", 0: ""})
+    st.caption(f"{len(table)} saved versions, {table['bytes'].sum() / 1024:,.1f} KiB of deltas")
+    st.dataframe(table.iloc[::-1], hide_index=True)
+
+    as_of_tab, diff_tab, entry_tab = st.tabs(["As of", "Compare", "One entry"])
+    now = dt.datetime.now()
+
+    with as_of_tab:
+        when = _instant("As of", "hist_asof", now)
+        version = history.version_at(vid, when)
+        meta, data = history.state(vid, version)
+        st.caption(f"Version {version} ({_time(versions[version - 1]['at']) if version else 'before any saved change'})")
+        with st.expander("Vendor details"):
+            st.json(meta)
+        for tier in TIERS:
+            rows = data.get(tier, [])
+            st.write(f"**{TIER_TITLES[tier]}** – {len(rows)} entries")
+            if rows:
+                st.dataframe(_entries(rows), hide_index=True)
+
+    with diff_tab:
+        since = _instant("From", "hist_from", dt.datetime.fromtimestamp(versions[0]["at"] - 60))
+        until = _instant("To", "hist_to", now)
+        diff = history.diff(vid, since, until)
+        if diff["meta"]:
+            st.write("**Vendor details**")
+            st.dataframe(_changes_table([("vendor", "", diff["meta"])]).drop(columns=["entry", "when"]),
+                         hide_index=True)
+        for tier in TIERS:
+            d = diff[tier]
+            if not (d["added"] or d["removed"] or d["changed"]):
+                continue
+            st.write(f"**{TIER_TITLES[tier]}** – {len(d['added'])} added, {len(d['removed'])} removed, "
+                     f"{len(d['changed'])} changed")
+            for caption, rows in (("Added", d["added"]), ("Removed", d["removed"])):
+                if rows:
+                    st.caption(caption)
+                    st.dataframe(_entries(rows), hide_index=True)
+            if d["changed"]:
+                st.caption("Changed")
+                label = _entry_label(tier)
+                st.dataframe(_changes_table([(label(i), "", c) for i, c in d["changed"].items()])
+                             .drop(columns=["when"]), hide_index=True)
+
+    with entry_tab:
+        tier = st.selectbox("Tier", TIERS, format_func=TIER_TITLES.get, key="hist_tier")
+        ids = history.entry_ids(vid, tier)
+        if not ids:
+            st.info("No recorded changes in this tier.")
+        else:
+            entry_id = st.selectbox("Entry", ids, format_func=_entry_label(tier), key="hist_entry")
+            events = history.entry_history(vid, tier, entry_id)
+            st.dataframe(pd.DataFrame([{"version": e["version"], "when": _time(e["at"]), "op": e["op"],
+                                        "fields changed": len(e["changes"])} for e in events]),
+                         hide_index=True)
+            st.dataframe(_changes_table([(e["op"], f"v{e['version']} {_time(e['at'])}", e["changes"])
+                                         for e in events]).rename(columns={"entry": "op"}),
+                         hide_index=True)
+
+    if st.button("⬅ Back"): st.session_state["page"]="main"; st.rerun()
@@ -0,0 +1,91 @@
+"""
+Demand, waste and order pages.
+"""
+
+from __future__ import annotations
+
+import os
+
+import streamlit as st
+
+from .. import charts, orders
+from ..forecast import AUTO, ENGINE, MODELS, file_digest
+from ..metrics import REGISTRY
+from ..session import DATA_DIR
+
+def _draw_forecast(fig, d):
+    ax = fig.subplots()
+    ax.plot(d["hx"], d["hy"], color="grey", label="history")
+    ax.plot(d["x"], d["y"], marker='o', label="forecast")
+    ax.set_title(f"{len(d['x'])}-month forecast – {d['series']}", fontsize=6)
+    ax.tick_params(labelsize=4, axis="x", rotation=90); ax.legend(fontsize=4)
+
+def _draw_waste(fig, d):
+    ax = fig.subplots()
+    ax.bar(list(d["rates"]), list(d["rates"].values()),
+           color=["green" if v<=d["threshold"] else "red" for v in d["rates"].values()])
+
+def page_demand():
+    st.header("Demand Planning")
+    st.write("Upload historical demand CSV with columns Month, Volume "
+             "– plus any key columns (SKU, Plant, …) for many series")
+    file = st.file_uploader("CSV *", type=["csv"])
+    if file:
+        c1, c2 = st.columns(2)
+        model = c1.selectbox("Model", [AUTO, *MODELS])
+        horizon = c2.slider("Horizon (months)", 1, 24, 6)
+        digest = file_digest(file)
+        REGISTRY.observe("pmivdc_upload_bytes", file.size, kind="demand")
+        try:
+            with st.spinner("Forecasting …"), REGISTRY.timer("pmivdc_op_seconds", op="demand_upload"):
+                result = ENGINE.forecast(file, model, horizon, digest=digest)
+        except ValueError as exc:
+            st.error(f"Could not read the file: {exc}"); result = None
+        if result:
+            history = result.history
+            st.caption(f"{history.rows:,} rows → {len(history.values):,} series × "
+                       f"{len(history.months)} months ({history.months[0]} – {history.months[-1]})")
+            table = result.frame()
+            st.dataframe(table, hide_index=True)
+            st.download_button("⬇ Forecast CSV", data=lambda: table.to_csv(index=False).encode(),
+                               file_name="forecast.csv", mime="text/csv")
+            labels = history.labels()
+            pick = st.selectbox("Series", range(len(labels)), format_func=labels.__getitem__) \
+                if len(labels) > 1 else 0
+            tail = slice(-24, None)
+            st.image(charts.render("demand_forecast",
+                                   {"series": labels[pick],
+                                    "hx": [str(m) for m in history.months[tail]],
+                                    "hy": history.values[pick, tail].tolist(),
+                                    "x": [str(m) for m in result.months],
+                                    "y": result.values[pick].tolist()},
+                                   _draw_forecast), width="stretch")
+    if st.button("⬅ Back"): st.session_state["page"]="main"; st.rerun()
+
+def page_waste():
+    st.header("♻️ Waste Management (demo)")
+    scrap_rates = {"Factory": 20, "Mill": 30}; threshold = 25
+    st.image(charts.render("waste", {"rates": scrap_rates, "threshold": threshold}, _draw_waste),
+             width="stretch")
+    if st.button("⬅ Back"): st.session_state["page"]="main"; st.rerun()
+
+def page_orders():
+    st.header("Order Management")
+    file = st.file_uploader("Open PO CSV (needs LeadTime)", type=["csv"])
+    if file:
+        k = st.number_input("Show the riskiest", 5, 1000, 20, step=5)
+        REGISTRY.observe("pmivdc_upload_bytes", file.size, kind="orders")
+        try:
+            with st.spinner("Scoring …"), REGISTRY.timer("pmivdc_op_seconds", op="orders_upload"):
+                result = orders.score_cached(file, os.path.join(DATA_DIR, "orders"), int(k))
+        except ValueError as exc:
+            st.error(f"Could not score the file: {exc}"); result = None
+        if result:
+            s = result.stats
+            st.caption(f"{s['rows']:,} POs · {s['scored']:,} with a lead time · "
+                       f"max {s['max_lead']:g} d · mean {s['mean_lead']:.1f} d")
+            cols = [c for c in ("PO", orders.LEAD_COL, orders.RISK_COL) if c in result.top.columns]
+            st.dataframe(result.top[cols] if "PO" in cols else result.top, hide_index=True)
+            st.download_button("⬇ All scored POs (CSV)", data=result.read_bytes,
+                               file_name="open_po_scored.csv", mime="text/csv")
+    if st.button("⬅ Back"): st.session_state["page"]="main"; st.rerun()
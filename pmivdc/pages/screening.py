@@ -0,0 +1,62 @@
+"""
+📍 Plantation proximity screening over the vendor's own T4 entries (every
+vendor's for PMIVDC_ADMINS).
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from ..geo import geo_index
+from ..gps import parse_gps
+from ..session import is_admin, vendor_id, vendor_store
+
+def _sites(file) -> pd.DataFrame:
+    df = pd.read_csv(file)
+    if {"lat", "lon"} <= set(df.columns):
+        return df
+    points = df["gps" if "gps" in df else df.columns[-1]].map(parse_gps).dropna()
+    df = df.loc[points.index].copy()
+    df["lat"] = [p[0] for p in points]
+    df["lon"] = [p[1] for p in points]
+    return df
+
+def page_geo():
+    st.header("📍 Plantation proximity screening")
+    index = geo_index(vendor_store())
+    vendor = None if is_admin() else vendor_id()
+    st.caption(f"{index.count(vendor):,} T4 plantations with readable GPS, "
+               + ("all vendors" if vendor is None else "yours"))
+    radius_tab, dupes_tab = st.tabs(["Radius / nearest", "Near-duplicates"])
+
+    with radius_tab:
+        c1, c2, c3 = st.columns([2, 1, 1])
+        where = c1.text_input("Site GPS (mill, protected area …)", placeholder="-2.51, 113.92")
+        km = c2.number_input("Radius (km)", 0.1, 5000.0, 50.0)
+        k = c3.number_input("Nearest", 1, 100, 5)
+        point = parse_gps(where)
+        if where and point is None:
+            st.error("Could not read those coordinates")
+        elif point:
+            hits = index.within(*point, km, vendor)
+            st.write(f"**{len(hits)}** plantations within {km:g} km")
+            st.dataframe(hits, hide_index=True)
+            st.write(f"Nearest {int(k)}")
+            st.dataframe(index.nearest(*point, int(k), vendor), hide_index=True)
+
+        file = st.file_uploader("…or a CSV of sites (lat, lon or gps column)", type=["csv"])
+        if file:
+            sites = _sites(file)
+            hits = index.within_many(sites[["lat", "lon"]].to_numpy(np.float64), km, vendor)
+            hits = hits.join(sites.reset_index(drop=True).drop(columns=["lat", "lon"]), on="query")
+            st.write(f"**{len(hits)}** plantation / site pairs within {km:g} km of {len(sites)} sites")
+            st.dataframe(hits, hide_index=True)
+
+    with dupes_tab:
+        meters = st.number_input("Closer than (m)", 1.0, 10000.0, 100.0)
+        if st.button("Find near-duplicates"):
+            st.dataframe(index.near_duplicates(meters, vendor), hide_index=True)
+
+    if st.button("⬅ Back"): st.session_state["page"]="main"; st.rerun()
@@ -0,0 +1,376 @@
+"""
+T1–T4 entry pages and the per-tier view / edit / delete page.
+"""
+
+from __future__ import annotations
+
+import functools
+from typing import Dict, List
+
+import pandas as pd
+import streamlit as st
+
+from ..bulk import cert_column, template, validate
+from ..certcheck import VALIDATOR
+from ..schema import CERT_PROGRAMS, FEEDSTOCK_SOURCE_TYPES, LIST_FIELDS, TIER_FIELDS
+from ..session import (append_entries, append_entry, certificate_store, persist_later, places, require, tier_entries,
+                       trace_if_built, update_entries, vendor_id, vendor_stats, vendor_store)
+from ..store import FILTER_FIELDS
+from ..trace import UPSTREAM
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  📋 VIEW / EDIT / DELETE PAGE
+# ──────────────────────────────────────────────────────────────────────────────
+_FILTER_LABELS = {"country": "Country", "coc_prog": "Program", "owned": "Owned", "granted": "Granted"}
+_PAGE_SIZES = [25, 50, 100, 250]
+
+def page_view_tier(tier_key: str, label: str):
+    st.subheader(f"{label} – existing entries")
+    db, vid = vendor_store(), vendor_id()
+    if not db.page(vid, tier_key, limit=0)[1]:
+        st.info("No entries yet.")
+        if st.button("⬅ Back"):
+            st.session_state["page"] = tier_key
+            st.rerun()
+        return
+
+    if f"saved_{tier_key}" in st.session_state:
+        st.success(st.session_state.pop(f"saved_{tier_key}"))
+
+    # ── server-side filter / sort / paging ──────────────────────────────────
+    fields = [f for f in FILTER_FIELDS if f in TIER_FIELDS[tier_key]]
+    filters = {}
+    for col, field in zip(st.columns(len(fields)), fields):
+        pick = col.selectbox(_FILTER_LABELS[field], ["All", *db.distinct(vid, tier_key, field)],
+                             key=f"flt_{tier_key}_{field}")
+        if pick != "All":
+            filters[field] = pick
+    c1, c2, c3 = st.columns([2, 1, 1])
+    sortable = [f for f in TIER_FIELDS[tier_key] if f not in LIST_FIELDS]
+    sort = c1.selectbox("Sort by", ["seq", *sortable], key=f"sort_{tier_key}",
+                        format_func=lambda f: "Entry order" if f == "seq" else f)
+    descending = c2.checkbox("Descending", key=f"desc_{tier_key}")
+    size = c3.selectbox("Rows / page", _PAGE_SIZES, index=1, key=f"size_{tier_key}")
+
+    total = db.page(vid, tier_key, filters, limit=0)[1]
+    pages = max(1, -(-total // size))
+    if st.session_state.get(f"pg_{tier_key}", 1) > pages:     # filter narrowed the result
+        st.session_state[f"pg_{tier_key}"] = pages
+    page_no = st.number_input(f"Page (of {pages}, {total} matching entries)", 1, pages, key=f"pg_{tier_key}")
+    shown, _ = db.page(vid, tier_key, filters, sort, descending, (page_no - 1) * size, size)
+
+    df = pd.DataFrame(shown, columns=["_id", *TIER_FIELDS[tier_key]] if not shown else None)
+    if "coc_file" in df:                        # results arrive asynchronously from the validator
+        blobs = certificate_store()
+        df["cert_check"] = df["coc_file"].map(lambda d: VALIDATOR.status(blobs, d))
+    view = (sorted(filters.items()), sort, descending, size, page_no,       # new page or a save
+            st.session_state.get(f"ver_{tier_key}", 0))                     # → fresh editor state
+    parents = _upstream(tier_key)
+    edited_df = st.data_editor(df, key=f"edit_{tier_key}_{hash(repr(view))}", use_container_width=True,
+                               num_rows="dynamic",
+                               column_config={"_id": None,
+                                              **({"parent": st.column_config.SelectboxColumn(
+                                                  f"Supplies ({UPSTREAM[tier_key].upper()})", options=list(parents),
+                                                  format_func=lambda i: parents.get(i, i))} if tier_key in UPSTREAM else {}),
+                                              "cert_check": st.column_config.TextColumn("Certificate check", disabled=True),
+                                              "coc_file":   st.column_config.TextColumn("Certificate (SHA-256)", disabled=True),
+                                              "cert_files": st.column_config.ListColumn("Certificates (SHA-256)")})
+    _certificate_downloads(tier_key, shown)
+
+    col1, col2, col3 = st.columns(3)
+    if col1.button("💾 Save changes", key=f"save_{tier_key}"):
+        added, changed, removed, report = update_entries(
+            tier_key, edited_df.drop(columns=["cert_check"], errors="ignore"), shown)
+        if len(report):                         # nothing stored; the edits stay in the grid
+            st.error(f"{len(report)} rows break the entry rules – nothing was saved. Fix them and save again.")
+            st.dataframe(report, hide_index=True)
+        else:
+            st.session_state[f"ver_{tier_key}"] = st.session_state.get(f"ver_{tier_key}", 0) + 1
+            st.session_state[f"saved_{tier_key}"] = (f"Changes stored – {added} added, {changed} updated, "
+                                                     f"{removed} deleted")
+            st.rerun()
+
+    if col2.button("🗑️ Delete all", key=f"del_{tier_key}"):
+        if st.radio("Really delete all entries?", ["No", "Yes"], key=f"conf_{tier_key}", horizontal=True) == "Yes":
+            db.clear(vid, tier_key)
+            tier_entries(tier_key).clear()
+            vendor_stats().clear_tier(tier_key)
+            graph = trace_if_built()
+            if graph is not None:
+                graph.clear_tier(tier_key)
+            persist_later()
+            st.warning("All entries deleted")
+
+    if col3.button("⬅ Back"):
+        st.session_state["page"] = tier_key
+        st.rerun()
+
+def _upstream(tier_key: str) -> Dict[str, str]:
+    """`_id` → "country / state / muni" of the entries one tier up (the `parent` choices)."""
+    up = UPSTREAM.get(tier_key)
+    if not up:
+        return {}
+    graph = trace_if_built()                        # already kept in step → no pass over the rows
+    if graph is not None:
+        return graph.options(up)
+    entries = tier_entries(up)
+    places = zip(*(entries.column(f) for f in ("country", "state", "muni")))
+    return {entry_id: " / ".join(str(v or "–") for v in place) for entry_id, place in zip(entries.ids, places)}
+
+def _parent(tier_key: str, label: str) -> str:
+    """Picker for the upstream entry this one supplies; "" when the tier above is empty."""
+    options = _upstream(tier_key)
+    if not options:
+        return ""
+    return st.selectbox(label, list(options), index=0 if len(options) == 1 else None,
+                        format_func=options.get, placeholder="Choose…", key=f"{tier_key}_parent") or ""
+
+def _location(tier_key: str, label: str, region: str = "Sub-National / Province / Region"):
+    """Country → state → municipality pickers over the gazetteer; new names may be typed."""
+    gaz = places()
+    pick = lambda caption, options, key: st.selectbox(
+        f"{label} – {caption}", options, index=None, accept_new_options=True,
+        placeholder="Type to search or add…", key=f"{tier_key}_{key}") or ""
+    country = gaz.canonical("country", pick("Country", gaz.names("country"), "country"), learn=False,
+                            fuzzy=False)
+    state = pick(region, gaz.names("state", (country,)) if country else [], f"state_{country}")
+    state = gaz.canonical("state", state, (country,), learn=False, fuzzy=False) if country else state
+    muni = pick("Municipality", gaz.names("muni", (country, state)) if state else [], f"muni_{country}_{state}")
+    return country, state, muni
+
+def _store_certificate(file) -> str:
+    blobs = certificate_store()
+    digest = blobs.put(file, file.name)
+    VALIDATOR.submit(blobs, digest)             # checked off the script thread
+    return digest
+
+def _bulk(tier_key: str):
+    """Paste a grid or upload the tier CSV; all rows validated at once, valid ones saved in one batch."""
+    key = f"bulk_{tier_key}"
+    with st.expander("📥 Bulk entry – paste a grid or upload a CSV", expanded=f"{key}_report" in st.session_state):
+        if f"{key}_report" in st.session_state:
+            saved, report = st.session_state.pop(f"{key}_report")
+            if saved:
+                st.success(f"{saved} {tier_key.upper()} entries stored")
+            if len(report):
+                st.error(f"{len(report)} rows rejected – they are back in the grid below")
+                st.dataframe(report, hide_index=True)
+
+        st.download_button("⬇ CSV template", data=template(tier_key).to_csv(index=False),
+                           file_name=f"{tier_key}_template.csv", mime="text/csv", key=f"{key}_template")
+        upload = st.file_uploader("Tier CSV (template columns)", type=["csv"], key=f"{key}_csv")
+        if upload is not None and st.session_state.get(f"{key}_source") != upload.file_id:
+            st.session_state[f"{key}_source"] = upload.file_id
+            rows = pd.read_csv(upload, dtype=str, keep_default_na=False)
+            st.session_state[f"{key}_rows"] = rows.reindex(columns=template(tier_key).columns, fill_value="")
+            st.session_state[f"{key}_ver"] = st.session_state.get(f"{key}_ver", 0) + 1
+        rows = st.session_state.get(f"{key}_rows", template(tier_key))
+        grid = st.data_editor(rows, num_rows="dynamic", hide_index=True,
+                              key=f"{key}_grid_{st.session_state.get(f'{key}_ver', 0)}",
+                              column_config={c: st.column_config.TextColumn(c) for c in rows.columns})
+        pdfs = st.file_uploader(f"Certificate PDFs (file names as in the `{cert_column(tier_key)}` column)",
+                                type=["pdf"], accept_multiple_files=True, key=f"{key}_pdfs")
+
+        if st.button("✅ Validate & save all rows", key=f"{key}_save"):
+            files = {f.name: f for f in pdfs or ()}
+            entries, report = validate(tier_key, grid, files)
+            digests: Dict[str, str] = {}
+
+            def digest(name: str) -> str:       # each PDF stored once, however many rows cite it
+                if name not in digests:
+                    files[name].seek(0)
+                    digests[name] = (certificate_store().put(files[name], name) if tier_key == "t1"
+                                     else _store_certificate(files[name]))
+                return digests[name]
+
+            for entry in entries:
+                names = entry.pop(cert_column(tier_key))
+                if tier_key == "t1":
+                    entry["cert_files"] = [digest(n) for n in names]
+                else:
+                    entry["coc_file"] = digest(names[0])
+            saved = append_entries(tier_key, entries) if entries else 0
+            rejected = grid.iloc[report["row"].to_numpy() - 1].reset_index(drop=True)
+            st.session_state[f"{key}_rows"] = rejected.astype(object).where(rejected.notna(), "")
+            st.session_state[f"{key}_ver"] = st.session_state.get(f"{key}_ver", 0) + 1
+            st.session_state[f"{key}_report"] = (saved, report.assign(row=range(1, len(report) + 1)))
+            st.rerun()
+
+def _certificate_downloads(tier_key: str, entries: List[Dict]):
+    blobs = certificate_store()
+    digests: List[str] = []
+    for e in entries:
+        files = e.get("cert_files")
+        for d in [e.get("coc_file"), *(files if isinstance(files, (list, tuple)) else ())]:
+            if d not in digests and blobs.exists(d):
+                digests.append(d)
+    if not digests:
+        return
+    with st.expander(f"📎 Certificates ({len(digests)})"):
+        pick = st.selectbox("Certificate", digests, key=f"cert_{tier_key}",
+                            format_func=lambda d: f"{blobs.name(d)} · {d[:12]}")
+        name = blobs.name(pick)
+        st.download_button("⬇ Download", data=functools.partial(blobs.stream, pick),  # opened on click only
+                           file_name=name, key=f"dl_{tier_key}",
+                           mime="application/pdf" if name.lower().endswith(".pdf") else "application/octet-stream")
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  T1 – Factory
+# ──────────────────────────────────────────────────────────────────────────────
+def page_t1():
+    st.header("T1: Factory")
+    country, state, muni = _location("t1", "Plant Location")
+    cert_files = st.file_uploader("Upload CoC certifications (any)", accept_multiple_files=True)
+
+    if st.button("Save & Add Another"):
+        require(country and state and muni, "Country, State & Municipality required")
+        require(cert_files, "Certification files required")
+        append_entry("t1",
+            {"country": country, "state": state, "muni": muni,
+             "cert_files": [certificate_store().put(f, f.name) for f in cert_files]})
+        st.success("T1 entry stored")
+
+    _bulk("t1")
+
+    c1, c2, c3 = st.columns(3)
+    if c1.button("🔍 View T1 entries"):
+        st.session_state["page"] = "view_t1"; st.rerun()
+    if c2.button("💾 Submit T1"):
+        st.success("T1 submitted")
+    if c3.button("⬅ Back"):
+        st.session_state["page"] = "main";   st.rerun()
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  T2 – Board / Paper Mill
+# ──────────────────────────────────────────────────────────────────────────────
+def page_t2():
+    st.header("T2: Board / Paper Mill")
+
+    country, state, muni = _location("t2", "Mill Location")
+    parent = _parent("t2", "Supplies factory (T1)")
+
+    owned = st.radio("Mill owned by same Supplier Group?", ["Yes", "No"], horizontal=True)
+    owner = "" if owned == "Yes" else st.text_input("Company that owns the mill (if different)")
+
+    st.subheader("CoC Certification")
+    granted  = st.radio("CoC certificate granted?", ["Y", "N"], horizontal=True)
+    coc_prog = st.selectbox("Certification program", CERT_PROGRAMS)
+    coc_copy = st.radio("Certificate copy available to PMI?", ["Y", "N"], horizontal=True)
+    file     = st.file_uploader("Upload certificate *", type=["pdf"])
+
+    if st.button("Save & Add Another"):
+        require(country and state and muni, "Country, State & Municipality required")
+        require(not (owned == "No" and not owner), "Owner company required")
+        require(file, "Certificate file required")
+
+        append_entry("t2",
+            {"country": country, "state": state, "muni": muni,
+             "owned": owned, "owner_company": owner,
+             "granted": granted, "coc_prog": coc_prog, "coc_copy": coc_copy,
+             "coc_file": _store_certificate(file), "parent": parent})
+        st.success("T2 entry stored")
+
+    _bulk("t2")
+
+    c1, c2, c3 = st.columns(3)
+    if c1.button("🔍 View T2 entries"):
+        st.session_state["page"] = "view_t2"; st.rerun()
+    if c2.button("💾 Submit T2"):
+        st.success("T2 submitted")
+    if c3.button("⬅ Back"):
+        st.session_state["page"] = "main";   st.rerun()
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  T3 – Pulp-Making
+# ──────────────────────────────────────────────────────────────────────────────
+def page_t3():
+    st.header("T3: Pulp-Making")
+
+    country, state, muni = _location("t3", "Pulp-making Location")
+    parent = _parent("t3", "Supplies mill (T2)")
+
+    owned = st.radio("Pulp-making owned by same Supplier Group?", ["Yes", "No"], horizontal=True)
+    owner = "" if owned == "Yes" else st.text_input("Company that owns the mill (if different)")
+
+    st.subheader("CoC Certification")
+    granted  = st.radio("CoC certificate granted?", ["Y", "N"], horizontal=True)
+    coc_prog = st.selectbox("Certification program", CERT_PROGRAMS)
+    coc_copy = st.radio("Certificate copy available to PMI?", ["Y", "N"], horizontal=True)
+    file     = st.file_uploader("Upload certificate *", type=["pdf"], key="t3_file")
+
+    if st.button("Save & Add Another"):
+        require(country and state and muni, "Country, State & Municipality required")
+        require(file, "Certificate file required")
+
+        append_entry("t3",
+            {"country": country, "state": state, "muni": muni,
+             "owned": owned, "owner_company": owner,
+             "granted": granted, "coc_prog": coc_prog, "coc_copy": coc_copy,
+             "coc_file": _store_certificate(file), "parent": parent})
+        st.success("T3 entry stored")
+
+    _bulk("t3")
+
+    c1, c2, c3 = st.columns(3)
+    if c1.button("🔍 View T3 entries"):
+        st.session_state["page"] = "view_t3"; st.rerun()
+    if c2.button("💾 Submit T3"):
+        st.success("T3 submitted")
+    if c3.button("⬅ Back"):
+        st.session_state["page"] = "main";   st.rerun()
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  T4 – Feedstock
+# ──────────────────────────────────────────────────────────────────────────────
+def page_t4():
+    st.header("T4: Feedstock")
+
+    product  = st.text_input("Feedstock of Procurement Product")
+    country, state, muni = _location("t4", "Plantation Location", "Sub-National / State / Province")
+    gps      = st.text_input("FMU centre GPS (or shapefile ref)")
+    source   = st.selectbox("Feedstock source type", FEEDSTOCK_SOURCE_TYPES)
+    supplier = st.text_input("Name of Feedstock Supplier")
+    parent   = _parent("t4", "Supplies pulp mill (T3)")
+
+    volume   = st.number_input("% of 2024 volume", min_value=0.0, max_value=100.0)
+    virgin   = st.number_input("Virgin fibres [%]",   min_value=0.0, max_value=100.0)
+    recycled = st.number_input("Recycled fibres [%]", min_value=0.0, max_value=100.0)
+
+    st.subheader("CoC Certification")
+    granted  = st.radio("CoC certificate granted?", ["Y", "N"], horizontal=True)
+    coc_prog = st.selectbox("Certification program", CERT_PROGRAMS, key="t4_prog")
+    coc_copy = st.radio("Certificate copy available to PMI?", ["Y", "N"], horizontal=True)
+    file     = st.file_uploader("Upload certificate *", type=["pdf"], key="t4_file")
+
+    st.subheader("Product-level Certification")
+    p_purchase = st.radio("Purchase certified fibres?", ["Yes", "No"], horizontal=True)
+    if p_purchase == "Yes":
+        p_prog   = st.selectbox("Certification program", CERT_PROGRAMS, key="t4_p_prog")
+        vol_cert = st.number_input("Volume certified [%]",     min_value=0.0, max_value=100.0)
+        vol_ctrl = st.number_input("Controlled-wood vol [%]",  min_value=0.0, max_value=100.0)
+    else:
+        p_prog = ""; vol_cert = vol_ctrl = 0.0
+
+    if st.button("Save & Add Another"):
+        require(product and country, "Feedstock product & Country required")
+        require(abs((virgin + recycled) - 100) < 1e-6, "Virgin + Recycled must equal 100 %")
+        require(file, "Certificate file required")
+
+        append_entry("t4",
+            {"product": product, "country": country, "state": state, "muni": muni,
+             "gps": gps, "source": source, "supplier": supplier,
+             "volume": volume, "virgin": virgin, "recycled": recycled,
+             "granted": granted, "coc_prog": coc_prog, "coc_copy": coc_copy,
+             "coc_file": _store_certificate(file), "p_purchase": p_purchase, "p_prog": p_prog,
+             "vol_cert": vol_cert, "vol_ctrl": vol_ctrl, "parent": parent})
+        st.success("T4 entry stored")
+
+    _bulk("t4")
+
+    c1, c2, c3 = st.columns(3)
+    if c1.button("🔍 View T4 entries"):
+        st.session_state["page"] = "view_t4"; st.rerun()
+    if c2.button("💾 Submit T4"):
+        st.success("T4 submitted")
+    if c3.button("⬅ Back"):
+        st.session_state["page"] = "main";   st.rerun()
@@ -0,0 +1,324 @@
+"""
+Location normalisation (country / state / municipality)
+-------------------------------------------------------
+* `fold()` – the comparison key: accents stripped, case-folded, punctuation
+  and repeated blanks collapsed ("São  Paulo." → "sao paulo")
+* `Gazetteer` – canonical names per level and scope (states within a
+  country, municipalities within a state).  Countries come from the bundled
+  `gazetteer.csv` (ISO names, alpha-2 / alpha-3 codes, common aliases), plus
+  an optional site file in PMIVDC_GAZETTEER with the same columns; states and
+  municipalities are learned from what is already stored – the first
+  spelling of a place becomes its canonical name
+* `canonical()` – exact key / alias hit, else the closest name within the
+  scope (trigram shortlist, difflib ratio ≥ FUZZY_MIN), else the tidied
+  input (which is learned); results are memoised until the gazetteer changes
+* `TrigramIndex` – trigram postings + a sorted key list, for fuzzy matches
+  and prefix autocomplete without scanning every name
+* `normalize_entry()` – the save path: exact key / alias hits only
+* `recanonicalize()` – batch job: every stored location is rewritten to its
+  exact key / alias form, deciding each distinct (country, state, muni)
+  once; closest-name rewrites (`proposals()`) are applied only where
+  confirmed – a near spelling may be a different place (Santa Lucia /
+  Santa Luzia)
+
+Pure Python at import time; the batch job imports pandas when it runs.
+"""
+
+from __future__ import annotations
+
+import bisect
+import csv
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from .schema import TIERS
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+LEVELS = ("country", "state", "muni")
+FUZZY_MIN = 0.85                            # difflib ratio a typo must reach
+BUNDLED = os.path.join(os.path.dirname(__file__), "gazetteer.csv")
+
+Scope = Tuple[str, ...]
+
+
+@lru_cache(maxsize=65536)
+def fold(text: object) -> str:
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    return re.sub(r"[\W_]+", " ", text).strip()
+
+
+def tidy(text: str) -> str:
+    """User spelling, cleaned: blanks collapsed, ALL CAPS / all lower → Title Case."""
+    text = re.sub(r"\s+", " ", str(text)).strip(" ,.;")
+    return text.title() if text.isupper() or text.islower() else text
+
+
+def _grams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  Trigram / prefix index
+# ──────────────────────────────────────────────────────────────────────────────
+class TrigramIndex:
+    def __init__(self):
+        self.keys: List[str] = []           # sorted, for prefix search
+        self._grams: Dict[str, set] = {}
+        self._postings: Dict[str, List[str]] = {}
+
+    def add(self, key: str) -> None:
+        if key in self._grams:
+            return
+        bisect.insort(self.keys, key)
+        self._grams[key] = grams = _grams(key)
+        for g in grams:
+            self._postings.setdefault(g, []).append(key)
+
+    def prefix(self, text: str, limit: int = 10) -> List[str]:
+        lo = bisect.bisect_left(self.keys, text)
+        out = []
+        for key in self.keys[lo:]:
+            if not key.startswith(text) or len(out) >= limit:
+                break
+            out.append(key)
+        return out
+
+    def similar(self, text: str, limit: int = 10, minimum: float = 0.0) -> List[Tuple[str, float]]:
+        grams = _grams(text)
+        shared = Counter(k for g in grams for k in self._postings.get(g, ()))
+        scored = [(k, 2 * n / (len(grams) + len(self._grams[k]))) for k, n in shared.items()]
+        scored = [s for s in scored if s[1] >= minimum]
+        scored.sort(key=lambda s: (-s[1], s[0]))
+        return scored[:limit]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  Gazetteer
+# ──────────────────────────────────────────────────────────────────────────────
+class Gazetteer:
+    def __init__(self):
+        self._names: Dict[Tuple[str, Scope], Dict[str, str]] = {}     # key → canonical
+        self._counts: Dict[Tuple[str, Scope], Counter] = {}           # canonical → uses
+        self._index: Dict[Tuple[str, Scope], TrigramIndex] = {}
+        self._memo: Dict[Tuple[str, Scope, str], str] = {}
+        self._lock = threading.RLock()
+
+    def add(self, level: str, name: str, scope: Scope = (), aliases: Iterable[str] = ()) -> str:
+        """Register `name` (+ aliases) unless its key is known; returns the canonical name."""
+        with self._lock:
+            names = self._names.setdefault((level, scope), {})
+            canonical = names.setdefault(fold(name), name)
+            index = self._index.setdefault((level, scope), TrigramIndex())
+            for alias in (name, *aliases):
+                key = fold(alias)
+                names.setdefault(key, canonical)
+                if len(key) >= 4:           # codes (US, DEU) match exactly, never fuzzily
+                    index.add(key)
+            self._counts.setdefault((level, scope), Counter())[canonical] += 0
+            self._memo.clear()
+            return canonical
+
+    def load_csv(self, path: str) -> None:
+        with open(path, encoding="utf-8", newline="") as fh:
+            for row in csv.DictReader(fh):
+                scope = tuple(p for p in (row.get("parent") or "").split("|") if p)
+                self.add(row["level"], row["name"], scope,
+                         [a for a in (row.get("aliases") or "").split("|") if a])
+
+    # ── lookup ───────────────────────────────────────────────────────────────
+    def canonical(self, level: str, text: object, scope: Scope = (), learn: bool = True,
+                  fuzzy: bool = True) -> str:
+        """fuzzy=False: exact key / alias hits only, else the tidied input (nothing learned)."""
+        if text is None or not str(text).strip():
+            return ""
+        key = fold(text)
+        if not fuzzy:
+            return self._names.get((level, scope), {}).get(key) or tidy(text)
+        memo = (level, scope, key)
+        hit = self._memo.get(memo)
+        if hit is not None:
+            return hit
+        with self._lock:
+            names = self._names.get((level, scope), {})
+            name = names.get(key)
+            if name is None and len(key) >= 4:  # trigram shortlist, edit-ratio decides
+                shortlist = self._index.get((level, scope), TrigramIndex()).similar(key, 8, 0.3)
+                digits = re.findall(r"\d+", key)      # "Lot 12" is never a typo of "Lot 13"
+                ratios = [(SequenceMatcher(None, key, k).ratio(), k) for k, _ in shortlist
+                          if re.findall(r"\d+", k) == digits]
+                best = max(ratios, default=(0.0, ""))
+                if best[0] >= FUZZY_MIN:
+                    name = names[best[1]]
+            if name is None:
+                if not learn:
+                    return tidy(text)
+                name = self.add(level, tidy(text), scope)
+            if len(self._memo) > 100_000:
+                self._memo.clear()
+            self._memo[memo] = name
+            return name
+
+    def location(self, country: object, state: object = "", muni: object = "",
+                 learn: bool = True, fuzzy: bool = True) -> Tuple[str, str, str]:
+        c = self.canonical("country", country, (), learn, fuzzy)
+        s = self.canonical("state", state, (c,), learn, fuzzy) if c else tidy(state or "")
+        m = self.canonical("muni", muni, (c, s), learn, fuzzy) if c and s else tidy(muni or "")
+        return c, s, m
+
+    def count(self, level: str, name: str, scope: Scope = (), n: int = 1) -> None:
+        with self._lock:
+            self._counts.setdefault((level, scope), Counter())[name] += n
+
+    def names(self, level: str, scope: Scope = ()) -> List[str]:
+        """Canonical names in scope, most used first, then alphabetical."""
+        counts = self._counts.get((level, scope), Counter())
+        return sorted(counts, key=lambda n: (-counts[n], fold(n)))
+
+    def suggest(self, level: str, text: str, scope: Scope = (), limit: int = 10) -> List[str]:
+        """Autocomplete: prefix matches first, then fuzzy ones."""
+        key = fold(text)
+        names = self._names.get((level, scope), {})
+        index = self._index.get((level, scope), TrigramIndex())
+        out: List[str] = []
+        for k in [*index.prefix(key, limit), *(k for k, _ in index.similar(key, limit, 0.3))]:
+            if names[k] not in out:
+                out.append(names[k])
+        return out[:limit]
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  Store integration
+# ──────────────────────────────────────────────────────────────────────────────
+def _store_locations(store) -> List[Tuple[str, str, str, int]]:
+    rows: Counter = Counter()
+    con = store._con()
+    for tier in TIERS:
+        for c, s, m, n in con.execute(f"SELECT country, state, muni, COUNT(*) FROM {tier} "
+                                      "GROUP BY country, state, muni"):
+            rows[(c or "", s or "", m or "")] += n
+    return [(*k, n) for k, n in rows.items()]
+
+
+def _learn(gaz: Gazetteer, country: str, state: str, muni: str, n: int = 1) -> Tuple[str, str, str]:
+    c, s, m = gaz.location(country, state, muni)
+    if c:
+        gaz.count("country", c, (), n)
+    if s:
+        gaz.count("state", s, (c,), n)
+    if m:
+        gaz.count("muni", m, (c, s), n)
+    return c, s, m
+
+
+_GAZETTEERS: Dict[str, Gazetteer] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def gazetteer(store) -> Gazetteer:
+    """Process-wide gazetteer for `store`: bundled + site file + stored places."""
+    with _REGISTRY_LOCK:
+        gaz = _GAZETTEERS.get(store.path)
+        if gaz is None:
+            gaz = Gazetteer()
+            gaz.load_csv(BUNDLED)
+            if os.environ.get("PMIVDC_GAZETTEER"):
+                gaz.load_csv(os.environ["PMIVDC_GAZETTEER"])
+            for c, s, m, n in _store_locations(store):
+                _learn(gaz, c, s, m, n)
+            _GAZETTEERS[store.path] = gaz
+        return gaz
+
+
+def normalize_entry(gaz: Gazetteer, entry: Dict) -> Dict:
+    """Exact key / alias form of country / state / muni in place (and counted); returns `entry`.
+
+    Closest-name rewrites are left to proposals(): a new "Santa Lucia" is
+    stored as typed even when "Santa Luzia" is known.
+    """
+    if any(entry.get(f) for f in LEVELS):
+        typed = (entry.get("country") or "", entry.get("state") or "", entry.get("muni") or "")
+        entry["country"], entry["state"], entry["muni"] = gaz.location(*typed, learn=False, fuzzy=False)
+        _learn(gaz, *typed)
+    return entry
+
+
+NEW = [f"{f}_new" for f in LEVELS]
+
+
+def _stored(store, tier: str) -> "pd.DataFrame":
+    import pandas as pd
+
+    with store._tx(write=False) as con:
+        rows = pd.DataFrame(con.execute(f"SELECT vendor_id, entry_id, country, state, muni "
+                                        f"FROM {tier}").fetchall(),
+                            columns=["vendor_id", "entry_id", *LEVELS])
+    rows[list(LEVELS)] = rows[list(LEVELS)].fillna("")
+    return rows
+
+
+def _rewrites(gaz: Gazetteer, triples: "pd.DataFrame", fuzzy: bool) -> "pd.DataFrame":
+    """Distinct (country, state, muni) rows + their canonical form in the NEW columns."""
+    import pandas as pd
+
+    fixed = pd.DataFrame([gaz.location(*t, learn=False, fuzzy=fuzzy) for t in triples.itertuples(index=False)],
+                         columns=NEW, index=triples.index)
+    return pd.concat([triples, fixed], axis=1)
+
+
+def proposals(store, gaz: Optional[Gazetteer] = None) -> "pd.DataFrame":
+    """Closest-name rewrites the batch job leaves alone, for confirmation.
+
+    One row per distinct stored location whose fuzzy canonical form differs
+    from its exact one: the location, the proposed NEW columns and the number
+    of stored rows affected.  Confirmed rows go back into recanonicalize().
+    """
+    import pandas as pd
+
+    gaz = gaz or gazetteer(store)
+    counts = Counter()
+    for tier in TIERS:
+        counts.update(_stored(store, tier)[list(LEVELS)].itertuples(index=False, name=None))
+    triples = pd.DataFrame(list(counts), columns=list(LEVELS))
+    exact, fuzzy = _rewrites(gaz, triples, False), _rewrites(gaz, triples, True)
+    differs = (exact[NEW].to_numpy() != fuzzy[NEW].to_numpy()).any(axis=1)
+    return fuzzy.assign(rows=list(counts.values()))[differs].reset_index(drop=True)
+
+
+def recanonicalize(store, gaz: Optional[Gazetteer] = None,
+                   confirmed: Optional["pd.DataFrame"] = None) -> Dict[str, int]:
+    """Rewrite every stored location to its canonical form; returns changed rows per tier.
+
+    Only exact key / alias hits (and tidying) are applied, plus the rows of
+    `confirmed` – proposals() the user accepted.  Distinct (country, state,
+    muni) triples are canonicalised once and mapped back onto all rows with a
+    join; only rows whose location changes are updated, in one transaction
+    per tier (one history version per vendor).
+    """
+    import pandas as pd
+
+    gaz = gaz or gazetteer(store)
+    changed = {}
+    for tier in TIERS:
+        rows = _stored(store, tier)
+        if rows.empty:
+            changed[tier] = 0
+            continue
+        mapping = _rewrites(gaz, rows[list(LEVELS)].drop_duplicates(), fuzzy=False)
+        if confirmed is not None and len(confirmed):    # confirmed first: it wins the de-duplication
+            mapping = pd.concat([confirmed[[*LEVELS, *NEW]], mapping]).drop_duplicates(list(LEVELS))
+        rows = rows.merge(mapping, on=list(LEVELS), how="left")
+        diff = rows[(rows[list(LEVELS)].to_numpy() != rows[NEW].to_numpy()).any(axis=1)]
+        if len(diff):
+            store.relocate(tier, diff[[*NEW, "vendor_id", "entry_id"]].itertuples(index=False, name=None))
+        changed[tier] = len(diff)
+    return changed
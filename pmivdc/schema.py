@@ -0,0 +1,122 @@
+"""
+Questionnaire schema shared by the portal pages and the persistence layer.
+"""
+
+from __future__ import annotations
+
+TIERS = ("t1", "t2", "t3", "t4")
+
+HEADERS = [
+    "DIM Procurement Contact in PMI",
+    "Procurement Product",
+    "Supplier Group Name",
+    "Supplier Name",
+    "Total 2024 Volume for Procurement Product (mt)",
+    "Plant Location\nCountry",
+    "Plant Location \nSub-National/ Province/ Region",
+    "Plant location Municipality",
+    "Mill Location\nCountry",
+    "Mill Location \nSub-National/ Province/ Region",
+    "Mill Location Municipality",
+    "Mill owned by same Supplier Group?",
+    "Company that owns the mill (if different from supplier group)",
+    "CoC certificate granted Y/N",
+    "which certicifation program (FSC / PEFC / SFI)",
+    "CoC certificate copy available to PMI Y/N",
+    "Pulp-making Location\nCountry",
+    "Pulp-making Location \nSub-National/ Province/ Region",
+    "Pulp-making Location Municipality",
+    "Pulp-making owned by same Supplier Group?",
+    "Company that owns the mill (if different from supplier group)",
+    "CoC certificate granted Y/N",
+    "which certicifation program (FSC / PEFC / SFI)",
+    "CoC certificate copy available to PMI Y/N",
+    "Feedstock of Procurement Product",
+    "Plantation Location - Country",
+    "Plantation Location - Sub-national/State/Province",
+    "Plantation Location - Municipality",
+    "Plantation Location - Forest Management Unit\n(FMU)* - provide center GPS coordinates or woodlot shapefile)",
+    "Feedstock source type (refers to the type of supplier you source the commodity from. Select the \noption that best reflects the source of your commodities)",
+    "Name of Feedstock Supplier (if any, logging company, woodlot owning company,…)",
+    "Percentage of 2024 volume (mentioned on column F) Breakdown by location (total must be equal 100%)",
+    "Virgin Fibres [% of total volumes of column D]",
+    "Recycled fibres [% of total volumes of column D]",
+    "CoC certificate granted Y/N",
+    "which certicifation program (FSC / PEFC / SFI)",
+    "CoC certificate copy available to PMI Y/N",
+    "Purchase of certified fibers Y/N",
+    "which certification program (FSC / PEFC / SFI)",
+    "Volume of purchased fibers certified for PMI product [%]",
+    "Volume of purchased fiber meeting Controlled wood requirements for PMI product [%]",
+]
+
+CERT_PROGRAMS          = ["FSC", "PEFC", "SFI"]
+FEEDSTOCK_SOURCE_TYPES = ["Logging Company", "Woodlot", "Community Forest"]
+
+# entry fields captured by each tier page (the keys of vendor_data[tier][i]);
+# `parent` is the `_id` of the entry one tier up that this one supplies (trace.py)
+_MILL_FIELDS = ("country", "state", "muni", "owned", "owner_company",
+                "granted", "coc_prog", "coc_copy", "coc_file", "parent")
+TIER_FIELDS = {
+    "t1": ("country", "state", "muni", "cert_files"),
+    "t2": _MILL_FIELDS,
+    "t3": _MILL_FIELDS,
+    "t4": ("product", "country", "state", "muni", "gps", "source", "supplier",
+           "volume", "virgin", "recycled", "granted", "coc_prog", "coc_copy",
+           "coc_file", "p_purchase", "p_prog", "vol_cert", "vol_ctrl", "parent"),
+}
+NUMERIC_FIELDS = {"volume", "virgin", "recycled", "vol_cert", "vol_ctrl"}
+LIST_FIELDS    = {"cert_files"}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  Declarative mapping: HEADERS column position → (entry field, default)
+#  (positions, not names – HEADERS repeats the CoC / owner captions per tier)
+# ──────────────────────────────────────────────────────────────────────────────
+META_COLUMNS = (
+    (0, "proc_contact"),                #  DIM Procurement Contact in PMI
+    (1, "proc_product"),                #  Procurement Product
+    (2, "supplier_group"),              #  Supplier Group Name
+    (3, "supplier_name"),               #  Supplier Name
+    (4, "total_volume_2024"),           #  Total 2024 Volume … (mt)
+)
+
+_MILL = lambda first: (                 # T2 and T3 share one 8-column layout
+    (first + 0, "country",       ""),
+    (first + 1, "state",         ""),
+    (first + 2, "muni",          ""),
+    (first + 3, "owned",         ""),
+    (first + 4, "owner_company", ""),
+    (first + 5, "granted",       "N"),
+    (first + 6, "coc_prog",      ""),
+    (first + 7, "coc_copy",      ""),
+)
+
+TIER_COLUMNS = {
+    "t1": (
+        (5,  "country", ""),            #  Plant Location Country
+        (6,  "state",   ""),
+        (7,  "muni",    ""),
+    ),
+    "t2": _MILL(8),                     #  Mill Location … CoC copy      (8–15)
+    "t3": _MILL(16),                    #  Pulp-making Location … copy   (16–23)
+    "t4": (
+        (24, "product",    ""),         #  Feedstock of Procurement Product
+        (25, "country",    ""),
+        (26, "state",      ""),
+        (27, "muni",       ""),
+        (28, "gps",        ""),         #  FMU centre GPS / shapefile
+        (29, "source",     ""),         #  Feedstock source type
+        (30, "supplier",   ""),         #  Name of Feedstock Supplier
+        (31, "volume",     ""),         #  % of 2024 volume
+        (32, "virgin",     ""),
+        (33, "recycled",   ""),
+        (34, "granted",    "N"),
+        (35, "coc_prog",   ""),
+        (36, "coc_copy",   ""),
+        (37, "p_purchase", ""),         #  Purchase of certified fibers
+        (38, "p_prog",     ""),
+        (39, "vol_cert",   ""),
+        (40, "vol_ctrl",   ""),
+    ),
+}
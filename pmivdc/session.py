@@ -0,0 +1,260 @@
+"""
+Session helpers shared by vdc.py and the page modules.
+
+Kept free of pandas / pyarrow / matplotlib at import time: the login flow
+only needs this module, and the heavier ones (export, loader) are imported
+on first use.
+"""
+
+from __future__ import annotations
+
+import os
+import uuid
+from typing import TYPE_CHECKING, Dict, List, Set, Tuple
+
+import streamlit as st
+
+from .blobs import BlobStore, get_blob_store
+from .columnar import VAULT, TierColumns, VendorData
+from .places import Gazetteer, gazetteer, normalize_entry
+from .stats import LiveStats
+from .store import Store, get_store
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from .trace import TraceGraph
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  📌 CONFIG
+# ──────────────────────────────────────────────────────────────────────────────
+EXCEL_PATH  = os.environ.get("PMIVDC_EXCEL_PATH",
+                             r"C:\Users\rkpha\Desktop\pmivdc\pmivdc.xlsx")   # legacy master workbook, read-only
+DATA_DIR    = os.environ.get("PMIVDC_DATA_DIR", os.path.dirname(EXCEL_PATH) or ".")
+STORE_PATH  = os.path.join(DATA_DIR, "pmivdc.sqlite3")                      # system of record
+EXPORT_PATH = os.path.join(DATA_DIR, "pmivdc.export.xlsx")                  # rolling export of the store
+BLOB_DIR    = os.path.join(DATA_DIR, "certificates")                        # content-addressed uploads
+EXPORT_DIR  = os.path.join(DATA_DIR, "exports")                             # on-demand downloads
+METRICS_PATH = os.environ.get("PMIVDC_METRICS_FILE",
+                              os.path.join(DATA_DIR, "metrics.prom"))        # Prometheus textfile
+ADMINS      = frozenset(e.strip().lower() for e in os.environ.get("PMIVDC_ADMINS", "").split(",")
+                        if e.strip())                                        # e-mails allowed on ?admin=…
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  🛠️ HELPERS
+# ──────────────────────────────────────────────────────────────────────────────
+def require(cond: bool, msg: str):
+    if not cond:
+        st.error(msg)
+        st.stop()
+
+def vendor_store() -> Store:
+    return get_store(STORE_PATH)
+
+def certificate_store() -> BlobStore:
+    return get_blob_store(BLOB_DIR)
+
+def vendor_id() -> str:
+    return (st.session_state.get("pending_email") or "anonymous").strip().lower()
+
+def is_admin() -> bool:
+    """OTP-verified in this session with an e-mail listed in PMIVDC_ADMINS, the code
+    mailed to it – a demo-mode code is shown on the page, so it proves nothing."""
+    verified = st.session_state.get("verified_email")
+    return (bool(verified) and verified == vendor_id() and verified in ADMINS
+            and st.session_state.get("otp_delivered") is True)
+
+def require_admin():
+    require(is_admin(), "This page is for administrators only.")
+
+def _vault_key() -> str:
+    if "vault_key" not in st.session_state:
+        st.session_state["vault_key"] = uuid.uuid4().hex
+    return st.session_state["vault_key"]
+
+def vendor_data() -> VendorData:
+    """This session's entries, columnar, in the process-wide vault.
+
+    Spilled after PMIVDC_SESSION_IDLE seconds without use (or when more than
+    PMIVDC_SESSION_RESIDENT sessions are resident) and reloaded from the
+    store here – every edit is upserted before it touches the columns.
+    """
+    return VAULT.get(_vault_key(), lambda: VendorData(vendor_store().load(vendor_id())[1]))
+
+def tier_entries(tier_key: str) -> TierColumns:
+    return vendor_data()[tier_key]
+
+def vendor_stats() -> LiveStats:
+    if "vendor_stats" not in st.session_state:
+        st.session_state["vendor_stats"] = LiveStats.from_data(vendor_data())
+    return st.session_state["vendor_stats"]
+
+def vendor_trace() -> "TraceGraph":
+    """The vendor's T1→T4 graph; built on first use, then kept in step like vendor_stats."""
+    from .trace import TraceGraph
+    key = _vault_key()
+    data = vendor_data()                            # (re)loads the slot the graph lives in
+    return VAULT.derived(key, "trace", lambda: TraceGraph.from_data(data))
+
+def trace_if_built():
+    return VAULT.derived(_vault_key(), "trace")     # None → nothing to update, built lazily
+
+def persist_later():
+    from . import export
+    export.EXPORTER.schedule(vendor_store(), EXPORT_PATH)
+
+def places() -> Gazetteer:
+    return gazetteer(vendor_store())
+
+def append_entry(tier_key: str, entry: Dict):
+    entry["_id"] = uuid.uuid4().hex
+    normalize_entry(places(), entry)
+    rows = tier_entries(tier_key)
+    vendor_store().upsert(vendor_id(), tier_key, [entry])  # store first: a spill may reload from it
+    rows.append(entry)
+    vendor_stats().add(tier_key, entry)
+    graph = trace_if_built()
+    if graph is not None:
+        graph.add(tier_key, entry)
+    persist_later()
+
+def append_entries(tier_key: str, entries: List[Dict]) -> int:
+    """Batch form of append_entry: one store write, one export, however many rows."""
+    gaz = places()
+    for entry in entries:
+        entry["_id"] = uuid.uuid4().hex
+        normalize_entry(gaz, entry)
+    rows = tier_entries(tier_key)
+    vendor_store().upsert(vendor_id(), tier_key, entries)
+    rows.extend(entries)
+    vendor_stats().add_many(tier_key, entries)
+    graph = trace_if_built()
+    if graph is not None:
+        graph.add_many(tier_key, entries)
+    persist_later()
+    return len(entries)
+
+def _nan(value) -> bool:
+    return isinstance(value, float) and value != value
+
+def _comparable(entry: Dict) -> Dict:
+    """Entry without empty cells – the editor turns None into NaN and adds missing keys."""
+    return {k: v for k, v in entry.items() if not (v is None or _nan(v) or v == "")}
+
+def _changed(old: Dict, new: Dict) -> Set[str]:
+    a, b = _comparable(old), _comparable(new)
+    return {k for k in a.keys() | b.keys() if a.get(k) != b.get(k)}
+
+def update_entries(tier_key: str, edited_df: "pd.DataFrame", shown: List[Dict]
+                   ) -> Tuple[int, int, int, "pd.DataFrame"]:
+    """Persist the editor's diff against `shown`, the page of entries it was given.
+
+    Only inserted / updated / deleted rows reach the store; rows outside the
+    page are untouched.  Added rows go through the entry rules
+    (bulk.validate_edits) first, changed rows through the rules on the
+    fields that changed: if any fails, nothing is stored and the report
+    (1-based editor rows) comes back.  Returns (inserted, updated,
+    deleted, report).
+    """
+    import pandas as pd
+
+    from .bulk import REPORT_COLUMNS, validate_edits
+
+    before = {e["_id"]: e for e in shown}
+    edits = []                                          # (editor row, old entry or None, entry)
+    for row, entry in enumerate(edited_df.to_dict("records"), start=1):
+        entry = {k: (None if _nan(v) else v) for k, v in entry.items()}
+        old = before.pop(entry.get("_id"), None) if isinstance(entry.get("_id"), str) else None
+        if old is None:                                 # row added in the editor
+            entry["_id"] = uuid.uuid4().hex
+            edits.append((row, None, entry))
+        elif _comparable(old) != _comparable(entry):
+            edits.append((row, old, entry))
+    deleted = before                                    # rows removed in the editor
+    if not (edits or deleted):
+        return 0, 0, 0, pd.DataFrame(columns=REPORT_COLUMNS)
+
+    # ── same rules as the entry forms (blank spare rows are dropped) ────────
+    blobs = certificate_store()
+    pending = [entry for _, _, entry in edits]
+    had_cert = [old is None or bool(old.get("coc_file") or old.get("cert_files")) for _, old, _ in edits]
+    changed_fields = [None if old is None else _changed(old, entry) for _, old, entry in edits]
+    stored = {d for e in pending for d in [e.get("coc_file"), *(e.get("cert_files") or ())] if blobs.exists(d)}
+    valid, report = validate_edits(tier_key, pending, stored, had_cert, changed_fields)
+    if len(report):
+        return 0, 0, 0, report.assign(row=[edits[r - 1][0] for r in report["row"]])
+    valid = {e["_id"]: e for e in valid}
+    inserted = [valid[e["_id"]] for _, old, e in edits if old is None and e["_id"] in valid]
+    updated = [(old, valid[e["_id"]]) for _, old, e in edits if old is not None and e["_id"] in valid]
+    if not (inserted or updated or deleted):
+        return 0, 0, 0, report
+
+    gaz = places()
+    changed = [*inserted, *(e for _, e in updated)]
+    for entry in changed:
+        normalize_entry(gaz, entry)
+
+    rows = tier_entries(tier_key)                       # before the write: a spilled slot reloads from the store
+    vendor_store().save_changes(vendor_id(), tier_key, changed, deleted)    # one history version
+    stats = vendor_stats()
+    for old in [*(o for o, _ in updated), *deleted.values()]:
+        stats.remove(tier_key, old)
+    stats.add_many(tier_key, changed)
+    graph = trace_if_built()
+    if graph is not None:                               # same _id again replaces in place
+        for old in deleted.values():
+            graph.remove(tier_key, old)
+        graph.add_many(tier_key, changed)
+    pos = rows.position()
+    for _, entry in updated:
+        if entry["_id"] in pos:
+            rows[pos[entry["_id"]]] = entry
+    rows.remove_ids(deleted)
+    rows.extend(inserted)
+    persist_later()
+    return len(inserted), len(updated), len(deleted), report
+
+def load_vendor():
+    db = vendor_store()
+    meta, data = db.load(vendor_id())
+    if not (meta or data):              # first login here → previous submission in the master file,
+        from .loader import master_index            # found through the OTP-verified e-mail only
+        meta, data = master_index(EXCEL_PATH).load(vendor_id())
+        if meta or data:
+            gaz = places()
+            db.save_meta(vendor_id(), meta)
+            for tier, entries in data.items():
+                db.upsert(vendor_id(), tier, [normalize_entry(gaz, e) for e in entries])
+    st.session_state["vendor_meta"] = meta
+    vendor = VAULT.put(_vault_key(), VendorData(data))     # fresh slot: no stale trace
+    st.session_state["vendor_stats"] = LiveStats.from_data(vendor)
+
+def location_proposals() -> "pd.DataFrame":
+    """Closest-name location rewrites across all vendors, for an admin to confirm."""
+    from .places import proposals
+    require_admin()
+    return proposals(vendor_store(), places())
+
+def normalize_locations(confirmed: "pd.DataFrame | None" = None) -> Dict[str, int]:
+    """Batch-canonicalise every vendor's stored locations (exact / alias hits plus the
+    `confirmed` proposals; admins only), then reload + re-export."""
+    from .places import recanonicalize
+    require_admin()
+    changed = recanonicalize(vendor_store(), places(), confirmed)
+    if any(changed.values()):
+        load_vendor()
+        persist_later()
+    return changed
+
+def start_export(fmt: str, all_vendors: bool = False) -> None:
+    """Queue an export of this vendor's rows (every vendor's: admins only) as `fmt`;
+    `export_job()` follows it."""
+    from . import export
+    if all_vendors:
+        require_admin()
+    vendors = None if all_vendors else [vendor_id()]
+    st.session_state["export_job"] = export.JOBS.start(vendor_store(), EXPORT_DIR, fmt, vendors).id
+
+def export_job():
+    from . import export
+    return export.JOBS.get(st.session_state.get("export_job"))
@@ -0,0 +1,97 @@
+"""
+Running aggregates behind page_stats.
+
+Entries are added / removed one at a time as they are saved or edited, so
+reading the dashboard costs O(#countries) whatever the number of entries.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+from .schema import TIERS
+
+
+def _num(value) -> float:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(value) else value
+
+
+def _certified(tier: str, entry: Dict) -> bool:
+    if tier == "t1":                        # T1 requires its certificate upload
+        return bool(entry.get("cert_files"))
+    return entry.get("granted") == "Y"
+
+
+class LiveStats:
+    def __init__(self):
+        self.countries = {t: Counter() for t in TIERS}
+        self.entries   = Counter()
+        self.certified = Counter()
+        self.volume    = 0.0                # Σ T4 volume share [%]
+        self.virgin    = 0.0                # Σ volume × virgin  [%·%]
+        self.recycled  = 0.0                # Σ volume × recycled
+
+    @classmethod
+    def from_data(cls, data: Dict[str, List[Dict]]) -> "LiveStats":
+        stats = cls()
+        for tier, entries in data.items():
+            stats.add_many(tier, entries)
+        return stats
+
+    # ── incremental updates ──────────────────────────────────────────────────
+    def add(self, tier: str, entry: Dict, sign: int = 1) -> None:
+        country = str(entry.get("country") or "").strip()
+        if country:
+            self.countries[tier][country] += sign
+        self.entries[tier] += sign
+        self.certified[tier] += sign * _certified(tier, entry)
+        if tier == "t4":
+            volume = _num(entry.get("volume"))
+            self.volume   += sign * volume
+            self.virgin   += sign * volume * _num(entry.get("virgin"))
+            self.recycled += sign * volume * _num(entry.get("recycled"))
+            if not self.entries[tier]:      # no float residue once the last entry is gone
+                self.volume = self.virgin = self.recycled = 0.0
+
+    def remove(self, tier: str, entry: Dict) -> None:
+        self.add(tier, entry, sign=-1)
+
+    def add_many(self, tier: str, entries: Iterable[Dict], sign: int = 1) -> None:
+        for entry in entries:
+            self.add(tier, entry, sign)
+
+    def clear_tier(self, tier: str) -> None:
+        self.countries[tier] = Counter()
+        self.entries[tier] = self.certified[tier] = 0
+        if tier == "t4":
+            self.volume = self.virgin = self.recycled = 0.0
+
+    # ── read side ────────────────────────────────────────────────────────────
+    def country_counts(self) -> Dict[str, int]:
+        total = Counter()
+        for counts in self.countries.values():
+            total.update(counts)
+        return dict(total.most_common())
+
+    def composition(self) -> Tuple[float, float]:
+        """Volume-weighted (virgin %, recycled %) over T4 entries."""
+        if self.volume <= 0:
+            return 0.0, 0.0
+        return self.virgin / self.volume, self.recycled / self.volume
+
+    def coverage(self) -> Dict[str, float]:
+        """Certified share of entries per tier [%]."""
+        return {t: 100.0 * self.certified[t] / self.entries[t] if self.entries[t] else 0.0
+                for t in TIERS}
+
+    def completion(self) -> Dict[str, int]:
+        done = {t: 100 if self.entries[t] else 0 for t in TIERS}
+        volume = round(min(max(self.volume, 0.0), 100.0), 6)        # running sum: 56.99999… is 57
+        done["t4"] = int(volume)                                     # T4 volume must total 100 %
+        return done
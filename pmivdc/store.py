@@ -0,0 +1,310 @@
+"""
+Shared multi-vendor store (SQLite, WAL mode)
+--------------------------------------------
+* one table per tier, primary key (vendor_id, entry_id) → row-level upserts
+* writers take `BEGIN IMMEDIATE` and wait on `busy_timeout`, readers never
+  block thanks to WAL – many Streamlit sessions can save at once without
+  overwriting each other's rows
+* T4 `gps` text is parsed into numeric `lat` / `lon` columns on write (the
+  spatial index in geo.py reads those)
+* the tier viewer pages through `page()`: filters on the FILTER_FIELDS
+  columns, sorting and LIMIT / OFFSET all run in SQL on indexed columns
+* the HEADERS workbook is an export of this store (see export.py)
+* every write also appends a version to the vendor's change history, in
+  the same transaction (see history.py)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .gps import parse_gps
+from .history import DDL as HISTORY_DDL, History, rows_delta
+from .metrics import REGISTRY
+from .schema import LIST_FIELDS, NUMERIC_FIELDS, TIER_FIELDS, TIERS
+
+VendorState = Tuple[Dict, Dict[str, List[Dict]]]
+
+FILTER_FIELDS = ("country", "coc_prog", "owned", "granted")    # indexed per (vendor, field)
+DERIVED = {"t4": ("lat", "lon")}            # computed from `gps` on write, never edited
+
+
+def _derived(tier: str, entry: Dict) -> Tuple:
+    if tier == "t4":
+        return parse_gps(entry.get("gps")) or (None, None)
+    return ()
+
+
+def _ddl() -> List[str]:
+    stmts = ["""CREATE TABLE IF NOT EXISTS vendors (
+                    vendor_id  TEXT PRIMARY KEY,
+                    meta       TEXT NOT NULL DEFAULT '{}',
+                    updated_at REAL NOT NULL)"""]
+    for tier, fields in TIER_FIELDS.items():
+        cols = ",\n".join([f"{f} {'REAL' if f in NUMERIC_FIELDS else 'TEXT'}" for f in fields]
+                          + [f"{f} REAL" for f in DERIVED.get(tier, ())])
+        stmts.append(f"""CREATE TABLE IF NOT EXISTS {tier} (
+                    vendor_id  TEXT NOT NULL,
+                    entry_id   TEXT NOT NULL,
+                    seq        INTEGER NOT NULL,
+                    {cols},
+                    extra      TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (vendor_id, entry_id))""")
+        stmts.append(f"CREATE INDEX IF NOT EXISTS {tier}_vendor_seq ON {tier} (vendor_id, seq)")
+        if tier in DERIVED:                 # geo.GeoIndex: incremental refresh + live count
+            stmts.append(f"CREATE INDEX IF NOT EXISTS {tier}_updated ON {tier} (updated_at)")
+            stmts.append(f"CREATE INDEX IF NOT EXISTS {tier}_latlon ON {tier} (lat, lon)")
+        for f in FILTER_FIELDS:
+            if f in fields:
+                stmts.append(f"CREATE INDEX IF NOT EXISTS {tier}_vendor_{f} ON {tier} (vendor_id, {f}, seq)")
+    return stmts + HISTORY_DDL
+
+
+class Store:
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self.history = History(self)
+        with self._tx() as con:
+            tables = [stmt for stmt in _ddl() if stmt.startswith("CREATE TABLE")]
+            for stmt in tables:
+                con.execute(stmt)
+            self._migrate(con)              # before the indexes that use new columns
+            for stmt in _ddl():
+                if stmt not in tables:
+                    con.execute(stmt)
+
+    def _migrate(self, con: sqlite3.Connection) -> None:
+        """Bring a database created by an earlier build up to TIER_FIELDS / DERIVED.
+
+        New entry fields are added empty; new DERIVED columns are backfilled.
+        """
+        for tier, fields in TIER_FIELDS.items():
+            have = {r[1] for r in con.execute(f"PRAGMA table_info({tier})")}
+            for f in fields:
+                if f not in have:
+                    con.execute(f"ALTER TABLE {tier} ADD COLUMN {f} "
+                                f"{'REAL' if f in NUMERIC_FIELDS else 'TEXT'}")
+        for tier, derived in DERIVED.items():
+            have = {r[1] for r in con.execute(f"PRAGMA table_info({tier})")}
+            missing = [f for f in derived if f not in have]
+            if not missing:
+                continue
+            for f in missing:
+                con.execute(f"ALTER TABLE {tier} ADD COLUMN {f} REAL")
+            con.row_factory = sqlite3.Row
+            rows = con.execute(f"SELECT * FROM {tier}").fetchall()
+            con.row_factory = None
+            con.executemany(f"UPDATE {tier} SET {' = ?, '.join(derived)} = ? "
+                            "WHERE vendor_id = ? AND entry_id = ?",
+                            [(*_derived(tier, dict(r)), r["vendor_id"], r["entry_id"]) for r in rows])
+
+    # ── connections & transactions ───────────────────────────────────────────
+    def _con(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:                     # sqlite3 connections are per-thread
+            con = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute("PRAGMA busy_timeout=30000")
+            self._local.con = con
+        return con
+
+    @contextmanager
+    def _tx(self, write: bool = True) -> Iterator[sqlite3.Connection]:
+        con = self._con()
+        con.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+        try:
+            yield con
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
+
+    # ── row <-> entry conversion ─────────────────────────────────────────────
+    @staticmethod
+    def _to_row(vendor_id: str, tier: str, entry: Dict, now: float) -> Tuple:
+        fields = TIER_FIELDS[tier]
+        vals = [json.dumps(list(entry.get(f) or ())) if f in LIST_FIELDS else entry.get(f) for f in fields]
+        extra = {k: v for k, v in entry.items() if k != "_id" and k not in fields}
+        return (vendor_id, entry["_id"], time.time_ns(), *vals, *_derived(tier, entry),
+                json.dumps(extra, default=str) if extra else None, now)
+
+    @staticmethod
+    def _to_entry(tier: str, row: sqlite3.Row) -> Dict:
+        entry = {"_id": row["entry_id"]}
+        for f in TIER_FIELDS[tier]:
+            entry[f] = json.loads(row[f]) if f in LIST_FIELDS and row[f] else row[f]
+        if row["extra"]:
+            entry.update(json.loads(row["extra"]))
+        return entry
+
+    # ── writes ───────────────────────────────────────────────────────────────
+    def save_meta(self, vendor_id: str, meta: Dict) -> None:
+        with self._tx() as con:
+            now = time.time()
+            self.history.begin(con, vendor_id, now)
+            con.execute("""INSERT INTO vendors (vendor_id, meta, updated_at) VALUES (?, ?, ?)
+                           ON CONFLICT (vendor_id) DO UPDATE
+                           SET meta = excluded.meta, updated_at = excluded.updated_at""",
+                        (vendor_id, json.dumps(meta, default=str), now))
+            self.history.record(con, vendor_id, now, {"meta": meta})
+
+    def _touch(self, con: sqlite3.Connection, vendor_id: str, now: float) -> None:
+        con.execute("""INSERT INTO vendors (vendor_id, updated_at) VALUES (?, ?)
+                       ON CONFLICT (vendor_id) DO UPDATE SET updated_at = excluded.updated_at""",
+                    (vendor_id, now))
+
+    def _upsert(self, con: sqlite3.Connection, vendor_id: str, tier: str, entries: List[Dict], now: float) -> None:
+        fields = (*TIER_FIELDS[tier], *DERIVED.get(tier, ()))
+        cols = ", ".join(("vendor_id", "entry_id", "seq", *fields, "extra", "updated_at"))
+        marks = ", ".join("?" * (len(fields) + 5))
+        update = ", ".join(f"{c} = excluded.{c}" for c in (*fields, "extra", "updated_at"))
+        con.executemany(f"""INSERT INTO {tier} ({cols}) VALUES ({marks})
+                            ON CONFLICT (vendor_id, entry_id) DO UPDATE SET {update}""",
+                        [self._to_row(vendor_id, tier, e, now) for e in entries])
+
+    def save_changes(self, vendor_id: str, tier: str, upserts: Iterable[Dict] = (),
+                     deleted_ids: Iterable[str] = ()) -> int:
+        """Upserts and deletions of one tier as one transaction – and one history version."""
+        entries, deleted_ids = list(upserts), list(deleted_ids)
+        if not entries and not deleted_ids:
+            return 0                        # nothing to write: no empty history version
+        with self._tx() as con:             # seq is kept on update → stable order
+            now = time.time()               # taken under the write lock: commit order = time order
+            self.history.begin(con, vendor_id, now)
+            self._upsert(con, vendor_id, tier, entries, now)
+            con.executemany(f"DELETE FROM {tier} WHERE vendor_id = ? AND entry_id = ?",
+                            [(vendor_id, i) for i in deleted_ids])
+            self._touch(con, vendor_id, now)
+            self.history.record(con, vendor_id, now, rows_delta(tier, entries, deleted_ids))
+        REGISTRY.observe("pmivdc_rows_written", len(entries), target="store", tier=tier)
+        return len(entries)
+
+    def upsert(self, vendor_id: str, tier: str, entries: Iterable[Dict]) -> int:
+        return self.save_changes(vendor_id, tier, upserts=entries)
+
+    def delete(self, vendor_id: str, tier: str, entry_ids: Iterable[str]) -> None:
+        self.save_changes(vendor_id, tier, deleted_ids=entry_ids)
+
+    def clear(self, vendor_id: str, tier: str) -> None:
+        with self._tx() as con:
+            now = time.time()
+            self.history.begin(con, vendor_id, now)
+            ids = [r[0] for r in con.execute(f"SELECT entry_id FROM {tier} WHERE vendor_id = ?", (vendor_id,))]
+            con.execute(f"DELETE FROM {tier} WHERE vendor_id = ?", (vendor_id,))
+            self._touch(con, vendor_id, now)
+            self.history.record(con, vendor_id, now, rows_delta(tier, delete=ids))
+
+    def relocate(self, tier: str, rows: Iterable[Tuple[str, str, str, str, str]]) -> None:
+        """Set (country, state, muni) of (…, vendor_id, entry_id) rows; one version per vendor."""
+        by_vendor: Dict[str, List[Tuple]] = {}
+        for row in rows:
+            by_vendor.setdefault(row[3], []).append(row)
+        with self._tx() as con:
+            now = time.time()
+            for vendor_id, changed in by_vendor.items():
+                self.history.begin(con, vendor_id, now)
+                con.executemany(f"UPDATE {tier} SET country = ?, state = ?, muni = ?, updated_at = ? "
+                                "WHERE vendor_id = ? AND entry_id = ?",
+                                [(c, s, m, now, v, e) for c, s, m, v, e in changed])
+                self._touch(con, vendor_id, now)
+                self.history.record(con, vendor_id, now, {"patch": {tier: {
+                    e: {"country": c, "state": s, "muni": m} for c, s, m, _, e in changed}}})
+
+    # ── reads ────────────────────────────────────────────────────────────────
+    def _load(self, con: sqlite3.Connection, vendor_id: str) -> VendorState:
+        con.row_factory = sqlite3.Row
+        try:
+            row = con.execute("SELECT meta FROM vendors WHERE vendor_id = ?", (vendor_id,)).fetchone()
+            meta = json.loads(row["meta"]) if row else {}
+            data = {}
+            for tier in TIERS:
+                cur = con.execute(f"SELECT * FROM {tier} WHERE vendor_id = ? ORDER BY seq", (vendor_id,))
+                entries = [self._to_entry(tier, r) for r in cur]
+                if entries:
+                    data[tier] = entries
+            return meta, data
+        finally:
+            con.row_factory = None
+
+    def load(self, vendor_id: str) -> VendorState:
+        with self._tx(write=False) as con:
+            return self._load(con, vendor_id)
+
+    def page(self, vendor_id: str, tier: str, filters: Optional[Dict[str, str]] = None,
+             sort: str = "seq", descending: bool = False,
+             offset: int = 0, limit: int = 50) -> Tuple[List[Dict], int]:
+        """One page of a vendor's tier entries → (entries, total rows matching `filters`)."""
+        fields = TIER_FIELDS[tier]
+        if sort not in ("seq", *fields):
+            raise KeyError(sort)
+        where, args = ["vendor_id = ?"], [vendor_id]
+        for field, value in (filters or {}).items():
+            if field not in fields:         # column names are interpolated: whitelist them
+                raise KeyError(field)
+            where.append(f"{field} = ?")
+            args.append(value)
+        where_sql = " AND ".join(where)
+        order = f"{sort} {'DESC' if descending else 'ASC'}, seq"
+        with self._tx(write=False) as con:
+            total = con.execute(f"SELECT COUNT(*) FROM {tier} WHERE {where_sql}", args).fetchone()[0]
+            con.row_factory = sqlite3.Row
+            try:
+                cur = con.execute(f"SELECT * FROM {tier} WHERE {where_sql} ORDER BY {order} "
+                                  "LIMIT ? OFFSET ?", (*args, limit, offset))
+                return [self._to_entry(tier, r) for r in cur], total
+            finally:
+                con.row_factory = None
+
+    def distinct(self, vendor_id: str, tier: str, field: str) -> List[str]:
+        if field not in TIER_FIELDS[tier]:
+            raise KeyError(field)
+        cur = self._con().execute(f"SELECT DISTINCT {field} FROM {tier} WHERE vendor_id = ? "
+                                  f"AND {field} IS NOT NULL AND {field} != '' ORDER BY {field}",
+                                  (vendor_id,))
+        return [r[0] for r in cur]
+
+    def vendor_ids(self) -> List[str]:
+        return [r[0] for r in self._con().execute("SELECT vendor_id FROM vendors ORDER BY vendor_id")]
+
+    def row_count(self, vendor_ids: Optional[Iterable[str]] = None) -> int:
+        """Entries across every vendor (or just `vendor_ids`) and tier (= HEADERS rows an export writes)."""
+        con = self._con()
+        if vendor_ids is None:
+            return sum(con.execute(f"SELECT COUNT(*) FROM {tier}").fetchone()[0] for tier in TIERS)
+        ids = list(vendor_ids)
+        marks = ", ".join("?" * len(ids))
+        return sum(con.execute(f"SELECT COUNT(*) FROM {tier} WHERE vendor_id IN ({marks})", ids).fetchone()[0]
+                   for tier in TIERS) if ids else 0
+
+    def iter_vendors(self, vendor_ids: Optional[Iterable[str]] = None
+                     ) -> Iterator[Tuple[str, Dict, Dict[str, List[Dict]]]]:
+        """Every vendor's state (or just `vendor_ids`') from one consistent read snapshot."""
+        wanted = None if vendor_ids is None else set(vendor_ids)
+        with self._tx(write=False) as con:
+            for (vendor_id,) in con.execute("SELECT vendor_id FROM vendors ORDER BY vendor_id").fetchall():
+                if wanted is None or vendor_id in wanted:
+                    yield (vendor_id, *self._load(con, vendor_id))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+#  Process-wide registry (one Store per database file, shared by sessions)
+# ──────────────────────────────────────────────────────────────────────────────
+_STORES: Dict[str, Store] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_store(path: str) -> Store:
+    with _REGISTRY_LOCK:
+        if path not in _STORES:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            _STORES[path] = Store(path)
+        return _STORES[path]
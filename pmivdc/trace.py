@@ -0,0 +1,346 @@
+"""
+Traceability graph: factory (T1) → mill (T2) → pulp (T3) → plantation (T4)
+--------------------------------------------------------------------------
+* every T2–T4 entry names the upstream-facing entry it supplies in its
+  `parent` field (the `_id` of a T1 / T2 / T3 entry); an entry without one
+  is linked to the only entry of the tier above while there is exactly one
+* nodes are integer positions per tier; `parent[t]` is the adjacency array
+  (child position → parent position, -1 = unlinked) and `children[t]` its
+  reverse, so a subtree is a few set look-ups
+* per-pulp-mill roll-ups – Σ T4 volume share and Σ volume on fully
+  certified paths – are kept as running sums: a T4 change moves one group,
+  an upstream change (certificate, re-link) re-scores only the plantations
+  beneath it
+* read side (`pulp_table`, `rollup_table`, `coverage`, `validate`) is
+  whole-array NumPy:
+  bincount group-bys and masks, no per-entry Python loops
+
+Same add / remove / clear_tier interface as stats.LiveStats, so the session
+keeps both in step.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set
+
+import numpy as np
+import pandas as pd
+
+from .schema import TIERS
+
+UPSTREAM = {"t2": "t1", "t3": "t2", "t4": "t3"}       # child tier → tier it supplies
+DOWNSTREAM = {v: k for k, v in UPSTREAM.items()}
+TOLERANCE = 0.5                                         # % slack on "must total 100 %"
+ROLLUP_NAMES = {"t1": "factory", "t2": "mill"}
+
+
+def _num(value) -> float:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if value != value else value
+
+
+def _certified(tier: str, entry: Dict) -> bool:
+    if tier == "t1":
+        return bool(entry.get("cert_files"))
+    return entry.get("granted") == "Y"
+
+
+def _label(entry: Dict) -> str:
+    return " / ".join(str(entry.get(f) or "–") for f in ("country", "state", "muni"))
+
+
+class TraceGraph:
+    def __init__(self):
+        self.ids: Dict[str, List[str]] = {t: [] for t in TIERS}
+        self.labels: Dict[str, List[str]] = {t: [] for t in TIERS}
+        self.pos: Dict[str, Dict[str, int]] = {t: {} for t in TIERS}
+        self.count = {t: 0 for t in TIERS}                  # alive nodes
+        self.arr: Dict[str, Dict[str, np.ndarray]] = {}
+        for t in TIERS:
+            cols = {"parent": np.full(8, -1, np.int64), "cert": np.zeros(8, bool), "alive": np.zeros(8, bool)}
+            if t == "t4":                   # own volume / mix, and what was added to its group
+                cols.update(vol=np.zeros(8), mix=np.zeros(8), cgroup=np.full(8, -1, np.int64),
+                            cvol=np.zeros(8), cpath=np.zeros(8, bool))
+            if t == "t3":                   # running sums over the plantations below
+                cols.update(vol_sum=np.zeros(8), cert_sum=np.zeros(8))
+            self.arr[t] = cols
+        self.children: Dict[str, Dict[int, Set[int]]] = {t: defaultdict(set) for t in UPSTREAM}
+        self.waiting: Dict[str, Dict[str, Set[int]]] = {t: defaultdict(set) for t in UPSTREAM}
+        self.wants: Dict[str, Dict[int, str]] = {t: {} for t in UPSTREAM}      # waiting position → parent id
+        self.implicit: Dict[str, Set[int]] = {t: set() for t in UPSTREAM}   # no `parent` given
+        self.unlinked_vol = 0.0             # T4 volume with no pulp mill
+
+    @classmethod
+    def from_data(cls, data: Dict[str, List[Dict]]) -> "TraceGraph":
+        graph = cls()
+        for tier in TIERS:                  # upstream tiers first → links resolve directly
+            graph.add_many(tier, data.get(tier) or ())
+        return graph
+
+    # ── storage ──────────────────────────────────────────────────────────────
+    def _slot(self, tier: str, entry_id: str) -> int:
+        i = self.pos[tier].get(entry_id)
+        if i is not None:
+            return i
+        i = len(self.ids[tier])
+        cols = self.arr[tier]
+        if i == len(cols["parent"]):        # amortised doubling
+            for name, col in cols.items():
+                fill = -1 if col.dtype == np.int64 else 0
+                cols[name] = np.concatenate([col, np.full(len(col), fill, col.dtype)])
+        self.ids[tier].append(entry_id)
+        self.labels[tier].append("")
+        self.pos[tier][entry_id] = i
+        return i
+
+    def _path_cert(self, j: int) -> bool:
+        """T4 position j certified all the way up to its factory?"""
+        ok, tier, i = bool(self.arr["t4"]["cert"][j]), "t4", j
+        while ok and tier in UPSTREAM:
+            i = int(self.arr[tier]["parent"][i])
+            tier = UPSTREAM[tier]
+            ok = i >= 0 and bool(self.arr[tier]["cert"][i])
+        return ok
+
+    def _contribute(self, j: int, sign: int) -> None:
+        a4, a3 = self.arr["t4"], self.arr["t3"]
+        if sign > 0:
+            a4["cgroup"][j], a4["cvol"][j], a4["cpath"][j] = a4["parent"][j], a4["vol"][j], self._path_cert(j)
+        g, vol = int(a4["cgroup"][j]), sign * a4["cvol"][j]
+        if g < 0:
+            self.unlinked_vol += vol
+        else:
+            a3["vol_sum"][g] += vol
+            a3["cert_sum"][g] += vol * a4["cpath"][j]
+
+    def _plantations_below(self, tier: str, i: int) -> List[int]:
+        level = {i}
+        while tier != "t4":
+            tier = DOWNSTREAM[tier]
+            level = set().union(*(self.children[tier].get(p, ()) for p in level))
+        return sorted(level)
+
+    def _rescore(self, tier: str, i: int) -> None:
+        for j in self._plantations_below(tier, i):
+            self._contribute(j, -1)
+            self._contribute(j, +1)
+
+    def _sole(self, tier: str) -> int:
+        """Position of the only alive entry of `tier`, else -1."""
+        if self.count[tier] != 1:
+            return -1
+        return int(np.flatnonzero(self.arr[tier]["alive"][:len(self.ids[tier])])[0])
+
+    def _resettle(self, tier: str) -> None:
+        """Re-point entries without a `parent` after the tier above gained / lost its only entry."""
+        if self.count[UPSTREAM[tier]] > 2:  # sole entry unchanged (there is none)
+            return
+        sole = self._sole(UPSTREAM[tier])
+        for c in self.implicit[tier]:
+            if self.arr[tier]["parent"][c] != sole:
+                self._unlink(tier, c)
+                self._link(tier, c, sole)
+                self._rescore(tier, c)
+
+    def _link(self, tier: str, i: int, parent: int) -> None:
+        self.arr[tier]["parent"][i] = parent
+        if parent >= 0:
+            self.children[tier][parent].add(i)
+
+    def _unlink(self, tier: str, i: int) -> None:
+        old = int(self.arr[tier]["parent"][i])
+        if old >= 0:
+            self.children[tier][old].discard(i)
+        self.arr[tier]["parent"][i] = -1
+
+    def _wait(self, tier: str, i: int, parent_id: str) -> None:
+        self.waiting[tier][parent_id].add(i)
+        self.wants[tier][i] = parent_id
+
+    def _unwait(self, tier: str, i: int) -> None:
+        """Forget what position i was waiting for (it was edited or removed)."""
+        parent_id = self.wants[tier].pop(i, None)
+        if parent_id is not None:
+            ids = self.waiting[tier].get(parent_id)
+            if ids is not None:
+                ids.discard(i)
+                if not ids:
+                    del self.waiting[tier][parent_id]
+
+    # ── incremental updates ──────────────────────────────────────────────────
+    def add(self, tier: str, entry: Dict, sign: int = 1) -> None:
+        if sign < 0:
+            return self.remove(tier, entry)
+        entry_id = entry["_id"]
+        i = self._slot(tier, entry_id)
+        cols = self.arr[tier]
+        if cols["alive"][i]:                # same _id again → replace in place
+            if tier == "t4":
+                self._contribute(i, -1)
+            if tier in UPSTREAM:
+                self._unlink(tier, i)
+        else:
+            self.count[tier] += 1
+        cols["alive"][i], cols["cert"][i] = True, _certified(tier, entry)
+        self.labels[tier][i] = _label(entry)
+
+        if tier in UPSTREAM:
+            up = UPSTREAM[tier]
+            pid = entry.get("parent") or ""
+            parent = self.pos[up].get(pid, -1) if pid else self._sole(up)
+            self._unwait(tier, i)           # an edit may name another parent, or none
+            if pid and (parent < 0 or not self.arr[up]["alive"][parent]):
+                parent = -1                 # upstream entry not loaded (yet)
+                self._wait(tier, i, pid)
+            if pid:
+                self.implicit[tier].discard(i)
+            else:
+                self.implicit[tier].add(i)
+            self._link(tier, i, parent)
+        if tier == "t4":
+            cols["vol"][i], cols["mix"][i] = _num(entry.get("volume")), \
+                _num(entry.get("virgin")) + _num(entry.get("recycled"))
+            self._contribute(i, +1)
+            return
+
+        child = DOWNSTREAM[tier]            # children that named this entry before it existed
+        for c in self.waiting[child].pop(entry_id, ()):
+            del self.wants[child][c]
+            if self.arr[child]["alive"][c] and self.arr[child]["parent"][c] < 0:
+                self._link(child, c, i)
+        self._rescore(tier, i)
+        self._resettle(child)
+
+    def remove(self, tier: str, entry: Dict) -> None:
+        i = self.pos[tier].get(entry["_id"])
+        if i is None or not self.arr[tier]["alive"][i]:
+            return
+        below = [] if tier == "t4" else self._plantations_below(tier, i)
+        for j in below:
+            self._contribute(j, -1)
+        if tier == "t4":
+            self._contribute(i, -1)
+        if tier in UPSTREAM:
+            self._unlink(tier, i)
+            self._unwait(tier, i)
+            self.implicit[tier].discard(i)
+        if tier != "t4":                    # orphan the children; named ones relink if it comes back
+            child = DOWNSTREAM[tier]
+            for c in self.children[child].pop(i, set()):
+                self.arr[child]["parent"][c] = -1
+                if c not in self.implicit[child]:
+                    self._wait(child, c, entry["_id"])
+        self.arr[tier]["alive"][i] = False
+        self.count[tier] -= 1
+        for j in below:
+            self._contribute(j, +1)
+        if tier != "t4":
+            self._resettle(DOWNSTREAM[tier])
+
+    def add_many(self, tier: str, entries: Iterable[Dict], sign: int = 1) -> None:
+        for entry in entries:
+            self.add(tier, entry, sign)
+
+    def clear_tier(self, tier: str) -> None:
+        for i in np.flatnonzero(self.arr[tier]["alive"][:len(self.ids[tier])]):
+            self.remove(tier, {"_id": self.ids[tier][i]})
+
+    # ── read side ────────────────────────────────────────────────────────────
+    def options(self, tier: str) -> Dict[str, str]:
+        """Alive `_id` → label, for the parent pickers."""
+        alive = self.arr[tier]["alive"]
+        return {self.ids[tier][i]: self.labels[tier][i] for i in np.flatnonzero(alive[:len(self.ids[tier])])}
+
+    def pulp_table(self) -> pd.DataFrame:
+        """Per pulp mill: linked plantations, Σ volume share, certified-path share."""
+        n = len(self.ids["t3"])
+        a3 = self.arr["t3"]
+        alive = a3["alive"][:n]
+        kids = np.array([len(self.children["t4"].get(i, ())) for i in range(n)], dtype=np.int64)
+        vol, cert = a3["vol_sum"][:n], a3["cert_sum"][:n]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = np.where(vol > 0, 100 * cert / vol, 0.0)
+        return pd.DataFrame({"entry_id": np.asarray(self.ids["t3"], dtype=object)[alive],
+                             "pulp mill": np.asarray(self.labels["t3"], dtype=object)[alive],
+                             "plantations": kids[alive], "volume %": vol[alive].round(2),
+                             "certified path %": share[alive].round(1)})
+
+    def rollup(self, tier: str) -> np.ndarray:
+        """(Σ volume, Σ certified volume) per node of `tier`, carried up from the pulp sums."""
+        n3 = len(self.ids["t3"])
+        alive3 = self.arr["t3"]["alive"][:n3]
+        sums = np.stack([self.arr["t3"]["vol_sum"][:n3] * alive3, self.arr["t3"]["cert_sum"][:n3] * alive3])
+        t = "t3"
+        while t != tier:
+            parent = self.arr[t]["parent"][:len(self.ids[t])]
+            linked = parent >= 0
+            size = len(self.ids[UPSTREAM[t]])
+            sums = np.stack([np.bincount(parent[linked], weights=s[linked], minlength=size) for s in sums])
+            t = UPSTREAM[t]
+        return sums
+
+    def rollup_table(self, tier: str) -> pd.DataFrame:
+        """Per T1 / T2 entry: Σ volume share of the plantations beneath it, certified-path share."""
+        n = len(self.ids[tier])
+        alive = self.arr[tier]["alive"][:n]
+        vol, cert = self.rollup(tier)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = np.where(vol > 0, 100 * cert / vol, 0.0)
+        return pd.DataFrame({"entry_id": np.asarray(self.ids[tier], dtype=object)[alive],
+                             ROLLUP_NAMES[tier]: np.asarray(self.labels[tier], dtype=object)[alive],
+                             "volume %": vol[alive].round(2), "certified path %": share[alive].round(1)})
+
+    def coverage(self) -> Dict[str, Dict[str, float]]:
+        """Per tier: % of entries linked to the tier above / with something linked below."""
+        out = {}
+        for t in TIERS:
+            n = len(self.ids[t])
+            alive = self.arr[t]["alive"][:n]
+            total = int(alive.sum())
+            row = {"entries": total}
+            if t in UPSTREAM:
+                row["linked up %"] = 100 * float(((self.arr[t]["parent"][:n] >= 0) & alive).sum()) / total if total else 0.0
+            if t in DOWNSTREAM:
+                fed = np.zeros(n, bool)
+                fed[[p for p, kids in self.children[DOWNSTREAM[t]].items() if kids and p < n]] = True
+                row["supplied %"] = 100 * float((fed & alive).sum()) / total if total else 0.0
+            out[t] = row
+        return out
+
+    def validate(self) -> pd.DataFrame:
+        """Rule violations, one row each: (tier, entry_id, where, issue)."""
+        issues = []
+
+        def flag(tier: str, mask: np.ndarray, text: np.ndarray) -> None:
+            idx = np.flatnonzero(mask)
+            if len(idx):
+                issues.append(pd.DataFrame({"tier": tier.upper(),
+                                            "entry_id": np.asarray(self.ids[tier], dtype=object)[idx],
+                                            "where": np.asarray(self.labels[tier], dtype=object)[idx],
+                                            "issue": text[idx] if isinstance(text, np.ndarray) else text}))
+
+        n3, n4 = len(self.ids["t3"]), len(self.ids["t4"])
+        a3, a4 = self.arr["t3"], self.arr["t4"]
+        alive3 = a3["alive"][:n3]
+        fed = np.bincount(a4["parent"][:n4][(a4["parent"][:n4] >= 0) & a4["alive"][:n4]], minlength=n3) > 0
+        vol = a3["vol_sum"][:n3]
+        bad = alive3 & fed & (np.abs(vol - 100) > TOLERANCE)
+        flag("t3", bad, np.char.add(np.char.add("plantation volume totals ", vol.round(1).astype(str)),
+                                     " % (must be 100 %)"))
+        if self.count["t4"]:
+            flag("t3", alive3 & ~fed, "no plantations linked")
+
+        alive4 = a4["alive"][:n4]
+        flag("t4", alive4 & (np.abs(a4["mix"][:n4] - 100) > TOLERANCE), "virgin + recycled ≠ 100 %")
+        for t, up in UPSTREAM.items():
+            if self.count[up]:
+                n = len(self.ids[t])
+                flag(t, self.arr[t]["alive"][:n] & (self.arr[t]["parent"][:n] < 0),
+                     f"not linked to a {up.upper()} entry")
+        if not issues:
+            return pd.DataFrame(columns=["tier", "entry_id", "where", "issue"])
+        return pd.concat(issues, ignore_index=True)
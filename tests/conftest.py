@@ -0,0 +1,58 @@
+"""
+Shared fixtures: a scratch Store and seeded random questionnaire entries.
+"""
+
+from __future__ import annotations
+
+import random
+import uuid
+
+import pytest
+
+from pmivdc.schema import CERT_PROGRAMS, FEEDSTOCK_SOURCE_TYPES
+from pmivdc.store import Store
+
+COUNTRIES = {"Brazil": ["Minas Gerais", "Bahia"], "Finland": ["Uusimaa", "Pirkanmaa"], "Indonesia": ["Riau"]}
+
+
+@pytest.fixture
+def store(tmp_path) -> Store:
+    return Store(str(tmp_path / "pmivdc.sqlite3"))
+
+
+@pytest.fixture
+def rng() -> random.Random:
+    return random.Random(20240601)
+
+
+def random_entry(rng: random.Random, tier: str, parent: str = "") -> dict:
+    """One entry with every field of `tier` filled the way the tier pages fill them."""
+    country = rng.choice(sorted(COUNTRIES))
+    entry = {"_id": uuid.UUID(int=rng.getrandbits(128)).hex, "country": country,
+             "state": rng.choice(COUNTRIES[country]), "muni": f"Town {rng.randint(1, 40)}"}
+    if tier == "t1":
+        entry["cert_files"] = [f"{rng.getrandbits(64):016x}"] if rng.random() < 0.5 else []
+        return entry
+    granted = rng.choice("YN")
+    entry.update(granted=granted, coc_prog=rng.choice(CERT_PROGRAMS) if granted == "Y" else "",
+                 coc_copy=rng.choice("YN"), parent=parent)
+    if tier in ("t2", "t3"):
+        entry.update(owned=rng.choice("YN"), owner_company=f"Owner {rng.randint(1, 9)}")
+        return entry
+    virgin = round(rng.uniform(0, 100), 1)
+    entry.update(product=rng.choice(["Eucalyptus", "Pine", "Acacia"]),
+                 gps=f"{rng.uniform(-30, 60):.5f}, {rng.uniform(-60, 120):.5f}",
+                 source=rng.choice(FEEDSTOCK_SOURCE_TYPES), supplier=f"Supplier {rng.randint(1, 20)}",
+                 volume=round(rng.uniform(0.5, 40), 2), virgin=virgin, recycled=round(100.0 - virgin, 1),
+                 p_purchase=rng.choice("YN"), p_prog=rng.choice(CERT_PROGRAMS),
+                 vol_cert=float(rng.randint(0, 100)), vol_ctrl=float(rng.randint(0, 100)))
+    return entry
+
+
+def random_vendor(rng: random.Random, per_tier: int = 4) -> dict:
+    """tier → entries, each T2–T4 entry linked to a random entry one tier up."""
+    data, above = {}, [""]
+    for tier in ("t1", "t2", "t3", "t4"):
+        data[tier] = [random_entry(rng, tier, rng.choice(above)) for _ in range(per_tier)]
+        above = [e["_id"] for e in data[tier]]
+    return data
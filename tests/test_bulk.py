@@ -0,0 +1,115 @@
+"""
+bulk.validate / validate_edits: one report per rejected row, normalised values for the rest.
+"""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from pmivdc.bulk import REPORT_COLUMNS, columns, template, validate, validate_edits
+
+FEED = {"product": "Eucalyptus", "country": "Brazil", "state": "Bahia", "muni": "Ilhéus", "gps": "-14.8, -39.0",
+        "source": "Woodlot", "supplier": "Acme", "volume": "40", "virgin": "70", "recycled": "30",
+        "granted": "Y", "coc_prog": "FSC", "coc_copy": "N", "p_purchase": "Yes", "p_prog": "PEFC",
+        "vol_cert": "20", "vol_ctrl": "5", "certificate": "coc.pdf"}
+MILL = {"country": "Chile", "state": "Biobío", "muni": "Nacimiento", "owned": "Yes", "owner_company": "",
+        "granted": "N", "coc_prog": "PEFC", "coc_copy": "Y", "certificate": "mill.pdf"}
+
+
+def _errors(report: pd.DataFrame) -> dict:
+    return dict(zip(report["row"], report["errors"].str.split("; ")))
+
+
+def test_template_columns():
+    assert list(template("t1").columns) == ["country", "state", "muni", "certificates"]
+    assert "parent" not in columns("t4") and columns("t4")[-1] == "certificate"
+    assert template("t3").empty
+
+
+def test_normalises_accepted_rows():
+    frame = pd.DataFrame([{**FEED, "granted": " y ", "coc_prog": "fsc", "source": "WOODLOT", "volume": "12,5%",
+                           "p_purchase": "yes", "p_prog": "pefc"},
+                          {**FEED, "p_purchase": "no", "p_prog": "", "vol_cert": "80", "vol_ctrl": ""}])
+    entries, report = validate("t4", frame, {"coc.pdf"})
+    assert list(report.columns) == REPORT_COLUMNS and report.empty
+    first, second = entries
+    assert (first["granted"], first["coc_prog"], first["source"], first["p_prog"]) == ("Y", "FSC", "Woodlot", "PEFC")
+    assert (first["volume"], first["virgin"], first["vol_cert"]) == (12.5, 70.0, 20.0)
+    assert first["certificate"] == ["coc.pdf"]
+    assert (second["p_prog"], second["vol_cert"], second["vol_ctrl"]) == ("", 0.0, 0.0)   # nothing certified bought
+
+
+def test_every_problem_of_a_row_is_reported():
+    frame = pd.DataFrame([
+        {**FEED, "country": "", "virgin": "60"},                                    # row 1
+        FEED,                                                                       # row 2: fine
+        {**FEED, "volume": "lots", "recycled": "140", "source": "Plantation"},      # row 3
+        {**FEED, "p_prog": "ISO", "certificate": "other.pdf; coc.pdf"},             # row 4
+    ])
+    entries, report = validate("t4", frame, {"coc.pdf"})
+    assert len(entries) == 1
+    assert _errors(report) == {
+        1: ["country required", "virgin + recycled must equal 100 %"],
+        3: ["volume is not a number", "recycled must be within 0–100 %",
+            "source must be one of Logging Company, Woodlot, Community Forest", "virgin + recycled must equal 100 %"],
+        4: ["p_prog must be one of FSC, PEFC, SFI when p_purchase is Yes", "certificate not uploaded: other.pdf"],
+    }
+
+
+def test_mill_rules_and_blank_rows():
+    frame = pd.DataFrame([MILL,
+                          {c: None for c in MILL},                                  # spare editor row
+                          {**MILL, "owned": "No"},
+                          {**MILL, "owned": "yes", "owner_company": "Someone", "granted": "maybe", "certificate": ""}])
+    entries, report = validate("t2", frame, {"mill.pdf"})
+    assert [e["owner_company"] for e in entries] == [""]
+    assert _errors(report) == {
+        3: ["owner_company required when owned is No"],
+        4: ["granted must be Y or N", "certificate required (file name of an uploaded PDF)"],
+    }
+
+
+def test_certificates_optional_per_row():
+    frame = pd.DataFrame([{"country": "Brazil", "state": "Bahia", "muni": "Una", "certificates": ""},
+                          {"country": "Brazil", "state": "Bahia", "muni": "Una", "certificates": "a.pdf;b.pdf"},
+                          {"country": "Brazil", "state": "Bahia", "muni": "Una", "certificates": ""}])
+    entries, report = validate("t1", frame, {"a.pdf", "b.pdf"}, cert_required=[False, True, True])
+    assert [e["certificates"] for e in entries] == [[], ["a.pdf", "b.pdf"]]
+    assert report["row"].tolist() == [3]
+
+
+@pytest.mark.parametrize("tier", ["t1", "t4"])
+def test_validate_edits_keeps_ids_and_digests(tier):
+    digest = "d" * 16
+    base = {"country": "Brazil", "state": "Bahia", "muni": "Una"}
+    if tier == "t4":
+        base = {**FEED, "volume": 40.0, "virgin": 70.0, "recycled": 30.0, "vol_cert": 20.0, "vol_ctrl": 5.0}
+        del base["certificate"]
+    cert = {"cert_files": [digest]} if tier == "t1" else {"coc_file": digest}
+    entries = [{**base, **cert, "_id": "a", "parent": "p", "extra": 1},
+               {**base, "_id": "b"},                                                # imported, never had one
+               {**base, "_id": "c"},
+               {**base, **cert, "_id": "d", "country": ""}]
+    valid, report = validate_edits(tier, entries, {digest}, [True, False, True, True])
+    assert [e["_id"] for e in valid] == ["a", "b"]
+    assert (valid[0]["parent"], valid[0]["extra"]) == ("p", 1)
+    assert valid[0].get("cert_files", valid[0].get("coc_file")) == cert.popitem()[1]
+    assert _errors(report).keys() == {3, 4}
+    assert _errors(report)[4] == ["country required"]
+
+
+def test_changed_rows_only_face_the_rules_on_their_edits():
+    form = {"_id": "a", "product": "Pine", "country": "Brazil", "state": "", "muni": "", "gps": "", "source": "Woodlot",
+            "supplier": "", "volume": 40.0, "virgin": 70.0, "recycled": 30.0, "granted": "N", "coc_prog": "FSC",
+            "coc_copy": "", "coc_file": "d" * 16, "p_purchase": "No", "p_prog": "", "vol_cert": 0.0, "vol_ctrl": 0.0}
+    edits = [{**form, "volume": "55,5"},                                        # state / muni / coc_copy still blank
+             {**form, "_id": "b", "virgin": 90.0},                              # now ≠ 100 % with recycled
+             {**form, "_id": "c", "p_purchase": "yes"}]                         # switched on without a program
+    valid, report = validate_edits("t4", edits, {"d" * 16}, [True] * 3, [{"volume"}, {"virgin"}, {"p_purchase"}])
+
+    assert [e["_id"] for e in valid] == ["a"]
+    assert valid[0] == {**form, "volume": 55.5}
+    assert _errors(report) == {2: ["virgin + recycled must equal 100 %"],
+                               3: ["p_prog must be one of FSC, PEFC, SFI when p_purchase is Yes"]}
+    assert validate_edits("t4", [edits[0]], {"d" * 16}, [True])[1]["row"].tolist() == [1]   # a new row: every rule
@@ -0,0 +1,89 @@
+"""
+Cube: a warm cube refreshed after random writes answers like one built from scratch,
+and a write drops only the cached slices it can change.
+"""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from conftest import random_entry, random_vendor
+from pmivdc.cube import Cube
+from pmivdc.schema import TIERS
+
+QUERIES = [
+    (["program", "tier"], {}),
+    (["group", "country"], {}),
+    (["tier"], {"country": ["Brazil"]}),
+    (["country"], {"tier": ["t4"], "program": ["FSC"]}),
+    (["tier"], {"country": ["Atlantis"]}),              # no such label until a write adds it
+    (["program"], {"group": ["G1"]}),
+]
+
+
+def _add_vendor(store, rng, email: str, group: str) -> None:
+    store.save_meta(email, {"supplier_group": group})
+    for tier, entries in random_vendor(rng, rng.randint(1, 4)).items():
+        store.upsert(email, tier, entries)
+
+
+def _assert_answers_like_a_rebuild(warm: Cube, store) -> None:
+    cold = Cube(store)
+    cold.refresh()
+    for by, filters in QUERIES:
+        pd.testing.assert_frame_equal(warm.query(by, filters), cold.query(by, filters), check_exact=False)
+
+
+@pytest.mark.parametrize("seed", range(2))
+def test_refresh_after_random_writes(seed, store, rng):
+    rng.seed(seed)
+    vendors = [f"v{i}@x.com" for i in range(6)]
+    for i, email in enumerate(vendors):
+        _add_vendor(store, rng, email, f"G{i % 3}")
+    warm = Cube(store)
+    warm.refresh()
+    for by, filters in QUERIES:
+        warm.query(by, filters)
+
+    for _ in range(25):                                 # each comparison re-warms the cache
+        email, tier = rng.choice(vendors), rng.choice(TIERS)
+        entries = store.load(email)[1].get(tier, [])
+        op = rng.random()
+        if op < 0.3 or not entries:
+            store.upsert(email, tier, [random_entry(rng, tier)])
+        elif op < 0.6:
+            changed = {**rng.choice(entries), "country": rng.choice(["Brazil", "Atlantis", "Finland"]),
+                       "granted": rng.choice("YN"), "coc_prog": rng.choice(["FSC", "PEFC", ""])}
+            store.upsert(email, tier, [changed])
+        elif op < 0.8:
+            store.delete(email, tier, [rng.choice(entries)["_id"]])
+        elif op < 0.9:
+            store.save_meta(email, {"supplier_group": rng.choice(["G0", "G1", "G2", "G3"])})
+        elif op < 0.95:
+            store.clear(email, tier)
+        else:
+            vendors.append(f"new{len(vendors)}@x.com")
+            _add_vendor(store, rng, vendors[-1], "G1")
+        assert warm.refresh() == 1
+        _assert_answers_like_a_rebuild(warm, store)
+
+
+def test_write_keeps_unrelated_slices_warm(store, rng):
+    store.save_meta("fi@x.com", {"supplier_group": "North"})
+    store.upsert("fi@x.com", "t2", [{**random_entry(rng, "t2"), "country": "Finland"}])
+    store.save_meta("br@x.com", {"supplier_group": "South"})
+    store.upsert("br@x.com", "t2", [{**random_entry(rng, "t2"), "country": "Brazil"}])
+    cube = Cube(store)
+    cube.refresh()
+    finland = cube.query(["tier"], {"country": ["Finland"]})
+    cube.query(["tier"], {"country": ["Brazil"]})
+    cube.query(["tier"], {"country": ["Chile"]})
+
+    store.upsert("br@x.com", "t2", [{**random_entry(rng, "t2"), "country": "Chile"}])
+    cube.refresh()
+    assert cube.stats()["cached"] == 1                  # Brazil (fed by br) and Chile (now matched) dropped
+    hits = cube.stats()["hits"]
+    pd.testing.assert_frame_equal(cube.query(["tier"], {"country": ["Finland"]}), finland)
+    assert cube.stats()["hits"] == hits + 1
+    assert cube.query(["tier"], {"country": ["Chile"]})["entries"].tolist() == [1]
@@ -0,0 +1,120 @@
+"""
+HEADERS export: positional column mapping and the xlsx / CSV / Parquet round-trip.
+"""
+
+from __future__ import annotations
+
+import time
+
+import pandas as pd
+import pytest
+
+from conftest import random_vendor
+from pmivdc import export as export_module
+from pmivdc.export import FORMATS, BackgroundExporter, build_frame, export
+from pmivdc.loader import SUPPLIERS_SHEET, rows_to_vendor
+from pmivdc.schema import HEADERS, META_COLUMNS, TIER_COLUMNS
+
+META = {"proc_contact": "Jo", "proc_product": "Tipping paper", "supplier_group": "Group",
+        "total_volume_2024": 1200.0}
+
+
+def _exported(data):
+    return {tier: [{f: e.get(f, d) for _, f, d in TIER_COLUMNS[tier]} for e in entries]
+            for tier, entries in data.items()}
+
+
+def _read(path: str, fmt: str) -> pd.DataFrame:
+    """The file back as HEADERS-position strings ("0".."40"), blanks as ""."""
+    if fmt == "xlsx":
+        frame = pd.read_excel(path, dtype=str)
+    elif fmt == "csv":
+        frame = pd.read_csv(path, dtype=str, keep_default_na=False)
+    else:
+        frame = pd.read_parquet(path)
+        numeric = frame.select_dtypes("number").columns
+        frame[numeric] = frame[numeric].map(lambda v: "" if pd.isna(v) else repr(float(v)))
+    frame = frame.fillna("").astype(str)
+    frame.columns = [str(i) for i in range(len(frame.columns))]
+    return frame
+
+
+def test_build_frame_positions():
+    meta = {**META, "supplier_name": "Acme"}
+    data = {"t1": [{"country": "Brazil", "state": "Bahia", "muni": "Ilhéus"}],
+            "t3": [{"country": "Chile", "granted": "Y", "coc_prog": "FSC"}, {"country": "Peru"}],
+            "t4": [{"country": "Finland", "gps": "60.1, 24.9", "volume": 100.0}]}
+    frame = build_frame([(meta, data), ({**meta, "supplier_name": "Beta"}, {"t2": [{"country": "Laos"}]})])
+
+    assert list(frame.columns) == HEADERS                   # duplicate captions are kept
+    assert frame.iloc[:, 3].tolist() == ["Acme"] * 4 + ["Beta"]     # vendor-contiguous, tier order
+    for i, field in META_COLUMNS:
+        assert frame.iloc[0, i] == meta[field]
+    assert frame.iloc[0, 5:8].tolist() == ["Brazil", "Bahia", "Ilhéus"]
+    pulp = {field: i for i, field, _ in TIER_COLUMNS["t3"]}
+    assert (frame.iloc[1, pulp["country"]], frame.iloc[1, pulp["coc_prog"]]) == ("Chile", "FSC")
+    assert frame.iloc[2, pulp["granted"]] == "N"             # schema default
+    feed = {field: i for i, field, _ in TIER_COLUMNS["t4"]}
+    assert (frame.iloc[3, feed["gps"]], frame.iloc[3, feed["volume"]]) == ("60.1, 24.9", 100.0)
+    assert frame.iloc[3, pulp["country"]] == ""              # other tiers' cells stay blank
+    assert frame.iloc[4, 8] == "Laos"
+
+
+@pytest.fixture
+def vendors(store, rng):
+    out = {}
+    for n, email in enumerate(["a@acme.com", "b@beta.com", "c@gamma.com"]):
+        name, data = f"Supplier {n}", random_vendor(rng, 3 + n)
+        store.save_meta(email, {**META, "supplier_name": name})
+        for tier, entries in data.items():
+            store.upsert(email, tier, entries)
+        out[email] = (name, data)
+    return out
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_round_trip(fmt, store, vendors, tmp_path):
+    path = str(tmp_path / f"out.{fmt}")
+    done = []
+    rows = export(store, path, fmt, progress=done.append)
+    assert rows == store.row_count() == done[-1]
+    assert not list(tmp_path.glob("*.tmp*"))                 # renamed into place
+
+    frame = _read(path, fmt)
+    assert len(frame) == rows and len(frame.columns) == len(HEADERS) + (fmt == "xlsx")    # + the e-mail column
+    for email, (name, data) in vendors.items():
+        if fmt == "xlsx":
+            assert set(frame.loc[frame["3"] == name, str(len(HEADERS))]) == {email}
+        meta, loaded = rows_to_vendor(frame[frame["3"] == name].reset_index(drop=True))
+        assert meta == {**META, "supplier_name": name}
+        assert {t: [{k: v for k, v in e.items() if k != "_id"} for e in es] for t, es in loaded.items()} \
+            == _exported(data)
+
+
+def test_xlsx_lists_logins(store, vendors, tmp_path):
+    path = str(tmp_path / "out.xlsx")
+    export(store, path, "xlsx")
+    logins = pd.read_excel(path, sheet_name=SUPPLIERS_SHEET, dtype=str)
+    assert dict(zip(logins.iloc[:, 0], logins.iloc[:, 1])) == {e: name for e, (name, _) in vendors.items()}
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_one_vendor_only(fmt, store, vendors, tmp_path):
+    path = str(tmp_path / f"mine.{fmt}")
+    rows = export(store, path, fmt, vendor_ids=["b@beta.com"])
+    frame = _read(path, fmt)
+    assert rows == len(frame) == store.row_count(["b@beta.com"]) == sum(map(len, vendors["b@beta.com"][1].values()))
+    assert set(frame["3"]) == {vendors["b@beta.com"][0]}
+
+
+def test_steady_saves_still_reach_the_workbook(store, monkeypatch, tmp_path):
+    written = []
+    monkeypatch.setattr(export_module, "write_excel", lambda store, path: written.append(time.monotonic()))
+    exporter = BackgroundExporter(delay=0.1, max_delays=3)
+    start = time.monotonic()
+    while time.monotonic() - start < 1.0:                   # a save every 50 ms: the debounce never settles
+        exporter.schedule(store, str(tmp_path / "out.xlsx"))
+        time.sleep(0.05)
+    time.sleep(0.2)                                         # let the last one land while patched
+    assert len(written) >= 3
+    assert written[0] - start < 0.3 + 0.15
@@ -0,0 +1,42 @@
+"""
+read_history: chunked per-series monthly sums, blank keys kept as their own series.
+"""
+
+from __future__ import annotations
+
+import io
+
+import numpy as np
+import pandas as pd
+
+from pmivdc.forecast import BLANK_KEY, read_history
+
+
+def _csv(frame: pd.DataFrame) -> io.BytesIO:
+    return io.BytesIO(frame.to_csv(index=False).encode())
+
+
+def test_blank_keys_are_a_series_of_their_own():
+    rng = np.random.default_rng(3)
+    n = 500
+    frame = pd.DataFrame({"Month": rng.choice(pd.date_range("2023-01-01", periods=12, freq="MS").astype(str), n),
+                          "Supplier": rng.choice(["Acme", "Beta", "", "  "], n),
+                          "Plant": rng.choice(["P1", "P2", ""], n),
+                          "Volume": rng.integers(1, 100, n).astype(float)})
+    history = read_history(_csv(frame), chunk_rows=64)
+
+    assert history.values.sum() == frame["Volume"].sum()
+    blank = frame.assign(Supplier=frame["Supplier"].str.strip().replace("", BLANK_KEY),
+                         Plant=frame["Plant"].replace("", BLANK_KEY))
+    expected = blank.groupby(["Supplier", "Plant"])["Volume"].sum()
+    got = pd.Series(history.values.sum(axis=1), index=pd.MultiIndex.from_frame(history.keys))
+    pd.testing.assert_series_equal(got.sort_index(), expected.sort_index(), check_names=False)
+    assert (BLANK_KEY, BLANK_KEY) in got.index
+
+
+def test_months_are_dense_and_undated_rows_dropped():
+    frame = pd.DataFrame({"Month": ["2024-01", "2024-03", "soon", "2024-03"], "Volume": [1.0, 2.0, 5.0, 4.0]})
+    history = read_history(_csv(frame))
+    assert [str(m) for m in history.months] == ["2024-01", "2024-02", "2024-03"]
+    assert history.values.tolist() == [[1.0, 0.0, 6.0]] and history.labels() == ["all"]
+    assert history.rows == 4
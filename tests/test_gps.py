@@ -0,0 +1,39 @@
+"""
+parse_gps: the spellings vendors type into the T4 GPS box.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from pmivdc.gps import parse_gps
+
+
+@pytest.mark.parametrize("text", [
+    "-2.51, 113.92",
+    "-2.51 113.92",
+    "-2.51,113.92",
+    "2.51 S 113.92 E",
+    "113.92 E 2.51 S",                                      # longitude first, hemispheres say so
+    "2°30'36\"S 113°55'12\"E",
+    "2° 30.6' S, 113° 55.2' E",
+    "-2,51 113,92",                                         # decimal commas
+    "-2,51; 113,92",
+])
+def test_same_point(text):
+    assert parse_gps(text) == pytest.approx((-2.51, 113.92))
+
+
+@pytest.mark.parametrize("text, point", [
+    ("-23.5505, -46.6333", (-23.5505, -46.6333)),
+    ("23°33'S 46°38'W", (-23.55, -46.6333333)),
+    ("2.5N,113.9E", (2.5, 113.9)),
+    ("60.17 24.94", (60.17, 24.94)),
+])
+def test_hemispheres(text, point):
+    assert parse_gps(text) == pytest.approx(point)
+
+
+@pytest.mark.parametrize("text", [None, 12.5, "", "   ", "shapefile FMU_12.shp", "1 2 3", "91, 10", "10, 181"])
+def test_unreadable_or_out_of_range(text):
+    assert parse_gps(text) is None
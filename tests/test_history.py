@@ -0,0 +1,131 @@
+"""
+History: versions written with the data, reconstruction across checkpoints, per-entry events, diffs.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from conftest import random_entry, random_vendor
+from pmivdc import store as store_module
+from pmivdc.history import CHECKPOINT_EVERY, _as_stored
+from pmivdc.schema import TIERS
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0]
+
+    def tick():
+        now[0] += 1.0
+        return now[0]
+    monkeypatch.setattr(store_module.time, "time", tick)
+    return now
+
+
+def _versions(store, vendor: str) -> int:
+    return len(store.history.versions(vendor))
+
+
+def test_failed_history_write_rolls_back_the_data(store, rng, monkeypatch):
+    keep = random_entry(rng, "t2")
+    store.upsert("a@x.com", "t2", [keep])
+
+    def boom(*args, **kwargs):
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(store.history, "record", boom)
+    with pytest.raises(RuntimeError):
+        store.save_changes("a@x.com", "t2", [random_entry(rng, "t2")], [keep["_id"]])
+    with pytest.raises(RuntimeError):
+        store.save_meta("a@x.com", {"supplier_name": "Acme"})
+    monkeypatch.undo()
+
+    assert store.load("a@x.com") == ({}, {"t2": [_as_stored("t2", keep)]})
+    assert _versions(store, "a@x.com") == 1
+
+
+@pytest.mark.parametrize("seed", range(2))
+def test_every_version_reconstructs_the_live_data(seed, store, rng, clock):
+    rng.seed(seed)
+    vendor = "a@x.com"
+    snapshots = [store.load(vendor)]                         # version 0: nothing yet
+    for _ in range(2 * CHECKPOINT_EVERY + 7):
+        tier = rng.choice(TIERS)
+        entries = store.load(vendor)[1].get(tier, [])
+        op = rng.random()
+        if op < 0.35 or not entries:
+            store.upsert(vendor, tier, [random_entry(rng, tier) for _ in range(rng.randint(1, 3))])
+        elif op < 0.6:
+            store.upsert(vendor, tier, [{**rng.choice(entries), "country": rng.choice(["Chile", "Peru"])}])
+        elif op < 0.75:
+            store.save_changes(vendor, tier, [random_entry(rng, tier)], [rng.choice(entries)["_id"]])
+        elif op < 0.85:
+            store.relocate(tier, [("Laos", "Vientiane", f"Town {rng.randint(1, 9)}", vendor, e["_id"])
+                                  for e in rng.sample(entries, min(2, len(entries)))])
+        elif op < 0.95:
+            store.save_meta(vendor, {"supplier_name": f"Supplier {rng.randint(1, 99)}"})
+        else:
+            store.clear(vendor, tier)
+        snapshots.append(store.load(vendor))
+
+    history = store.history
+    assert [v["version"] for v in history.versions(vendor)] == list(range(1, len(snapshots)))
+    checkpoints = [r[0] for r in store._con().execute(
+        "SELECT version FROM history_checkpoints WHERE vendor_id = ? ORDER BY version", (vendor,))]
+    assert checkpoints == [CHECKPOINT_EVERY, 2 * CHECKPOINT_EVERY]
+    for version, snapshot in enumerate(snapshots):
+        assert history.state(vendor, version) == snapshot, version
+    for v in history.versions(vendor)[::9]:
+        assert history.as_of(vendor, v["at"]) == snapshots[v["version"]]
+        assert history.as_of(vendor, v["at"] - 0.5) == snapshots[v["version"] - 1]
+
+
+def test_empty_save_records_no_version(store, rng):
+    store.upsert("a@x.com", "t1", [random_entry(rng, "t1")])
+    assert store.save_changes("a@x.com", "t1") == 0
+    store.upsert("a@x.com", "t1", [])
+    store.delete("a@x.com", "t1", [])
+    assert _versions(store, "a@x.com") == 1
+
+
+def test_pre_existing_data_becomes_version_zero(store, rng):
+    data = random_vendor(rng, 2)
+    store.save_meta("a@x.com", {"supplier_name": "Acme"})
+    for tier, entries in data.items():
+        store.upsert("a@x.com", tier, entries)
+    before = store.load("a@x.com")
+    with store._tx() as con:                                  # as if written before the history existed
+        for table in ("history", "history_checkpoints", "history_entries"):
+            con.execute(f"DELETE FROM {table}")
+
+    store.delete("a@x.com", "t4", [data["t4"][0]["_id"]])
+    assert store.history.state("a@x.com", 0) == before
+    assert store.history.state("a@x.com", 1) == store.load("a@x.com")
+    assert store.history.entry_history("a@x.com", "t4", data["t4"][0]["_id"])[0]["op"] == "deleted"
+    assert store.history.entry_history("a@x.com", "t4", data["t4"][1]["_id"]) == []
+
+
+def test_entry_history_and_diff(store, rng, clock):
+    entry = {**random_entry(rng, "t2"), "country": "Brazil", "state": "Bahia", "muni": "Una"}
+    other = random_entry(rng, "t2")
+    store.upsert("a@x.com", "t2", [entry, other])
+    start = clock[0]
+    store.upsert("a@x.com", "t2", [{**entry, "owner_company": "New owner"}])
+    store.relocate("t2", [("Brazil", "Bahia", "Ilhéus", "a@x.com", entry["_id"])])
+    store.save_meta("a@x.com", {"supplier_name": "Acme"})
+    middle = clock[0]
+    store.delete("a@x.com", "t2", [entry["_id"]])
+
+    events = store.history.entry_history("a@x.com", "t2", entry["_id"])
+    assert [(e["version"], e["op"]) for e in events] == [(1, "created"), (2, "updated"), (3, "updated"), (5, "deleted")]
+    assert events[1]["changes"] == {"owner_company": (entry["owner_company"], "New owner")}
+    assert events[2]["changes"] == {"muni": ("Una", "Ilhéus")}
+    assert events[3]["changes"]["country"] == ("Brazil", None)
+    assert store.history.entry_ids("a@x.com", "t2") == [entry["_id"], other["_id"]]
+
+    diff = store.history.diff("a@x.com", start, middle)
+    assert diff["meta"] == {"supplier_name": (None, "Acme")}
+    assert diff["t2"]["changed"] == {entry["_id"]: {"muni": ("Una", "Ilhéus"),
+                                                   "owner_company": (entry["owner_company"], "New owner")}}
+    assert diff["t2"]["added"] == diff["t2"]["removed"] == []
+    assert [e["_id"] for e in store.history.diff("a@x.com", middle, clock[0])["t2"]["removed"]] == [entry["_id"]]
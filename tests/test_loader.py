@@ -0,0 +1,116 @@
+"""
+MasterIndex: sidecar round-trip, e-mail-only matching and rebuild on a changed workbook.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import random_vendor
+from pmivdc import loader
+from pmivdc.export import build_frame, write_excel
+from pmivdc.loader import EMAIL_COL, SUPPLIERS_COLUMNS, SUPPLIERS_SHEET, MasterIndex
+from pmivdc.schema import TIER_COLUMNS
+
+META = {"proc_contact": "Jo", "proc_product": "Tipping paper", "supplier_group": "Group",
+        "total_volume_2024": 1200.0}
+
+
+def _exported(data):
+    """What survives the HEADERS layout: the TIER_COLUMNS fields, numbers as floats."""
+    return {tier: [{f: e.get(f, d) for _, f, d in TIER_COLUMNS[tier]} for e in entries]
+            for tier, entries in data.items()}
+
+
+def _loaded(data):
+    return {tier: [{k: v for k, v in e.items() if k != "_id"} for e in entries] for tier, entries in data.items()}
+
+
+@pytest.fixture
+def workbook(tmp_path, store, rng):
+    vendors = {"a@acme.com": ("Acme Paper", random_vendor(rng, 3)),
+               "b@beta.com": ("Beta Mills", random_vendor(rng, 2))}
+    for email, (name, data) in vendors.items():
+        store.save_meta(email, {**META, "supplier_name": name})
+        for tier, entries in data.items():
+            store.upsert(email, tier, entries)
+    path = str(tmp_path / "master.xlsx")
+    write_excel(store, path)
+    return path, vendors
+
+
+def test_sidecar_round_trip(workbook):
+    path, vendors = workbook
+    index = MasterIndex(path)
+    for email, (name, data) in vendors.items():
+        meta, loaded = index.load(email.upper() + " ")      # same normalisation as vendor_id()
+        assert meta == {**META, "supplier_name": name}
+        assert _loaded(loaded) == _exported(data)
+    assert os.path.exists(path + ".cache.arrow") and os.path.exists(path + ".index.json")
+
+
+def test_fresh_sidecar_skips_the_workbook(workbook, monkeypatch):
+    path, vendors = workbook
+    MasterIndex(path).load("a@acme.com")                    # first read builds the sidecar
+
+    def no_read(*args, **kwargs):
+        raise AssertionError("workbook parsed although the sidecar is current")
+
+    monkeypatch.setattr(loader.pd, "ExcelFile", no_read)
+    assert MasterIndex(path).load("b@beta.com")[0]["supplier_name"] == "Beta Mills"
+
+
+def test_only_registered_emails_match(workbook):
+    path, _ = workbook
+    index = MasterIndex(path)
+    assert index.load("acme paper") == ({}, {})             # a supplier name is not a login
+    assert index.load("someone@acme.com") == ({}, {})
+    assert index.load("a@acme.com")[0] and index.load("x@y.z") == ({}, {})
+
+
+def _workbook(path, vendors, logins, emails=True):
+    """Main sheet from (email, name, data) triples, with or without the e-mail column."""
+    frame = build_frame([({**META, "supplier_name": name}, data) for _, name, data in vendors])
+    if emails:
+        frame[EMAIL_COL] = [e for e, _, data in vendors for es in data.values() for _ in es]
+    with pd.ExcelWriter(path, engine="openpyxl") as book:
+        frame.to_excel(book, index=False)
+        pd.DataFrame(logins, columns=SUPPLIERS_COLUMNS).to_excel(book, sheet_name=SUPPLIERS_SHEET, index=False)
+
+
+def test_logins_sharing_a_supplier_name(tmp_path, rng):
+    path = str(tmp_path / "master.xlsx")
+    one, two = random_vendor(rng, 1), random_vendor(rng, 2)
+    logins = [["a@acme.com", "Acme Paper"], ["b@acme.com", "acme  paper"]]
+    _workbook(path, [("a@acme.com", "Acme Paper", one), ("b@acme.com", "Acme Paper", two)], logins)
+    index = MasterIndex(path)
+    assert _loaded(index.load("a@acme.com")[1]) == _exported(one)
+    assert _loaded(index.load("b@acme.com")[1]) == _exported(two)
+
+    _workbook(path, [("", "Acme Paper", one), ("", "Acme Paper", two)], logins, emails=False)
+    assert index.load("a@acme.com") == index.load("b@acme.com") == ({}, {})   # whose rows? nobody's
+    _workbook(path, [("", "Acme Paper", one)], logins[:1], emails=False)
+    assert _loaded(index.load("a@acme.com")[1]) == _exported(one)        # PMI's layout, one login per name
+
+
+def test_edited_workbook_rebuilds_the_sidecar(workbook, rng):
+    path, vendors = workbook
+    index = MasterIndex(path)
+    assert index.load("a@acme.com")[0]["supplier_name"] == "Acme Paper"
+
+    data = random_vendor(rng, 1)                           # PMI edits the workbook by hand
+    frame = build_frame([({**META, "supplier_name": "Acme Paper"}, data)])
+    with pd.ExcelWriter(path, engine="openpyxl") as book:
+        frame.to_excel(book, index=False)
+        pd.DataFrame([["a@acme.com", "Acme Paper"]], columns=SUPPLIERS_COLUMNS).to_excel(
+            book, sheet_name=SUPPLIERS_SHEET, index=False)
+
+    loaded = index.load("a@acme.com")[1]
+    assert _loaded(loaded) == _exported(data)
+    assert index.load("b@beta.com") == ({}, {})            # no longer registered
+    with open(path + ".index.json", encoding="utf-8") as fh:
+        assert json.load(fh)["fingerprint"] == loader._fingerprint(path)
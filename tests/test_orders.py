@@ -0,0 +1,75 @@
+"""
+score_cached: one run and one file per extract whatever K, pruning spares files still in use.
+"""
+
+from __future__ import annotations
+
+import gc
+import io
+import os
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from pmivdc import orders
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(orders, "_RESULTS", type(orders._RESULTS)())
+    monkeypatch.setattr(orders, "_RUNNING", {})
+
+
+def _extract(n: int, seed: int = 0) -> io.BytesIO:
+    frame = pd.DataFrame({"PO": [f"PO{i:05d}" for i in range(n)],
+                          "LeadTime": [(i * 37 + seed) % 101 for i in range(n)]})
+    return io.BytesIO(frame.to_csv(index=False).encode())
+
+
+def test_top_k_is_applied_per_caller(tmp_path):
+    five = orders.score_cached(_extract(300), str(tmp_path), 5)
+    fifty = orders.score_cached(_extract(300), str(tmp_path), 50)
+    assert fifty.path == five.path
+    assert len(five.top) == 5 and len(fifty.top) == 50
+    assert five.top["PO"].tolist() == fifty.top["PO"].tolist()[:5]
+    assert fifty.top[orders.RISK_COL].is_monotonic_decreasing
+    assert five.read_bytes().count(b"\n") == 301
+    with pytest.raises(ValueError):
+        orders.score_cached(_extract(300), str(tmp_path), orders.TOP_MAX + 1)
+
+
+def test_concurrent_uploads_with_different_k_share_one_run(tmp_path, monkeypatch):
+    runs, score = [], orders.score_orders
+
+    def slow(stream, out_path, k, *args):
+        runs.append(k)
+        time.sleep(0.2)
+        return score(stream, out_path, k, *args)
+    monkeypatch.setattr(orders, "score_orders", slow)
+    results = {}
+    threads = [threading.Thread(target=lambda k=k: results.__setitem__(k, orders.score_cached(
+        _extract(500), str(tmp_path), k))) for k in (5, 10, 20, 40)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert runs == [orders.TOP_MAX]
+    assert {k: len(r.top) for k, r in results.items()} == {5: 5, 10: 10, 20: 20, 40: 40}
+    assert not [n for n in os.listdir(tmp_path) if ".tmp" in n]
+
+
+def test_prune_spares_files_still_referenced(tmp_path, monkeypatch):
+    monkeypatch.setattr(orders, "KEEP_FILES", 1)
+    monkeypatch.setattr(orders, "CACHE_SIZE", 1)
+    held = orders.score_cached(_extract(50, seed=1), str(tmp_path), 5)      # e.g. behind a download button
+    dropped = orders.score_cached(_extract(50, seed=2), str(tmp_path), 5)
+    dropped_path = dropped.path
+    del dropped
+    gc.collect()
+    orders.score_cached(_extract(50, seed=3), str(tmp_path), 5)              # evicts both from the cache
+
+    assert os.path.exists(held.path) and held.read_bytes()
+    assert not os.path.exists(dropped_path)
@@ -0,0 +1,87 @@
+"""
+OtpStore: single use, expiry, lock-out after wrong guesses, re-issue cooldown, bounded size.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from pmivdc import otp
+from pmivdc.otp import EXPIRED, INVALID, LOCKED, MISSING, OK, OtpStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(otp.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _wrong(code: str) -> str:
+    return "".join(otp.ALPHABET[(otp.ALPHABET.index(c) + 1) % len(otp.ALPHABET)] for c in code)
+
+
+def test_code_is_single_use_and_address_normalised(clock):
+    codes = OtpStore()
+    code = codes.issue(" Vendor@Acme.com")
+    assert len(code) == otp.LENGTH and set(code) <= set(otp.ALPHABET)
+    assert codes.verify("vendor@acme.com", code.upper()) == OK
+    assert codes.verify("vendor@acme.com", code) == MISSING
+
+
+def test_code_only_fits_its_address(clock):
+    codes = OtpStore()
+    code = codes.issue("a@x.com")
+    codes.issue("b@x.com")
+    assert codes.verify("b@x.com", code) == INVALID
+
+
+def test_expiry(clock):
+    codes = OtpStore(ttl=60)
+    code = codes.issue("a@x.com")
+    clock[0] += 59.9
+    assert codes.attempts_left("a@x.com") == otp.MAX_ATTEMPTS
+    clock[0] += 0.1
+    assert codes.verify("a@x.com", code) == EXPIRED
+    assert codes.verify("a@x.com", code) == MISSING
+
+
+def test_lockout_burns_the_code(clock):
+    codes = OtpStore(max_attempts=3)
+    code = codes.issue("a@x.com")
+    assert [codes.verify("a@x.com", _wrong(code)) for _ in range(3)] == [INVALID, INVALID, LOCKED]
+    assert codes.attempts_left("a@x.com") == 0
+    assert codes.verify("a@x.com", code) == LOCKED        # the right code no longer helps
+
+
+def test_cooldown_between_codes(clock):
+    codes = OtpStore(cooldown=30)
+    first = codes.issue("a@x.com")
+    clock[0] += 29
+    assert codes.issue("A@X.com") is None                 # the first code stays valid
+    clock[0] += 1
+    second = codes.issue("a@x.com")
+    assert second is not None
+    assert codes.verify("a@x.com", first) == INVALID      # a new code replaces the old one
+    assert codes.verify("a@x.com", second) == OK
+
+
+def test_lockout_is_not_reset_inside_the_cooldown(clock):
+    codes = OtpStore(max_attempts=1, cooldown=30)
+    code = codes.issue("a@x.com")
+    assert codes.verify("a@x.com", _wrong(code)) == LOCKED
+    assert codes.issue("a@x.com") is None
+    clock[0] += 30
+    assert codes.issue("a@x.com") is not None
+
+
+def test_table_is_bounded(clock):
+    codes = OtpStore(ttl=60, capacity=4, shards=1)
+    issued = {f"v{i}@x.com": codes.issue(f"v{i}@x.com") for i in range(6)}
+    assert len(codes) == 4
+    assert codes.verify("v0@x.com", issued["v0@x.com"]) == MISSING      # oldest dropped first
+    assert codes.verify("v5@x.com", issued["v5@x.com"]) == OK
+
+    clock[0] += 61                                      # expired entries go on the next issue
+    codes.issue("w@x.com")
+    assert codes.stats() == {"stored": 1, "live": 1}
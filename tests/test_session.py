@@ -0,0 +1,144 @@
+"""
+Session helpers end to end (Streamlit bare mode): saves, reloads and the legacy master workbook.
+"""
+
+from __future__ import annotations
+
+import io
+
+import pandas as pd
+import pytest
+import streamlit as st
+
+from conftest import random_vendor
+from pmivdc import export, session
+from pmivdc.metrics import REGISTRY
+from pmivdc.loader import master_index
+from pmivdc.places import proposals
+from pmivdc.store import Store
+
+META = {"proc_contact": "Jo", "proc_product": "Tipping paper", "supplier_group": "Group",
+        "total_volume_2024": 1200.0}
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """`session` on scratch files, exports written synchronously, a clean session_state."""
+    monkeypatch.setattr(session, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(session, "EXCEL_PATH", str(tmp_path / "master.xlsx"))
+    monkeypatch.setattr(session, "STORE_PATH", str(tmp_path / "pmivdc.sqlite3"))
+    monkeypatch.setattr(session, "EXPORT_PATH", str(tmp_path / "pmivdc.export.xlsx"))
+    monkeypatch.setattr(session, "BLOB_DIR", str(tmp_path / "certificates"))
+    monkeypatch.setattr(export.EXPORTER, "schedule", export.write_excel)
+    st.session_state.clear()
+    yield session
+    st.session_state.clear()
+
+
+def login(app, email: str) -> None:
+    st.session_state["pending_email"] = email
+    app.load_vendor()
+
+
+def test_saves_leave_the_master_workbook_alone(app, rng, tmp_path):
+    legacy, store = random_vendor(rng, 2), Store(str(tmp_path / "legacy.sqlite3"))
+    store.save_meta("old@x.com", {**META, "supplier_name": "Old Mills"})
+    for tier, entries in legacy.items():
+        store.upsert("old@x.com", tier, entries)
+    export.write_excel(store, app.EXCEL_PATH)               # PMI's workbook from before the store
+    before = master_index(app.EXCEL_PATH).load("old@x.com")
+    assert before[0]
+
+    login(app, "new@x.com")
+    app.append_entry("t1", {"country": "Chile", "state": "Biobío", "muni": "Nacimiento"})
+    assert (tmp_path / "pmivdc.export.xlsx").exists()
+
+    assert master_index(app.EXCEL_PATH).load("old@x.com")[0] == before[0]
+    login(app, "old@x.com")                                 # first login here: reloaded from the workbook
+    assert {t: len(es) for t, es in app.vendor_data().items() if len(es)} == {t: len(es) for t, es in legacy.items()}
+    assert app.vendor_store().load("old@x.com")[0]["supplier_name"] == "Old Mills"
+
+
+def _editor(rows, columns):
+    """What st.data_editor hands back: the shown rows (plus edits), added rows without an _id."""
+    return pd.DataFrame(rows, columns=["_id", *columns])
+
+
+def test_editor_save_after_a_spill(app, tmp_path):
+    login(app, "a@x.com")
+    digest = app.certificate_store().put(io.BytesIO(b"%PDF-1.4 cert"), "cert.pdf")
+    for muni in ("Una", "Ilhéus"):
+        app.append_entry("t1", {"country": "Brazil", "state": "Bahia", "muni": muni, "cert_files": [digest]})
+    shown, _ = app.vendor_store().page("a@x.com", "t1")      # the page the editor was given
+    app.VAULT._slots.pop(st.session_state["vault_key"])     # idle past PMIVDC_SESSION_IDLE → spilled
+
+    added = {"_id": None, "country": "Brazil", "state": "Bahia", "muni": "Una", "cert_files": [digest]}
+    inserted, updated, deleted, report = app.update_entries(
+        "t1", _editor([*shown, added], ["country", "state", "muni", "cert_files"]), shown)
+    assert (inserted, updated, deleted, len(report)) == (1, 0, 0, 0)
+
+    ids = [e["_id"] for e in app.tier_entries("t1")]
+    assert len(ids) == len(set(ids)) == 3
+    assert ids == [e["_id"] for e in app.vendor_store().load("a@x.com")[1]["t1"]]
+    assert app.vendor_stats().entries["t1"] == 3
+
+
+def test_failed_editor_save_leaves_the_session_as_stored(app, monkeypatch):
+    login(app, "a@x.com")
+    for muni in ("Una", "Ilhéus"):
+        app.append_entry("t1", {"country": "Brazil", "state": "Bahia", "muni": muni})
+    shown, _ = app.vendor_store().page("a@x.com", "t1")
+    stats = dict(app.vendor_stats().entries)
+
+    def boom(*args, **kwargs):
+        raise OSError("database is locked")
+    monkeypatch.setattr(app.vendor_store(), "save_changes", boom)
+    with pytest.raises(OSError):                            # first row edited, second deleted
+        app.update_entries("t1", _editor([{**shown[0], "muni": "Ilhéus"}], ["country", "state", "muni", "cert_files"]),
+                           shown)
+    assert [e["muni"] for e in app.tier_entries("t1")] == ["Una", "Ilhéus"]
+    assert dict(app.vendor_stats().entries) == stats
+
+
+def test_near_miss_place_is_stored_as_typed(app):
+    login(app, "a@x.com")
+    app.append_entry("t1", {"country": "Brazil", "state": "Minas Gerais", "muni": "Santa Luzia"})
+    app.append_entry("t1", {"country": "brasil ", "state": "minas gerais", "muni": "Santa Lucia"})
+
+    stored = app.vendor_store().load("a@x.com")[1]["t1"]
+    assert [(e["country"], e["state"], e["muni"]) for e in stored] == [
+        ("Brazil", "Minas Gerais", "Santa Luzia"), ("Brazil", "Minas Gerais", "Santa Lucia")]
+    pending = proposals(app.vendor_store(), app.places())   # left for an admin to confirm
+    assert pending[["muni", "muni_new"]].values.tolist() == [["Santa Lucia", "Santa Luzia"]]
+
+
+@pytest.mark.parametrize("delivered, admin", [(True, True), (False, False), (None, False)])
+def test_admin_needs_a_mailed_code(app, monkeypatch, delivered, admin):
+    monkeypatch.setattr(app, "ADMINS", frozenset({"boss@x.com"}))
+    st.session_state.update(pending_email="Boss@x.com ", verified_email="boss@x.com")
+    if delivered is not None:
+        st.session_state["otp_delivered"] = delivered
+    assert app.is_admin() is admin
+
+
+def test_editing_one_field_of_a_form_row(app):
+    login(app, "a@x.com")
+    digest = app.certificate_store().put(io.BytesIO(b"%PDF-1.4 coc"), "coc.pdf")
+    app.append_entry("t4", {"product": "Pine", "country": "Brazil", "state": "", "muni": "", "gps": "",
+                            "source": "Woodlot", "supplier": "", "volume": 40.0, "virgin": 70.0, "recycled": 30.0,
+                            "granted": "Y", "coc_prog": "FSC", "coc_copy": "Y", "coc_file": digest,
+                            "p_purchase": "No", "p_prog": "", "vol_cert": 0.0, "vol_ctrl": 0.0, "parent": ""})
+    shown, _ = app.vendor_store().page("a@x.com", "t4")
+    edited = pd.DataFrame(shown).assign(volume=[55.0])
+
+    inserted, updated, deleted, report = app.update_entries("t4", edited, shown)
+    assert (inserted, updated, deleted, len(report)) == (0, 1, 0, 0)
+    assert app.vendor_store().load("a@x.com")[1]["t4"] == [{**shown[0], "volume": 55.0}]
+
+
+def test_resident_sessions_are_reported(app):
+    login(app, "a@x.com")
+    app.append_entry("t1", {"country": "Chile", "state": "Biobío", "muni": "Nacimiento"})
+    gauges = REGISTRY.gauges()
+    assert gauges["pmivdc_sessions_resident"] >= 1 and gauges["pmivdc_session_bytes"] > 0
+    assert "# TYPE pmivdc_sessions_spilled_total counter" in REGISTRY.render()
@@ -0,0 +1,67 @@
+"""
+LiveStats kept up incrementally through random edits == LiveStats.from_data on the result.
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from conftest import random_entry
+from pmivdc.schema import TIERS
+from pmivdc.stats import LiveStats
+
+
+def _assert_same(live: LiveStats, full: LiveStats) -> None:
+    assert {c: n for c, n in live.country_counts().items() if n} == full.country_counts()
+    assert live.composition() == pytest.approx(full.composition())
+    assert live.coverage() == pytest.approx(full.coverage())
+    assert live.completion() == full.completion()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_matches_recompute(seed, rng):
+    rng.seed(seed)
+    data = {t: [] for t in TIERS}
+    live = LiveStats()
+    for _ in range(400):
+        tier = rng.choice(TIERS)
+        entries = data[tier]
+        op = rng.random()
+        if op < 0.5 or not entries:
+            entry = random_entry(rng, tier)
+            entries.append(entry)
+            live.add(tier, entry)
+        elif op < 0.8:                                      # edit = remove the old, add the new
+            i = rng.randrange(len(entries))
+            new = {**random_entry(rng, tier), "_id": entries[i]["_id"]}
+            live.remove(tier, entries[i])
+            live.add(tier, new)
+            entries[i] = new
+        elif op < 0.97:
+            live.remove(tier, entries.pop(rng.randrange(len(entries))))
+        else:
+            live.clear_tier(tier)
+            entries.clear()
+        _assert_same(live, LiveStats.from_data(data))
+
+
+def test_removing_every_entry_leaves_no_residue():
+    stats = LiveStats()
+    entries = [{"volume": 33.5, "virgin": 55.6, "recycled": 64.2}, {"volume": 7.44, "virgin": 99.3, "recycled": 86.0},
+               {"volume": 4.84, "virgin": 33.3, "recycled": 72.1}]
+    stats.add_many("t4", entries)
+    stats.add_many("t4", entries, sign=-1)
+    assert stats.composition() == (0.0, 0.0)
+    assert stats.completion()["t4"] == 0
+
+
+def test_figures():
+    stats = LiveStats.from_data({
+        "t1": [{"country": "Brazil", "cert_files": ["d"]}, {"country": "Chile", "cert_files": []}],
+        "t4": [{"country": "Brazil", "volume": 60, "virgin": 100, "recycled": 0, "granted": "Y"},
+               {"country": "Peru", "volume": "40", "virgin": 50, "recycled": 50, "granted": "N"}],
+    })
+    assert stats.country_counts() == {"Brazil": 2, "Chile": 1, "Peru": 1}
+    assert stats.composition() == pytest.approx((80.0, 20.0))
+    assert stats.coverage() == {"t1": 50.0, "t2": 0.0, "t3": 0.0, "t4": 50.0}
+    assert stats.completion() == {"t1": 100, "t2": 0, "t3": 0, "t4": 100}
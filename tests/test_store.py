@@ -0,0 +1,103 @@
+"""
+Store: per-vendor upserts, one-transaction change sets, paging, concurrent writers.
+"""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from conftest import random_entry, random_vendor
+from pmivdc.history import _as_stored
+from pmivdc.store import Store
+
+
+def test_upsert_round_trip_keeps_order_and_fields(store, rng):
+    data = random_vendor(rng)
+    store.save_meta("a@x.com", {"supplier_name": "Acme"})
+    for tier, entries in data.items():
+        store.upsert("a@x.com", tier, entries)
+
+    meta, loaded = store.load("a@x.com")
+    assert meta == {"supplier_name": "Acme"}
+    assert loaded == {t: [_as_stored(t, e) for e in entries] for t, entries in data.items()}
+
+
+def test_update_keeps_position(store, rng):
+    entries = [random_entry(rng, "t2") for _ in range(3)]
+    store.upsert("a@x.com", "t2", entries)
+    store.upsert("a@x.com", "t2", [{**entries[0], "country": "Chile"}])
+
+    loaded = store.load("a@x.com")[1]["t2"]
+    assert [e["_id"] for e in loaded] == [e["_id"] for e in entries]
+    assert loaded[0]["country"] == "Chile"
+
+
+def test_vendors_are_isolated(store, rng):
+    a, b = random_entry(rng, "t1"), random_entry(rng, "t1")
+    store.upsert("a@x.com", "t1", [a])
+    store.upsert("b@x.com", "t1", [{**b, "_id": a["_id"]}])      # same entry id, other vendor
+    store.delete("b@x.com", "t1", [a["_id"]])
+
+    assert [e["_id"] for e in store.load("a@x.com")[1]["t1"]] == [a["_id"]]
+    assert store.load("b@x.com")[1] == {}
+
+
+def test_save_changes_applies_upserts_and_deletions_together(store, rng):
+    old = [random_entry(rng, "t4") for _ in range(4)]
+    store.upsert("a@x.com", "t4", old)
+    new = random_entry(rng, "t4")
+    store.save_changes("a@x.com", "t4", [{**old[1], "volume": 99.0}, new], [old[0]["_id"], old[3]["_id"]])
+
+    loaded = store.load("a@x.com")[1]["t4"]
+    assert [e["_id"] for e in loaded] == [old[1]["_id"], old[2]["_id"], new["_id"]]
+    assert loaded[0]["volume"] == 99.0
+
+
+def test_failed_save_changes_writes_nothing(store, rng):
+    keep = random_entry(rng, "t3")
+    store.upsert("a@x.com", "t3", [keep])
+    with pytest.raises(KeyError):                           # second entry has no _id
+        store.save_changes("a@x.com", "t3", [random_entry(rng, "t3"), {"country": "Peru"}], [keep["_id"]])
+    assert store.load("a@x.com")[1]["t3"] == [_as_stored("t3", keep)]
+
+
+def test_gps_is_parsed_into_lat_lon(store):
+    store.upsert("a@x.com", "t4", [{"_id": "p", "gps": "-2.5, 113.9"}, {"_id": "q", "gps": "somewhere"}])
+    rows = dict(store._con().execute("SELECT entry_id, lat FROM t4").fetchall())
+    assert rows == {"p": -2.5, "q": None}
+
+
+def test_page_filters_sorts_and_counts(store, rng):
+    entries = [random_entry(rng, "t2") for _ in range(30)]
+    store.upsert("a@x.com", "t2", entries)
+
+    brazil = [e for e in entries if e["country"] == "Brazil"]
+    page, total = store.page("a@x.com", "t2", {"country": "Brazil"}, sort="muni", limit=5)
+    assert total == len(brazil)
+    assert [e["muni"] for e in page] == sorted(e["muni"] for e in brazil)[:5]
+    with pytest.raises(KeyError):
+        store.page("a@x.com", "t2", {"country = '' OR 1 --": "x"})
+
+
+def test_concurrent_writers_lose_nothing(tmp_path, rng):
+    path = str(tmp_path / "shared.sqlite3")
+    Store(path)
+    batches = {f"v{i}@x.com": [random_entry(rng, "t1") for _ in range(40)] for i in range(6)}
+
+    def write(vendor):
+        db = Store(path)                                    # own connection, like another session
+        for entry in batches[vendor]:
+            db.upsert(vendor, "t1", [entry])
+
+    threads = [threading.Thread(target=write, args=(v,)) for v in batches]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    db = Store(path)
+    assert db.row_count() == sum(map(len, batches.values()))
+    for vendor, entries in batches.items():
+        assert [e["_id"] for e in db.load(vendor)[1]["t1"]] == [e["_id"] for e in entries]
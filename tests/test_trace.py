@@ -0,0 +1,120 @@
+"""
+TraceGraph kept up incrementally through random edits == TraceGraph.from_data on the result.
+"""
+
+from __future__ import annotations
+
+import re
+import uuid
+
+import numpy as np
+import pytest
+
+from conftest import random_entry
+from pmivdc.schema import TIERS
+from pmivdc.trace import UPSTREAM, TraceGraph
+
+def _by_id(graph: TraceGraph, tier: str, values) -> dict:
+    alive = graph.arr[tier]["alive"][:len(graph.ids[tier])]
+    return {graph.ids[tier][i]: values[i] for i in np.flatnonzero(alive)}
+
+
+def _view(graph: TraceGraph) -> dict:
+    """Everything the pages read, keyed by entry id instead of graph position."""
+    pulp = graph.pulp_table().set_index("entry_id").sort_index()
+    issues = graph.validate()
+    rounded = lambda text: re.sub(r"-?\d+\.\d+", lambda m: f"{float(m.group()):.0f}", text)
+    return {
+        "pulp": pulp.to_dict("index"),
+        "rollup": {t: {k: tuple(v) for k, v in _by_id(graph, t, graph.rollup(t).T).items()} for t in ("t1", "t2", "t3")},
+        "parents": {t: {k: graph.ids[UPSTREAM[t]][p] if p >= 0 else None
+                        for k, p in _by_id(graph, t, graph.arr[t]["parent"]).items()} for t in UPSTREAM},
+        "coverage": graph.coverage(),
+        "issues": sorted(zip(issues["tier"], issues["entry_id"], issues["issue"].map(rounded))),
+        "options": {t: graph.options(t) for t in TIERS},
+        "unlinked": graph.unlinked_vol,
+    }
+
+
+def _assert_same(live: TraceGraph, full: TraceGraph) -> None:
+    a, b = _view(live), _view(full)
+    assert a["parents"] == b["parents"]
+    assert a["options"] == b["options"]
+    assert a["issues"] == b["issues"]
+    assert a["coverage"] == b["coverage"]
+    assert a["unlinked"] == pytest.approx(b["unlinked"], abs=1e-9)
+    assert a["pulp"].keys() == b["pulp"].keys()
+    for k, row in a["pulp"].items():
+        assert row == pytest.approx(b["pulp"][k], abs=0.051), k
+    for t, nodes in a["rollup"].items():
+        assert nodes.keys() == b["rollup"][t].keys()
+        for k, sums in nodes.items():
+            assert sums == pytest.approx(b["rollup"][t][k], abs=1e-9), (t, k)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_incremental_matches_from_data(seed, rng):
+    rng.seed(seed)
+    data = {t: [] for t in TIERS}
+    future = {t: [] for t in TIERS}                 # ids named as a parent before they exist
+    live = TraceGraph()
+
+    def parent_for(tier):
+        up = UPSTREAM[tier]
+        pick = rng.random()
+        if pick < 0.15:
+            return ""                                   # implicit: the only entry above, if one
+        if pick < 0.3 or not data[up]:
+            future[up].append(uuid.UUID(int=rng.getrandbits(128)).hex)
+            return future[up][-1]
+        return rng.choice(data[up])["_id"]
+
+    def new_entry(tier):
+        entry = random_entry(rng, tier, parent_for(tier) if tier in UPSTREAM else "")
+        if future[tier] and rng.random() < 0.5:
+            entry["_id"] = future[tier].pop(rng.randrange(len(future[tier])))
+        return entry
+
+    for step in range(300):
+        tier = rng.choice(TIERS)
+        entries = data[tier]
+        op = rng.random()
+        if op < 0.45 or not entries:
+            entry = new_entry(tier)
+            entries.append(entry)
+            live.add(tier, entry)
+        elif op < 0.75:                                 # edit: same _id, new fields (and maybe parent)
+            i = rng.randrange(len(entries))
+            new = {**new_entry(tier), "_id": entries[i]["_id"]}
+            entries[i] = new
+            live.add(tier, new)
+        elif op < 0.97:
+            live.remove(tier, entries.pop(rng.randrange(len(entries))))
+        else:
+            live.clear_tier(tier)
+            entries.clear()
+        if step % 10 == 9:
+            _assert_same(live, TraceGraph.from_data(data))
+    _assert_same(live, TraceGraph.from_data(data))
+
+
+def test_rollup_and_rules():
+    data = {
+        "t1": [{"_id": "f", "country": "Brazil", "cert_files": ["d"]}],
+        "t2": [{"_id": "m", "country": "Brazil", "granted": "Y"}],             # implicit parent: the only T1
+        "t3": [{"_id": "p", "country": "Brazil", "granted": "Y", "parent": "m"}],
+        "t4": [{"_id": "a", "parent": "p", "granted": "Y", "volume": 60, "virgin": 100, "recycled": 0},
+               {"_id": "b", "parent": "p", "granted": "N", "volume": 30, "virgin": 50, "recycled": 40}],
+    }
+    graph = TraceGraph.from_data(data)
+    row = graph.pulp_table().iloc[0]
+    assert (row["plantations"], row["volume %"], row["certified path %"]) == (2, 90.0, pytest.approx(66.7))
+    assert graph.rollup("t1")[:, 0].tolist() == [90.0, 60.0]
+    assert graph.rollup_table("t1").drop(columns=["entry_id"]).values.tolist() == [["Brazil / – / –", 90.0, 66.7]]
+    assert graph.options("t3") == {"p": "Brazil / – / –"} and graph.unlinked_vol == 0.0
+    assert sorted(graph.validate()["entry_id"]) == ["b", "p"]      # mix ≠ 100 %, pulp volume ≠ 100 %
+
+    graph.remove("t1", data["t1"][0])                               # factory gone → no certified path
+    assert graph.pulp_table().iloc[0]["certified path %"] == 0.0
+    graph.add("t1", data["t1"][0])
+    assert graph.pulp_table().iloc[0]["certified path %"] == pytest.approx(66.7)